@@ -1,6 +1,7 @@
 from config.settings import Settings
 from google import genai
 from google.genai import types
+import asyncio
 import logging
 import os
 import uuid
@@ -76,7 +77,9 @@ class GeminiImageClient:
             
             try:
                 # Try with a timeout
-                response = client.models.generate_content(
+                # The SDK call is blocking, so run it off the event loop
+                response = await asyncio.to_thread(
+                    client.models.generate_content,
                     model=self.model,
                     contents=prompt,
                     config=types.GenerateContentConfig(
@@ -85,8 +88,10 @@ class GeminiImageClient:
                 )
             except Exception as gen_err:
                 logger.error(f"Error calling Gemini API: {str(gen_err)}")
-                # Return fallback image
-                return self._create_fallback_image(file_path, f"API Error: {str(gen_err)}", prompt)
+                # Return fallback image, keeping the API error for the circuit breaker
+                result = self._create_fallback_image(file_path, f"API Error: {str(gen_err)}", prompt)
+                result["upstream_error"] = gen_err
+                return result
             
             logger.info(f"Response received, type: {type(response)}")
             
@@ -208,7 +213,7 @@ class GeminiImageClient:
             # If we successfully saved the image, return success
             if image_saved:
                 # Add a small delay to ensure file is written
-                time.sleep(0.5)
+                await asyncio.sleep(0.5)
                 
                 return {
                     "success": True,
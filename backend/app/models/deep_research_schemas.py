@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Literal
 
 class DeepResearchRequest(BaseModel):
     """Request model for deep research on educational topics"""
@@ -7,6 +7,13 @@ class DeepResearchRequest(BaseModel):
     subtopics: Optional[List[str]] = Field(None, description="Specific subtopics to research (optional)")
     academic_level: str = Field(..., description="Academic level (e.g., high school, undergraduate, graduate)")
     include_references: bool = Field(True, description="Whether to include academic references")
+    mode: Optional[Literal["single", "parallel"]] = Field(
+        None, description="Generate the document in one completion or as an outline plus concurrent sections (defaults to "
+            "section-wise generation when subtopics are given, otherwise RESEARCH_MODE)"
+    )
+    refresh_subtopics: Optional[List[str]] = Field(
+        None, description="Subtopics whose cached sections are regenerated instead of reused"
+    )
     
     class Config:
         schema_extra = {
@@ -105,3 +112,31 @@ class DeepResearchResponse(BaseModel):
                 ]
             }
         }
+
+class TrendingTopic(BaseModel):
+    """Model for a trending research topic"""
+    topic: str = Field(..., description="Topic name")
+    description: str = Field(..., description="Brief description of the topic (2-3 sentences)")
+    relevance: str = Field(..., description="Why the topic is currently relevant or trending")
+
+class TrendingTopicList(BaseModel):
+    """Structured output wrapper for trending topics (JSON schemas must have an object at the top level)"""
+    topics: List[TrendingTopic] = Field(..., description="Trending topics")
+
+class ResearchJobProgress(BaseModel):
+    """Progress of a research job, counted in LLM calls"""
+    completed: int = Field(..., description="Calls finished (cached sections count as finished)")
+    total: int = Field(..., description="Calls the job needs; grows once a parallel-mode outline lists its sections")
+
+class ResearchJobStatus(BaseModel):
+    """Status of a background deep research job"""
+    job_id: str = Field(..., description="Job identifier")
+    status: Literal["queued", "running", "succeeded", "failed", "cancelled"] = Field(
+        ..., description="Job status (cancelled: the server shut down before the job finished)"
+    )
+    progress: ResearchJobProgress = Field(..., description="Job progress")
+    created_at: float = Field(..., description="Submission time (Unix timestamp)")
+    started_at: Optional[float] = Field(None, description="Time a worker picked up the job")
+    finished_at: Optional[float] = Field(None, description="Time the job succeeded, failed or was cancelled")
+    error: Optional[str] = Field(None, description="Error message of a failed or cancelled job")
+    result: Optional[DeepResearchResponse] = Field(None, description="The research, once the job has succeeded")
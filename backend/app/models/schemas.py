@@ -5,6 +5,7 @@ class ContentRequest(BaseModel):
     """Request model for educational content generation"""
     topic: str = Field(..., description="Educational topic to generate content for")
     audience: str = Field(..., description="Target audience level (elementary, middle school, high school, college, graduate)")
+    include_images: bool = Field(False, description="Generate images while streaming and push them as image_ready events (streaming endpoint only)")
     
     class Config:
         schema_extra = {
@@ -14,6 +15,34 @@ class ContentRequest(BaseModel):
             }
         }
 
+class BatchContentRequest(BaseModel):
+    """Request model for generating many lessons in one call"""
+    items: List[ContentRequest] = Field(..., min_length=1, description="Lessons to generate")
+    concurrency: Optional[int] = Field(None, ge=1, description="Lessons generated at the same time (capped by BATCH_MAX_CONCURRENCY)")
+    
+    class Config:
+        schema_extra = {
+            "example": {
+                "items": [
+                    {"topic": "photosynthesis", "audience": "high school"},
+                    {"topic": "cell division", "audience": "middle school"}
+                ],
+                "concurrency": 4
+            }
+        }
+
+class BatchContentResult(BaseModel):
+    """Model for one NDJSON line of a batch lesson response"""
+    index: int = Field(..., description="Position of the item in the request")
+    topic: str = Field(..., description="Requested topic")
+    audience: str = Field(..., description="Requested audience level")
+    status: str = Field(..., description="\"ok\" or \"error\"")
+    cached: Optional[bool] = Field(None, description="Flag indicating the lesson was served from the cache")
+    explanation: Optional[str] = Field(None, description="Educational text explanation (if successful)")
+    image_prompts: Optional[List[str]] = Field(None, description="List of image prompts (if successful)")
+    error: Optional[str] = Field(None, description="Error message (if failed)")
+    duration_ms: int = Field(..., description="Time spent on this item in milliseconds")
+
 class ImagePrompt(BaseModel):
     """Model for an image prompt"""
     prompt: str = Field(..., description="Text prompt for image generation")
@@ -41,11 +70,22 @@ class ContentResponse(BaseModel):
             }
         }
 
+class StreamImageResult(BaseModel):
+    """Model for an image generated while a lesson streams"""
+    index: int = Field(..., description="Position of the image prompt in the lesson")
+    prompt: str = Field(..., description="Image prompt the image was generated from")
+    success: bool = Field(..., description="Flag indicating if the image generation was successful")
+    image_url: Optional[str] = Field(None, description="URL to the generated image (if successful)")
+    error: Optional[str] = Field(None, description="Error message (if failed)")
+
 class ContentStreamChunk(BaseModel):
     """Model for a chunk of the streaming content response"""
     chunk: str = Field(..., description="A chunk of the generated text")
     finished: bool = Field(..., description="Flag indicating if this is the final chunk")
     image_prompts: Optional[List[str]] = Field(None, description="List of image prompts (only included in final chunk)")
+    image_prompt: Optional[str] = Field(None, description="A single image prompt, sent as soon as the LLM finishes writing it")
+    image_prompt_index: Optional[int] = Field(None, description="Position of image_prompt in the final image_prompts list")
+    image_ready: Optional[StreamImageResult] = Field(None, description="A finished image (only when include_images is set)")
     
     class Config:
         schema_extra = {
@@ -56,6 +96,49 @@ class ContentStreamChunk(BaseModel):
             }
         }
 
+class BundleImage(BaseModel):
+    """Model for one image of a lesson bundle"""
+    prompt: str = Field(..., description="Image prompt the image was generated from")
+    success: bool = Field(..., description="Flag indicating if the image generation was successful")
+    image_url: Optional[str] = Field(None, description="URL to the generated image (if successful)")
+    error: Optional[str] = Field(None, description="Error message (if failed)")
+    duration_ms: int = Field(..., description="Time spent generating this image in milliseconds")
+
+class BundleTimings(BaseModel):
+    """Model for the timings of a lesson bundle"""
+    explanation_ms: int = Field(..., description="Time spent generating the explanation in milliseconds")
+    images_ms: int = Field(..., description="Wall-clock time spent generating all images in milliseconds")
+    total_ms: int = Field(..., description="Total time for the bundle in milliseconds")
+
+class LessonBundleResponse(BaseModel):
+    """Response model for a lesson with its generated images"""
+    explanation: str = Field(..., description="Educational text explanation in markdown format")
+    image_prompts: List[str] = Field(..., description="List of image prompts for visual representations")
+    images: List[BundleImage] = Field(..., description="Generated images, in the same order as image_prompts")
+    partial: bool = Field(..., description="Flag indicating that at least one image failed")
+    timings: BundleTimings = Field(..., description="Per-stage timings")
+    
+    class Config:
+        schema_extra = {
+            "example": {
+                "explanation": "# Photosynthesis (for high school)\n\n## Introduction\nPhotosynthesis is a process used by plants...",
+                "image_prompts": [
+                    "Educational diagram showing the process of photosynthesis for high school students"
+                ],
+                "images": [
+                    {
+                        "prompt": "Educational diagram showing the process of photosynthesis for high school students",
+                        "success": True,
+                        "image_url": "/static/generated_images/___Educationa_1a2b3c4d.png",
+                        "error": None,
+                        "duration_ms": 8400
+                    }
+                ],
+                "partial": False,
+                "timings": {"explanation_ms": 21500, "images_ms": 9100, "total_ms": 30600}
+            }
+        }
+
 class ImageGenerationRequest(BaseModel):
     """Request model for image generation"""
     prompt: str = Field(..., description="Text prompt for image generation")
@@ -1,3 +1,11 @@
 # Import API client modules
 from . import image_client
+from . import response_cache
+from . import singleflight
+from . import stream_hub
+from . import concurrency_limiter
+from . import retry
+from . import hedging
+from . import endpoint_pool
 from . import llm_client
+from . import client_registry
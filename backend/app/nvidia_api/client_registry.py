@@ -0,0 +1,183 @@
+from config.settings import Settings
+from app.nvidia_api.llm_client import LLMClient
+from typing import Dict, Any, Optional
+from collections import Counter
+import importlib.util
+import weakref
+import httpx
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class ConnectionStats:
+    """Connection reuse metrics for the shared LLM HTTP pool"""
+
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self.http_versions = Counter()
+        self._seen_streams = weakref.WeakSet()
+
+    def record(self, response: httpx.Response):
+        """
+        Record a response received through the pool.
+
+        Each pooled connection exposes one network stream, so a stream we have
+        not seen before means the request had to open a new connection.
+
+        Args:
+            response: The HTTP response (headers received)
+        """
+        self.requests += 1
+        self.http_versions[response.http_version] += 1
+
+        stream = response.extensions.get("network_stream")
+        if stream is None:
+            return
+        try:
+            if stream not in self._seen_streams:
+                self._seen_streams.add(stream)
+                self.new_connections += 1
+        except TypeError:
+            # Stream type does not support weak references, count it as new
+            self.new_connections += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the current metrics as a dictionary"""
+        reused = max(self.requests - self.new_connections, 0)
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "reused_connections": reused,
+            "reuse_ratio": round(reused / self.requests, 4) if self.requests else 0.0,
+            "open_connections": len(self._seen_streams),
+            "http_versions": dict(self.http_versions)
+        }
+
+
+class LLMClientRegistry:
+    """
+    Process-wide registry of pooled LLM clients.
+
+    All services share one LLMClient backed by a single keep-alive (and, when
+    available, HTTP/2) connection pool to LLM_API_BASE_URL, so request volume
+    no longer translates into new DNS/TCP/TLS handshakes.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.stats = ConnectionStats()
+        self.http2 = settings.LLM_HTTP2 and importlib.util.find_spec("h2") is not None
+        if settings.LLM_HTTP2 and not self.http2:
+            logger.warning("LLM_HTTP2 is enabled but the h2 package is not installed, using HTTP/1.1")
+
+        self._http_client: Optional[httpx.Client] = None
+        self._async_http_client: Optional[httpx.AsyncClient] = None
+        self._llm_client: Optional[LLMClient] = None
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.settings.LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=self.settings.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=self.settings.LLM_HTTP_KEEPALIVE_EXPIRY
+        )
+
+    def _timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(
+            self.settings.LLM_HTTP_TIMEOUT,
+            connect=self.settings.LLM_HTTP_CONNECT_TIMEOUT
+        )
+
+    def get_http_client(self) -> httpx.Client:
+        """Get the shared synchronous HTTP client, creating it on first use"""
+        if self._http_client is None:
+            self._http_client = httpx.Client(
+                http2=self.http2,
+                limits=self._limits(),
+                timeout=self._timeout(),
+                event_hooks={"response": [self.stats.record]}
+            )
+        return self._http_client
+
+    def get_async_http_client(self) -> httpx.AsyncClient:
+        """Get the shared asynchronous HTTP client, creating it on first use"""
+        if self._async_http_client is None:
+            async def record_response(response: httpx.Response):
+                self.stats.record(response)
+
+            self._async_http_client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=self._limits(),
+                timeout=self._timeout(),
+                event_hooks={"response": [record_response]}
+            )
+        return self._async_http_client
+
+    def get_llm_client(self) -> LLMClient:
+        """Get the shared LLM client, creating it on first use"""
+        if self._llm_client is None:
+            self._llm_client = LLMClient(
+                self.settings,
+                http_client=self.get_http_client(),
+                async_http_client=self.get_async_http_client()
+            )
+        return self._llm_client
+
+    async def aclose(self):
+        """Close the pooled HTTP clients"""
+        if self._async_http_client is not None:
+            await self._async_http_client.aclose()
+            self._async_http_client = None
+        if self._http_client is not None:
+            self._http_client.close()
+            self._http_client = None
+        self._llm_client = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return pool configuration and connection reuse metrics"""
+        return {
+            "http2": self.http2,
+            "max_connections": self.settings.LLM_HTTP_MAX_CONNECTIONS,
+            "max_keepalive_connections": self.settings.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            "keepalive_expiry": self.settings.LLM_HTTP_KEEPALIVE_EXPIRY,
+            "connections": self.stats.snapshot(),
+            "client": self._llm_client.get_stats() if self._llm_client is not None else None
+        }
+
+
+_registry: Optional[LLMClientRegistry] = None
+
+
+def get_llm_client_registry(settings: Settings) -> LLMClientRegistry:
+    """
+    Get the process-wide LLM client registry.
+
+    The registry is bound to the settings it was first created with; it is
+    normally created in the application lifespan.
+
+    Args:
+        settings: Application settings
+
+    Returns:
+        The shared LLMClientRegistry
+    """
+    global _registry
+    if _registry is None:
+        _registry = LLMClientRegistry(settings)
+    return _registry
+
+
+def get_llm_client(settings: Settings) -> LLMClient:
+    """Get the shared, pooled LLM client"""
+    return get_llm_client_registry(settings).get_llm_client()
+
+
+async def shutdown_llm_client_registry():
+    """Close and discard the process-wide LLM client registry"""
+    global _registry
+    if _registry is not None:
+        await _registry.aclose()
+        _registry = None
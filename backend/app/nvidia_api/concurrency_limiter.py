@@ -0,0 +1,186 @@
+from typing import Dict, Any, AsyncIterator, Optional
+from contextlib import asynccontextmanager
+from collections import deque
+import asyncio
+import time
+import httpx
+import openai
+
+
+class LimiterTimeoutError(Exception):
+    """Raised when a request waits longer than the maximum queue time for a concurrency slot"""
+    pass
+
+
+def is_overload_error(error: BaseException) -> bool:
+    """
+    Check whether an upstream error signals overload (rate limiting or timeouts).
+
+    Args:
+        error: Exception raised by the upstream call
+
+    Returns:
+        True for 429/503 responses and timeouts
+    """
+    if isinstance(error, (openai.RateLimitError, openai.APITimeoutError, httpx.TimeoutException, asyncio.TimeoutError)):
+        return True
+    return getattr(error, "status_code", None) in (429, 503)
+
+
+class LimiterPermit:
+    """A granted concurrency slot"""
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.first_response_at: Optional[float] = None
+
+    def mark_first_response(self):
+        """Record the time of the first response byte/chunk (used as latency for streams)"""
+        if self.first_response_at is None:
+            self.first_response_at = time.monotonic()
+
+    @property
+    def latency(self) -> float:
+        end = self.first_response_at if self.first_response_at is not None else time.monotonic()
+        return end - self.started_at
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD (additive increase, multiplicative decrease) concurrency limiter.
+
+    The limit grows by roughly `increase` per window of successful, fast calls
+    and is multiplied by `backoff_ratio` when the upstream answers with 429s or
+    times out. Calls beyond the limit wait in a FIFO queue for at most max_wait
+    seconds.
+    """
+
+    def __init__(self, initial_limit: float, min_limit: float, max_limit: float, max_wait: float,
+                 increase: float = 1.0, backoff_ratio: float = 0.5, decrease_cooldown: float = 1.0):
+        """
+        Initialize the limiter.
+
+        Args:
+            initial_limit: Starting number of concurrent calls
+            min_limit: Lower bound for the limit
+            max_limit: Upper bound for the limit
+            max_wait: Maximum seconds a call may wait for a slot
+            increase: Additive increase per window of healthy calls
+            backoff_ratio: Multiplicative factor applied on overload
+            decrease_cooldown: Minimum seconds between two decreases, so a burst of failures cuts once
+        """
+        self.limit = float(initial_limit)
+        self.min_limit = float(min_limit)
+        self.max_limit = float(max_limit)
+        self.max_wait = max_wait
+        self.increase = increase
+        self.backoff_ratio = backoff_ratio
+        self.decrease_cooldown = decrease_cooldown
+
+        self.in_flight = 0
+        self._waiters: deque = deque()
+        self._last_decrease = 0.0
+
+        self.successes = 0
+        self.overloads = 0
+        self.rejections = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def _has_capacity(self) -> bool:
+        return self.in_flight < max(int(self.limit), 1)
+
+    async def _acquire_slot(self):
+        if not self._waiters and self._has_capacity():
+            self.in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted just as the wait expired, keep it
+                return
+            waiter.cancel()
+            self._discard(waiter)
+            self.rejections += 1
+            raise LimiterTimeoutError(f"No LLM concurrency slot available within {self.max_wait}s")
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted a slot we will never use
+                self._release()
+            else:
+                waiter.cancel()
+                self._discard(waiter)
+            raise
+
+    def _discard(self, waiter: asyncio.Future):
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _release(self):
+        self.in_flight -= 1
+        self._wake_waiters()
+
+    def _wake_waiters(self):
+        while self._waiters and self._has_capacity():
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def _on_success(self, latency: float, latency_target: float):
+        self.successes += 1
+        if latency <= latency_target:
+            self.limit = min(self.max_limit, self.limit + self.increase / max(self.limit, 1.0))
+            self._wake_waiters()
+
+    def _on_overload(self):
+        self.overloads += 1
+        now = time.monotonic()
+        if now - self._last_decrease >= self.decrease_cooldown:
+            self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+            self._last_decrease = now
+
+    @asynccontextmanager
+    async def acquire(self, latency_target: float) -> AsyncIterator[LimiterPermit]:
+        """
+        Hold a concurrency slot for the duration of an upstream call.
+
+        Args:
+            latency_target: Latency in seconds under which a call counts as healthy
+
+        Yields:
+            A LimiterPermit; streaming callers mark the first chunk so time-to-first-token is measured
+        """
+        await self._acquire_slot()
+        permit = LimiterPermit()
+        try:
+            yield permit
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if is_overload_error(e):
+                self._on_overload()
+            raise
+        else:
+            self._on_success(permit.latency, latency_target)
+        finally:
+            self._release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return the current limit, queue depth and outcome counters"""
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "successes": self.successes,
+            "overloads": self.overloads,
+            "rejections": self.rejections
+        }
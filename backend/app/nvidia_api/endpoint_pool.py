@@ -0,0 +1,185 @@
+from typing import Dict, Any, AsyncIterator, List, Optional, Sequence
+from contextlib import asynccontextmanager
+from openai import AsyncOpenAI
+from app.nvidia_api.retry import is_retryable_error
+import asyncio
+import random
+import time
+
+
+class LLMEndpoint:
+    """One OpenAI-compatible deployment with its own key, model id and health statistics"""
+
+    def __init__(self, name: str, base_url: str, model_id: str, client: AsyncOpenAI, weight: float = 1.0):
+        self.name = name
+        self.base_url = base_url
+        self.model_id = model_id
+        self.client = client
+        self.weight = max(weight, 0.01)
+
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ewma_latency: Optional[float] = None
+        self.ejected_until = 0.0
+        self.ejections = 0
+
+    def is_ejected(self, now: float) -> bool:
+        return now < self.ejected_until
+
+    def get_stats(self, now: float) -> Dict[str, Any]:
+        """Return the endpoint's load and health counters"""
+        return {
+            "name": self.name,
+            "base_url": self.base_url,
+            "model_id": self.model_id,
+            "weight": self.weight,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "ewma_latency": round(self.ewma_latency, 3) if self.ewma_latency is not None else None,
+            "ejected": self.is_ejected(now),
+            "ejections": self.ejections
+        }
+
+
+class EndpointPool:
+    """
+    Load balancer over several LLM endpoints with passive health checking.
+
+    Endpoints are chosen by least outstanding requests or by a latency-weighted
+    score (EWMA latency x in-flight load, sampled with power-of-two choices).
+    An endpoint that fails failure_threshold times in a row is ejected for an
+    exponentially growing period and rejoins automatically when it expires; its
+    first success afterwards resets the backoff.
+    """
+
+    STRATEGIES = ("least_outstanding", "latency_weighted")
+
+    def __init__(self, endpoints: List[LLMEndpoint], strategy: str = "least_outstanding",
+                 failure_threshold: int = 3, ejection_time: float = 30.0, max_ejection_time: float = 300.0,
+                 ewma_alpha: float = 0.3):
+        """
+        Initialize the pool.
+
+        Args:
+            endpoints: Endpoints to balance over (at least one)
+            strategy: "least_outstanding" or "latency_weighted"
+            failure_threshold: Consecutive failures before an endpoint is ejected
+            ejection_time: Seconds of the first ejection, doubled on each repeated ejection
+            max_ejection_time: Upper bound for an ejection in seconds
+            ewma_alpha: Smoothing factor for the latency EWMA
+        """
+        if not endpoints:
+            raise ValueError("EndpointPool requires at least one endpoint")
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown load balancing strategy: {strategy}")
+
+        self.endpoints = endpoints
+        self.strategy = strategy
+        self.failure_threshold = failure_threshold
+        self.ejection_time = ejection_time
+        self.max_ejection_time = max_ejection_time
+        self.ewma_alpha = ewma_alpha
+
+    @property
+    def model_ids(self) -> List[str]:
+        """Distinct model ids served by the endpoints, sorted"""
+        return sorted({endpoint.model_id for endpoint in self.endpoints})
+
+    def select(self, exclude: Sequence[LLMEndpoint] = ()) -> LLMEndpoint:
+        """
+        Pick the endpoint for the next call.
+
+        Args:
+            exclude: Endpoints to avoid if possible (e.g. ones that already failed this request)
+
+        Returns:
+            The selected endpoint
+        """
+        if len(self.endpoints) == 1:
+            return self.endpoints[0]
+
+        now = time.monotonic()
+        healthy = [e for e in self.endpoints if not e.is_ejected(now)]
+        candidates = [e for e in healthy if e not in exclude] or healthy
+        if not candidates:
+            # Everything is ejected: fail open to the endpoint that recovers first
+            return min(self.endpoints, key=lambda e: e.ejected_until)
+
+        if self.strategy == "latency_weighted":
+            return self._select_latency_weighted(candidates)
+        return self._select_least_outstanding(candidates)
+
+    def _select_least_outstanding(self, candidates: List[LLMEndpoint]) -> LLMEndpoint:
+        lowest = min(e.outstanding / e.weight for e in candidates)
+        return random.choice([e for e in candidates if e.outstanding / e.weight == lowest])
+
+    def _select_latency_weighted(self, candidates: List[LLMEndpoint]) -> LLMEndpoint:
+        known = [e.ewma_latency for e in candidates if e.ewma_latency is not None]
+        # Endpoints without samples are scored optimistically so they receive traffic
+        default_latency = min(known) if known else 1.0
+
+        def score(endpoint: LLMEndpoint) -> float:
+            latency = endpoint.ewma_latency if endpoint.ewma_latency is not None else default_latency
+            return latency * (endpoint.outstanding + 1) / endpoint.weight
+
+        if len(candidates) <= 2:
+            return min(candidates, key=score)
+        first, second = random.sample(candidates, 2)
+        return first if score(first) <= score(second) else second
+
+    @asynccontextmanager
+    async def track(self, endpoint: LLMEndpoint) -> AsyncIterator[LLMEndpoint]:
+        """
+        Account for one call to an endpoint and feed its outcome into the health checks.
+
+        Args:
+            endpoint: Endpoint returned by select()
+
+        Yields:
+            The same endpoint
+        """
+        endpoint.outstanding += 1
+        endpoint.requests += 1
+        started_at = time.monotonic()
+        try:
+            yield endpoint
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if is_retryable_error(e):
+                self._on_failure(endpoint)
+            raise
+        else:
+            self._on_success(endpoint, time.monotonic() - started_at)
+        finally:
+            endpoint.outstanding -= 1
+
+    def _on_success(self, endpoint: LLMEndpoint, latency: float):
+        if endpoint.ewma_latency is None:
+            endpoint.ewma_latency = latency
+        else:
+            endpoint.ewma_latency = self.ewma_alpha * latency + (1 - self.ewma_alpha) * endpoint.ewma_latency
+        endpoint.consecutive_failures = 0
+        endpoint.ejections = 0
+
+    def _on_failure(self, endpoint: LLMEndpoint):
+        endpoint.failures += 1
+        endpoint.consecutive_failures += 1
+        if len(self.endpoints) > 1 and endpoint.consecutive_failures >= self.failure_threshold:
+            duration = min(self.max_ejection_time, self.ejection_time * (2 ** endpoint.ejections))
+            endpoint.ejected_until = time.monotonic() + duration
+            endpoint.ejections += 1
+            endpoint.consecutive_failures = 0
+            print(f"Ejecting LLM endpoint {endpoint.name} for {duration:.0f}s after repeated failures")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return the strategy and per-endpoint statistics"""
+        now = time.monotonic()
+        return {
+            "strategy": self.strategy,
+            "endpoints": [endpoint.get_stats(now) for endpoint in self.endpoints]
+        }
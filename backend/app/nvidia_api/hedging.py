@@ -0,0 +1,132 @@
+from typing import Dict, Any, Awaitable, Callable, Optional, TypeVar
+from collections import deque
+import asyncio
+
+T = TypeVar("T")
+
+
+class LatencyWindow:
+    """Rolling window of recent call latencies"""
+
+    def __init__(self, size: int):
+        self._samples: deque = deque(maxlen=size)
+
+    def record(self, latency: float):
+        self._samples.append(latency)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """
+        Get a latency percentile.
+
+        Args:
+            fraction: Percentile as a fraction (0.95 for p95)
+
+        Returns:
+            The percentile in seconds, or None while the window is empty
+        """
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(int(fraction * len(ordered)), len(ordered) - 1)
+        return ordered[index]
+
+
+class HedgeBudget:
+    """
+    Token bucket capping hedged calls to a fraction of primary calls.
+
+    Every primary call earns `ratio` tokens (up to `max_tokens`) and every hedge
+    spends one, so hedges never exceed about ratio * traffic even when the
+    upstream is slow across the board.
+    """
+
+    def __init__(self, ratio: float, max_tokens: float = 10.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = 0.0
+
+    def earn(self):
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+
+class Hedger:
+    """Issues a backup call when the primary has not answered within the rolling latency percentile"""
+
+    def __init__(self, percentile: float, min_samples: int, window_size: int, budget_ratio: float):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.window = LatencyWindow(window_size)
+        self.budget = HedgeBudget(budget_ratio)
+
+        self.hedges_started = 0
+        self.hedges_won = 0
+
+    def hedge_delay(self) -> Optional[float]:
+        """Delay before hedging, or None until enough latency samples exist"""
+        if len(self.window) < self.min_samples:
+            return None
+        return self.window.percentile(self.percentile)
+
+    async def run(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run fn, hedging with a second call if the first is slower than the percentile.
+
+        The first call to finish successfully wins and the other one is cancelled.
+
+        Args:
+            fn: Zero-argument coroutine function performing one call
+
+        Returns:
+            The result of the winning call
+        """
+        self.budget.earn()
+        delay = self.hedge_delay()
+
+        primary = asyncio.ensure_future(fn())
+        if delay is None:
+            return await primary
+
+        hedge: Optional[asyncio.Future] = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done or not self.budget.try_spend():
+                return await primary
+
+            self.hedges_started += 1
+            hedge = asyncio.ensure_future(fn())
+            pending = {primary, hedge}
+            first_error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedges_won += 1
+                        return task.result()
+                    if first_error is None or task is primary:
+                        first_error = task.exception()
+            raise first_error
+        finally:
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return hedge counters and the current hedge delay"""
+        delay = self.hedge_delay()
+        return {
+            "hedge_delay": round(delay, 3) if delay is not None else None,
+            "samples": len(self.window),
+            "hedges_started": self.hedges_started,
+            "hedges_won": self.hedges_won,
+            "budget_tokens": round(self.budget.tokens, 2)
+        }
@@ -1,14 +1,39 @@
 import aiohttp
 import json
-from typing import Dict, Any, List, AsyncGenerator
+from typing import Dict, Any, List, AsyncGenerator, Optional
 from config.settings import Settings
 from openai import OpenAI, AsyncOpenAI
 import asyncio
+import time
+import httpx
+from app.nvidia_api.response_cache import get_named_cache, make_cache_key
+from app.nvidia_api.singleflight import SingleFlight
+from app.nvidia_api.stream_hub import StreamHub
+from app.nvidia_api.concurrency_limiter import AdaptiveConcurrencyLimiter
+from app.nvidia_api.retry import retry_async, backoff_delay, is_retryable_error
+from app.nvidia_api.hedging import Hedger
+from app.nvidia_api.endpoint_pool import EndpointPool, LLMEndpoint
+
+class LLMAPIError(Exception):
+    """Error raised when the upstream LLM API call fails (after retries)"""
+    
+    def __init__(self, message: str, retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
 
 class LLMClient:
     """Client for LLM API endpoints (using OpenAI SDK)"""
     
-    def __init__(self, settings: Settings):
+    def __init__(self, settings: Settings, http_client: Optional[httpx.Client] = None,
+                 async_http_client: Optional[httpx.AsyncClient] = None):
+        """
+        Initialize the LLM client.
+        
+        Args:
+            settings: Application settings
+            http_client: Optional shared (pooled) HTTP client for the sync OpenAI client
+            async_http_client: Optional shared (pooled) HTTP client for the async OpenAI client
+        """
         self.settings = settings
         self.api_type = settings.LLM_API_TYPE
         
@@ -27,22 +52,85 @@ class LLMClient:
         if not api_key:
             print("WARNING: No API key provided for LLM client")
         
+        # When no shared HTTP clients are given, the SDK creates its own connection pools
         self.client = OpenAI(
             base_url=settings.LLM_API_BASE_URL,
-            api_key=api_key
-        )
-        self.async_client = AsyncOpenAI(
-            base_url=settings.LLM_API_BASE_URL,
-            api_key=api_key
+            api_key=api_key,
+            http_client=http_client
         )
         self.model_id = settings.LLM_MODEL_ID
+        self.endpoints = self._create_endpoint_pool(api_key, async_http_client)
+        # Cache keys are built from model_id, so it names every model a response may come from
+        if len(self.endpoints.model_ids) > 1:
+            print(f"WARNING: LLM endpoints serve different models {self.endpoints.model_ids}, "
+                  f"cached responses are shared between them")
+        self.model_id = "+".join(self.endpoints.model_ids)
+        # Primary endpoint client, kept for callers that use the SDK client directly
+        self.async_client = self.endpoints.endpoints[0].client
+        self.response_cache = get_named_cache("llm_responses", settings)
+        self.singleflight = SingleFlight()
+        self.stream_hub = StreamHub(settings.LLM_STREAM_HUB_MAX_BUFFER_CHARS)
+        self.concurrency_limiter = AdaptiveConcurrencyLimiter(
+            initial_limit=settings.LLM_CONCURRENCY_INITIAL_LIMIT,
+            min_limit=settings.LLM_CONCURRENCY_MIN_LIMIT,
+            max_limit=settings.LLM_CONCURRENCY_MAX_LIMIT,
+            max_wait=settings.LLM_CONCURRENCY_MAX_WAIT,
+            backoff_ratio=settings.LLM_CONCURRENCY_BACKOFF_RATIO
+        )
+        self.hedger = Hedger(
+            percentile=settings.LLM_HEDGE_PERCENTILE,
+            min_samples=settings.LLM_HEDGE_MIN_SAMPLES,
+            window_size=settings.LLM_HEDGE_WINDOW_SIZE,
+            budget_ratio=settings.LLM_HEDGE_BUDGET_RATIO
+        ) if settings.LLM_HEDGE_ENABLED else None
+        self.retries = 0
     
-    async def generate_text(self, prompt: str) -> str:
+    def _create_endpoint_pool(self, api_key: Optional[str], async_http_client: Optional[httpx.AsyncClient]) -> EndpointPool:
+        """
+        Build the load-balanced endpoint pool from LLM_ENDPOINTS.
+        
+        Without LLM_ENDPOINTS the pool holds a single endpoint for LLM_API_BASE_URL.
+        Endpoint entries may omit api_key and model_id to inherit the global values.
+        """
+        endpoint_configs = self.settings.LLM_ENDPOINTS or [{"base_url": self.settings.LLM_API_BASE_URL}]
+        
+        endpoints = []
+        for index, config in enumerate(endpoint_configs):
+            # Retries are handled by retry_async/the streaming loop, so the SDK's own retries are disabled
+            client = AsyncOpenAI(
+                base_url=config["base_url"],
+                api_key=config.get("api_key") or api_key,
+                http_client=async_http_client,
+                max_retries=0
+            )
+            endpoints.append(LLMEndpoint(
+                name=config.get("name") or f"endpoint-{index}",
+                base_url=config["base_url"],
+                model_id=config.get("model_id") or self.model_id,
+                client=client,
+                weight=float(config.get("weight", 1.0))
+            ))
+        
+        print(f"DEBUG LLM Client - Endpoints: {[endpoint.base_url for endpoint in endpoints]}")
+        
+        return EndpointPool(
+            endpoints,
+            strategy=self.settings.LLM_LOAD_BALANCING_STRATEGY,
+            failure_threshold=self.settings.LLM_ENDPOINT_FAILURE_THRESHOLD,
+            ejection_time=self.settings.LLM_ENDPOINT_EJECTION_TIME,
+            max_ejection_time=self.settings.LLM_ENDPOINT_MAX_EJECTION_TIME
+        )
+    
+    async def generate_text(self, prompt: str, use_cache: bool = True, max_tokens: Optional[int] = None,
+                            response_format: Optional[Dict[str, Any]] = None) -> str:
         """
         Generate text using LLM API.
         
         Args:
             prompt: Text prompt for the LLM
+            use_cache: Whether to serve and store the response in the TTL response cache
+            max_tokens: Optional completion budget overriding LLM_MAX_TOKENS
+            response_format: Optional OpenAI-compatible response_format (e.g. a JSON schema)
             
         Returns:
             Generated text response
@@ -51,39 +139,122 @@ class LLMClient:
         if self.settings.USE_MOCK_DATA:
             raise Exception("API should not be called in mock mode")
         
+        cache_key = self._cache_key(prompt, max_tokens, response_format)
+        if use_cache:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        # Concurrent identical prompts share one upstream call
+        return await self.singleflight.do(
+            cache_key, lambda: self._generate_and_cache(prompt, cache_key, max_tokens, response_format)
+        )
+    
+    async def _generate_and_cache(self, prompt: str, cache_key: str, max_tokens: Optional[int] = None,
+                                  response_format: Optional[Dict[str, Any]] = None) -> str:
+        """Call the upstream API and store the response, even if every waiter has gone away"""
         try:
-            return await self._generate_text_openai(prompt)
+            generated_text = await self._generate_text_openai(prompt, max_tokens, response_format)
         except Exception as e:
             print(f"Error generating text with OpenAI API: {str(e)}")
             raise
         
-    async def _generate_text_openai(self, prompt: str) -> str:
-        """Generate text using OpenAI API"""
+        if generated_text:
+            self.response_cache.set(cache_key, generated_text)
+        return generated_text
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Return runtime statistics for the client"""
+        return {
+            "model_id": self.model_id,
+            "singleflight": self.singleflight.get_stats(),
+            "stream_hub": self.stream_hub.get_stats(),
+            "concurrency": self.concurrency_limiter.get_stats(),
+            "retries": self.retries,
+            "hedging": self.hedger.get_stats() if self.hedger is not None else None,
+            "load_balancing": self.endpoints.get_stats()
+        }
+    
+    def _cache_key(self, prompt: str, max_tokens: Optional[int] = None,
+                   response_format: Optional[Dict[str, Any]] = None) -> str:
+        """Build the response cache key from the model, sampling parameters and messages"""
+        return make_cache_key(
+            self.model_id,
+            self.settings.LLM_TEMPERATURE,
+            self.settings.LLM_TOP_P,
+            max_tokens or self.settings.LLM_MAX_TOKENS,
+            self.settings.LLM_FREQUENCY_PENALTY,
+            self.settings.LLM_PRESENCE_PENALTY,
+            self.settings.LLM_SYSTEM_MESSAGE,
+            prompt,
+            response_format
+        )
+        
+    async def _generate_text_openai(self, prompt: str, max_tokens: Optional[int] = None,
+                                    response_format: Optional[Dict[str, Any]] = None) -> str:
+        """Generate text using OpenAI API, retrying retryable errors and optionally hedging slow calls"""
+        def on_retry(attempt: int, error: BaseException):
+            self.retries += 1
+            print(f"Retrying LLM call after error (attempt {attempt + 1}): {str(error)}")
+        
+        # Endpoints already used for this request; retries and hedges prefer a different one
+        tried: List[LLMEndpoint] = []
+        
+        async def attempt() -> str:
+            if self.hedger is not None:
+                return await self.hedger.run(lambda: self._complete_once(prompt, tried, max_tokens, response_format))
+            return await self._complete_once(prompt, tried, max_tokens, response_format)
+        
         try:
-            # Prepare messages
-            messages = [
-                {"role": "system", "content": self.settings.LLM_SYSTEM_MESSAGE},
-                {"role": "user", "content": prompt}
-            ]
-            
-            # Call OpenAI API
-            completion = await self.async_client.chat.completions.create(
-                model=self.model_id,
-                messages=messages,
-                temperature=self.settings.LLM_TEMPERATURE,
-                top_p=self.settings.LLM_TOP_P,
-                max_tokens=self.settings.LLM_MAX_TOKENS,
-                frequency_penalty=self.settings.LLM_FREQUENCY_PENALTY,
-                presence_penalty=self.settings.LLM_PRESENCE_PENALTY,
-                stream=False  # Set to False for regular responses
+            return await retry_async(
+                attempt,
+                max_retries=self.settings.LLM_MAX_RETRIES,
+                base_delay=self.settings.LLM_RETRY_BASE_DELAY,
+                max_delay=self.settings.LLM_RETRY_MAX_DELAY,
+                on_retry=on_retry
             )
-            
-            # Extract generated text
-            generated_text = completion.choices[0].message.content
-            return generated_text
-            
         except Exception as e:
-            raise Exception(f"OpenAI API error: {str(e)}")
+            raise LLMAPIError(f"OpenAI API error: {str(e)}", retryable=is_retryable_error(e)) from e
+    
+    async def _complete_once(self, prompt: str, tried: List[LLMEndpoint], max_tokens: Optional[int] = None,
+                             response_format: Optional[Dict[str, Any]] = None) -> str:
+        """Make a single chat completion call on the least loaded healthy endpoint"""
+        # Prepare messages
+        messages = [
+            {"role": "system", "content": self.settings.LLM_SYSTEM_MESSAGE},
+            {"role": "user", "content": prompt}
+        ]
+        
+        # Only sent when requested; servers without structured output support reject the parameter
+        extra_params = {"response_format": response_format} if response_format is not None else {}
+        
+        started_at = time.monotonic()
+        
+        # Call OpenAI API (bounded by the adaptive concurrency limiter)
+        async with self.concurrency_limiter.acquire(self.settings.LLM_CONCURRENCY_LATENCY_TARGET):
+            # Pick the endpoint only once a slot is granted, so the choice reflects current load
+            endpoint = self.endpoints.select(exclude=tried)
+            tried.append(endpoint)
+            async with self.endpoints.track(endpoint):
+                completion = await endpoint.client.chat.completions.create(
+                    model=endpoint.model_id,
+                    messages=messages,
+                    temperature=self.settings.LLM_TEMPERATURE,
+                    top_p=self.settings.LLM_TOP_P,
+                    max_tokens=max_tokens or self.settings.LLM_MAX_TOKENS,
+                    frequency_penalty=self.settings.LLM_FREQUENCY_PENALTY,
+                    presence_penalty=self.settings.LLM_PRESENCE_PENALTY,
+                    stream=False,  # Set to False for regular responses
+                    **extra_params
+                )
+        
+        # Only full-budget calls feed the hedge delay; short calls would drag the percentile down
+        if self.hedger is not None and max_tokens is None:
+            self.hedger.window.record(time.monotonic() - started_at)
+        
+        # Extract generated text
+        generated_text = completion.choices[0].message.content
+        return generated_text
     
     async def generate_text_stream(self, prompt: str) -> AsyncGenerator[str, None]:
         """
@@ -99,29 +270,60 @@ class LLMClient:
         if self.settings.USE_MOCK_DATA:
             raise Exception("API should not be called in mock mode")
         
+        if not self.settings.LLM_STREAM_FANOUT_ENABLED:
+            async for chunk in self._generate_text_stream_openai(prompt):
+                yield chunk
+            return
+        
+        # Identical concurrent streams share one upstream stream; late joiners replay what was already produced
+        subscription = self.stream_hub.subscribe(self._cache_key(prompt), lambda: self._generate_text_stream_openai(prompt))
+        try:
+            async for chunk in subscription:
+                yield chunk
+        finally:
+            await subscription.aclose()
+    
+    async def _generate_text_stream_openai(self, prompt: str) -> AsyncGenerator[str, None]:
+        """Generate text using OpenAI API with streaming, retrying until the first chunk arrives"""
         # Prepare messages
         messages = [
             {"role": "system", "content": self.settings.LLM_SYSTEM_MESSAGE},
             {"role": "user", "content": prompt}
         ]
         
-        try:
-            # Call OpenAI API with streaming
-            stream = await self.async_client.chat.completions.create(
-                model=self.model_id,
-                messages=messages,
-                temperature=self.settings.LLM_TEMPERATURE,
-                top_p=self.settings.LLM_TOP_P,
-                max_tokens=self.settings.LLM_MAX_TOKENS,
-                frequency_penalty=self.settings.LLM_FREQUENCY_PENALTY,
-                presence_penalty=self.settings.LLM_PRESENCE_PENALTY,
-                stream=True
-            )
-            
-            # Yield chunks of text as they arrive
-            async for chunk in stream:
-                if chunk.choices[0].delta.content is not None:
-                    yield chunk.choices[0].delta.content
+        tried: List[LLMEndpoint] = []
+        attempt = 0
+        while True:
+            started = False
+            try:
+                # The slot is held for the whole stream; time-to-first-chunk is the latency signal
+                async with self.concurrency_limiter.acquire(self.settings.LLM_CONCURRENCY_TTFT_TARGET) as permit, \
+                        self.endpoints.track(self.endpoints.select(exclude=tried)) as endpoint:
+                    tried.append(endpoint)
+                    # Call OpenAI API with streaming
+                    stream = await endpoint.client.chat.completions.create(
+                        model=endpoint.model_id,
+                        messages=messages,
+                        temperature=self.settings.LLM_TEMPERATURE,
+                        top_p=self.settings.LLM_TOP_P,
+                        max_tokens=self.settings.LLM_MAX_TOKENS,
+                        frequency_penalty=self.settings.LLM_FREQUENCY_PENALTY,
+                        presence_penalty=self.settings.LLM_PRESENCE_PENALTY,
+                        stream=True
+                    )
                     
-        except Exception as e:
-            raise Exception(f"OpenAI API streaming error: {str(e)}")
+                    # Yield chunks of text as they arrive
+                    async for chunk in stream:
+                        permit.mark_first_response()
+                        if chunk.choices[0].delta.content is not None:
+                            started = True
+                            yield chunk.choices[0].delta.content
+                return
+            except Exception as e:
+                # Once text has been sent to the caller the stream cannot be replayed transparently
+                if started or attempt >= self.settings.LLM_MAX_RETRIES or not is_retryable_error(e):
+                    raise LLMAPIError(f"OpenAI API streaming error: {str(e)}", retryable=is_retryable_error(e)) from e
+                self.retries += 1
+                print(f"Retrying LLM stream after error (attempt {attempt + 1}): {str(e)}")
+                await asyncio.sleep(backoff_delay(attempt, self.settings.LLM_RETRY_BASE_DELAY, self.settings.LLM_RETRY_MAX_DELAY))
+                attempt += 1
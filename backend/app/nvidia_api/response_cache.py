@@ -0,0 +1,140 @@
+from config.settings import Settings
+from typing import Dict, Any, Optional, Tuple
+from collections import OrderedDict
+import hashlib
+import json
+import time
+
+
+class TTLCache:
+    """In-memory, size-bounded LRU cache with per-entry TTL expiry"""
+
+    def __init__(self, max_entries: int, ttl: float):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of entries before least recently used ones are evicted
+            ttl: Default time-to-live in seconds (0 disables caching)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, key: str, allow_stale: bool = False) -> Optional[Any]:
+        """
+        Look up a cached value.
+
+        Args:
+            key: Cache key
+            allow_stale: Return an expired entry instead of dropping it (used for degraded responses)
+
+        Returns:
+            The cached value, or None on a miss
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic() and not allow_stale:
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """
+        Store a value.
+
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl: Optional TTL override in seconds
+        """
+        if not self.enabled:
+            return
+
+        self._entries[key] = (time.monotonic() + (ttl if ttl is not None else self.ttl), value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str):
+        """Remove a single entry if present"""
+        self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove all entries"""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and occupancy"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+
+def make_cache_key(*parts: Any) -> str:
+    """
+    Build a stable cache key from JSON-serializable parts.
+
+    Args:
+        parts: Values that identify the cached item (model id, parameters, prompt, ...)
+
+    Returns:
+        Hex digest usable as a cache key
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+_caches: Dict[str, TTLCache] = {}
+
+
+def get_named_cache(name: str, settings: Settings) -> TTLCache:
+    """
+    Get a process-wide cache by name, creating it on first use.
+
+    Args:
+        name: Cache name (e.g. "llm_responses", "lessons")
+        settings: Application settings providing size and TTL
+
+    Returns:
+        The shared TTLCache
+    """
+    if name not in _caches:
+        _caches[name] = TTLCache(settings.CONTENT_CACHE_MAX_ENTRIES, settings.CONTENT_CACHE_TTL)
+    return _caches[name]
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Return statistics for every named cache"""
+    return {name: cache.get_stats() for name, cache in _caches.items()}
@@ -0,0 +1,72 @@
+from typing import Awaitable, Callable, Optional, TypeVar
+import asyncio
+import random
+import httpx
+import openai
+from app.nvidia_api.concurrency_limiter import is_overload_error
+
+T = TypeVar("T")
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """
+    Check whether an upstream error is worth retrying.
+
+    Rate limits, timeouts, connection failures and 5xx responses are retryable;
+    other client errors (bad request, auth, not found) are not.
+
+    Args:
+        error: Exception raised by the upstream call
+
+    Returns:
+        True if the call may succeed when repeated
+    """
+    if is_overload_error(error):
+        return True
+    if isinstance(error, (openai.APIConnectionError, httpx.TransportError)):
+        return True
+    status_code = getattr(error, "status_code", None)
+    return status_code is not None and (status_code >= 500 or status_code in (408, 409))
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """
+    Exponential backoff with full jitter.
+
+    Args:
+        attempt: Zero-based retry attempt
+        base_delay: Delay for the first retry in seconds
+        max_delay: Upper bound for the delay in seconds
+
+    Returns:
+        Seconds to sleep before the next attempt
+    """
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+async def retry_async(fn: Callable[[], Awaitable[T]], max_retries: int, base_delay: float, max_delay: float,
+                      on_retry: Optional[Callable[[int, BaseException], None]] = None) -> T:
+    """
+    Call fn, retrying retryable errors with jittered exponential backoff.
+
+    Args:
+        fn: Zero-argument coroutine function performing one attempt
+        max_retries: Number of retries after the first attempt
+        base_delay: Delay for the first retry in seconds
+        max_delay: Upper bound for a single delay in seconds
+        on_retry: Optional callback invoked with (attempt, error) before each retry
+
+    Returns:
+        The result of the first successful attempt
+    """
+    attempt = 0
+    while True:
+        try:
+            return await fn()
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable_error(e):
+                raise
+            if on_retry is not None:
+                on_retry(attempt, e)
+            await asyncio.sleep(backoff_delay(attempt, base_delay, max_delay))
+            attempt += 1
@@ -0,0 +1,189 @@
+from typing import Dict, Any, AsyncGenerator, AsyncIterator, Callable, Optional
+from collections import deque
+import asyncio
+
+
+class StreamBroadcast:
+    """
+    One upstream text stream fanned out to any number of subscribers.
+
+    Chunks are kept in a replay buffer so that late subscribers first receive
+    everything produced so far and then follow the live stream. Once the buffer
+    grows past max_buffer_chars the broadcast stops accepting new subscribers
+    and only keeps the chunks that existing subscribers have not read yet.
+
+    A subscriber is registered when its subscription is first iterated, and the
+    upstream stream only starts with the first registered subscriber, so a
+    subscription that is never iterated holds nothing. The broadcast closes
+    itself when its last subscriber leaves or when the upstream stream ends
+    with nobody subscribed.
+    """
+
+    def __init__(self, source_factory: Callable[[], AsyncIterator[str]], max_buffer_chars: int,
+                 on_close: Callable[["StreamBroadcast"], None]):
+        self._source_factory = source_factory
+        self._max_buffer_chars = max_buffer_chars
+        self._on_close = on_close
+
+        self._chunks: deque = deque()
+        self._base = 0  # Absolute index of the first buffered chunk
+        self._buffered_chars = 0
+        self._cursors: Dict[int, int] = {}  # Subscriber id -> absolute index of its next chunk
+        self._next_subscriber_id = 0
+        self._updated = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        self.joinable = True
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.closed = False
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._cursors)
+
+    def start(self):
+        """Start consuming the upstream stream (done by the first subscriber)"""
+        if self._task is None and not self.closed:
+            self._task = asyncio.ensure_future(self._pump())
+
+    async def _pump(self):
+        try:
+            async for chunk in self._source_factory():
+                self._chunks.append(chunk)
+                self._buffered_chars += len(chunk)
+                if self.joinable and self._buffered_chars > self._max_buffer_chars:
+                    # Too large to replay: keep streaming to current subscribers only
+                    self.joinable = False
+                self._trim()
+                self._notify()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._notify()
+            if not self._cursors:
+                # Nobody is left to read the buffer
+                self._release()
+
+    def _notify(self):
+        self._updated.set()
+        self._updated = asyncio.Event()
+
+    def _trim(self):
+        """Drop chunks every subscriber has read (only once replay is no longer possible)"""
+        if self.joinable or not self._cursors:
+            return
+        lowest = min(self._cursors.values())
+        while self._base < lowest and self._chunks:
+            self._buffered_chars -= len(self._chunks.popleft())
+            self._base += 1
+
+    async def subscribe(self) -> AsyncGenerator[str, None]:
+        """
+        Receive the stream from its first chunk.
+
+        Yields:
+            Chunks of generated text, replayed first and then live
+
+        Raises:
+            RuntimeError: If the broadcast is already closed
+        """
+        if self.closed:
+            raise RuntimeError("Cannot subscribe to a closed broadcast")
+        subscriber_id = self._next_subscriber_id
+        self._next_subscriber_id += 1
+        self._cursors[subscriber_id] = self._base
+        self.start()
+
+        try:
+            while True:
+                cursor = self._cursors[subscriber_id]
+                if cursor < self._base + len(self._chunks):
+                    chunk = self._chunks[cursor - self._base]
+                    self._cursors[subscriber_id] = cursor + 1
+                    self._trim()
+                    yield chunk
+                    continue
+
+                if self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+
+                await self._updated.wait()
+        finally:
+            del self._cursors[subscriber_id]
+            if not self._cursors:
+                self.close()
+
+    def close(self):
+        """Tear down the broadcast and cancel the upstream stream if it is still running"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._release()
+
+    def _release(self):
+        if self.closed:
+            return
+        self.closed = True
+        self._chunks.clear()
+        self._on_close(self)
+
+
+class StreamHub:
+    """Shares identical concurrent text streams through StreamBroadcasts keyed by request identity"""
+
+    def __init__(self, max_buffer_chars: int):
+        self.max_buffer_chars = max_buffer_chars
+        self._broadcasts: Dict[str, StreamBroadcast] = {}
+
+        self.upstream_streams = 0
+        self.shared_subscriptions = 0
+
+    async def subscribe(self, key: str, source_factory: Callable[[], AsyncIterator[str]]) -> AsyncGenerator[str, None]:
+        """
+        Subscribe to the stream for key, starting the upstream stream if none is joinable.
+
+        Args:
+            key: Identity of the stream (e.g. the response cache key)
+            source_factory: Zero-argument callable returning the upstream async iterator
+
+        Yields:
+            Chunks of generated text
+        """
+        broadcast = self._broadcasts.get(key)
+        if broadcast is None or not broadcast.joinable or broadcast.closed:
+            broadcast = StreamBroadcast(
+                source_factory,
+                self.max_buffer_chars,
+                on_close=lambda closed: self._remove(key, closed)
+            )
+            # Started by its first subscriber below
+            self._broadcasts[key] = broadcast
+            self.upstream_streams += 1
+        else:
+            self.shared_subscriptions += 1
+
+        subscription = broadcast.subscribe()
+        try:
+            async for chunk in subscription:
+                yield chunk
+        finally:
+            # Close explicitly so the subscriber is released as soon as the caller goes away
+            await subscription.aclose()
+
+    def _remove(self, key: str, broadcast: StreamBroadcast):
+        if self._broadcasts.get(key) is broadcast:
+            del self._broadcasts[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return fan-out counters"""
+        return {
+            "active_streams": len(self._broadcasts),
+            "subscribers": sum(b.subscriber_count for b in self._broadcasts.values()),
+            "upstream_streams": self.upstream_streams,
+            "shared_subscriptions": self.shared_subscriptions
+        }
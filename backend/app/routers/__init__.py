@@ -2,3 +2,6 @@
 from . import content
 from . import images
 from . import deep_research
+from . import metrics
+from . import dependencies
+from . import sse
@@ -1,22 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
 from fastapi.responses import StreamingResponse
-from app.models.schemas import ContentRequest, ContentResponse, ErrorResponse
+from app.models.schemas import ContentRequest, ContentResponse, LessonBundleResponse, BatchContentRequest, ErrorResponse
 from app.services.content_service import ContentService
+from app.services.image_service import ImageService
+from app.services.bundle_service import BundleService
+from app.services.stream_images import StreamImageGenerator
+from app.services.stream_sessions import get_stream_session_registry, StreamMismatchError
+from app.services.topic_index import normalize_topic, normalize_audience
+from app.services.circuit_breaker import CircuitOpenError
+from app.routers.dependencies import use_cache
+from app.routers.sse import coalesce_chunks, format_sse, SSE_HEADERS
 from config.settings import get_settings
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import json
-import asyncio
+import time
 
 router = APIRouter()
 
 @router.post("/generate", response_model=ContentResponse, responses={400: {"model": ErrorResponse}, 500: {"model": ErrorResponse}})
-async def generate_content(request: ContentRequest, settings=Depends(get_settings)):
+async def generate_content(request: ContentRequest, settings=Depends(get_settings), cache_enabled: bool = Depends(use_cache)):
     """
     Generate educational content based on a topic and audience level.
     
     - **topic**: Educational topic to generate content for (e.g., "photosynthesis")
     - **audience**: Target audience level (elementary, middle school, high school, college, graduate)
     
+    Send `X-Cache-Bypass: 1` to skip the lesson cache.
+    
     Returns:
     - **explanation**: Educational text explanation in markdown format
     - **image_prompts**: List of image prompts for visual representations
@@ -28,10 +38,18 @@ async def generate_content(request: ContentRequest, settings=Depends(get_setting
         # Generate content
         result = await content_service.generate_educational_content(
             topic=request.topic,
-            audience=request.audience
+            audience=request.audience,
+            use_cache=cache_enabled
         )
         
         return result
+    except CircuitOpenError as e:
+        # Only reached when CIRCUIT_BREAKER_FALLBACK is "error"
+        print(f"Content generation rejected: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail="Content generation is temporarily unavailable. Please try again shortly."
+        )
     except Exception as e:
         # Log the error (in a real app, you'd use proper logging)
         print(f"Error generating content: {str(e)}")
@@ -42,51 +60,172 @@ async def generate_content(request: ContentRequest, settings=Depends(get_setting
             detail=f"Failed to generate educational content. Please try again."
         )
 
-@router.post("/generate/stream")
-async def generate_content_stream(request: ContentRequest, settings=Depends(get_settings)):
+@router.post("/generate/batch", responses={400: {"model": ErrorResponse}})
+async def generate_content_batch(request: BatchContentRequest, settings=Depends(get_settings), cache_enabled: bool = Depends(use_cache)):
+    """
+    Generate many lessons in one request, streaming results as NDJSON.
+    
+    - **items**: List of `{topic, audience}` pairs
+    - **concurrency**: Lessons generated at the same time (capped by BATCH_MAX_CONCURRENCY)
+    
+    Each line is one item's result (see `BatchContentResult`), written as soon as it
+    completes, so lines arrive in completion order and carry the item's `index`.
+    Cached lessons are returned without an LLM call; failures are reported per item.
+    The last line is a summary: `{"done": true, "succeeded": n, "failed": m, "total_ms": t}`.
+    """
+    if len(request.items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch may contain at most {settings.BATCH_MAX_ITEMS} items."
+        )
+    
+    content_service = ContentService(settings)
+    concurrency = min(request.concurrency or settings.BATCH_MAX_CONCURRENCY, settings.BATCH_MAX_CONCURRENCY)
+    items = [{"topic": item.topic, "audience": item.audience} for item in request.items]
+    
+    async def line_generator():
+        started_at = time.perf_counter()
+        counts = {"ok": 0, "error": 0}
+        async for result in content_service.generate_educational_content_batch(items, concurrency, use_cache=cache_enabled):
+            counts[result["status"]] += 1
+            yield json.dumps(result) + "\n"
+        yield json.dumps({
+            "done": True,
+            "succeeded": counts["ok"],
+            "failed": counts["error"],
+            "total_ms": int((time.perf_counter() - started_at) * 1000)
+        }) + "\n"
+    
+    return StreamingResponse(line_generator(), media_type="application/x-ndjson")
+
+@router.post("/bundle", response_model=LessonBundleResponse, responses={500: {"model": ErrorResponse}, 503: {"model": ErrorResponse}})
+async def generate_lesson_bundle(request: ContentRequest, settings=Depends(get_settings), cache_enabled: bool = Depends(use_cache)):
+    """
+    Generate a lesson and all of its images in one call.
+    
+    - **topic**: Educational topic to generate content for (e.g., "photosynthesis")
+    - **audience**: Target audience level (elementary, middle school, high school, college, graduate)
+    
+    The explanation is generated first, then the images run concurrently. Failed
+    images are reported individually and mark the bundle as `partial`.
+    
+    Returns:
+    - **explanation**: Educational text explanation in markdown format
+    - **image_prompts**: List of image prompts
+    - **images**: Per-image URL or error with its duration
+    - **timings**: Explanation, image and total durations in milliseconds
+    """
+    try:
+        bundle_service = BundleService(settings)
+        return await bundle_service.generate_lesson_bundle(
+            topic=request.topic,
+            audience=request.audience,
+            use_cache=cache_enabled
+        )
+    except CircuitOpenError as e:
+        # Only reached when CIRCUIT_BREAKER_FALLBACK is "error"
+        print(f"Lesson bundle rejected: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail="Content generation is temporarily unavailable. Please try again shortly."
+        )
+    except Exception as e:
+        print(f"Error generating lesson bundle: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to generate the lesson bundle. Please try again."
+        )
+
+@router.post("/generate/stream", responses={400: {"model": ErrorResponse}, 409: {"model": ErrorResponse}})
+async def generate_content_stream(
+    request: ContentRequest,
+    settings=Depends(get_settings),
+    cache_enabled: bool = Depends(use_cache),
+    flush_ms: Optional[int] = Query(None, ge=0, description="Maximum milliseconds text is held back before it is sent"),
+    flush_bytes: Optional[int] = Query(None, ge=0, description="Pending text size in bytes that triggers a send"),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID")
+):
     """
     Stream educational content generation based on a topic and audience level.
     
     - **topic**: Educational topic to generate content for (e.g., "photosynthesis")
     - **audience**: Target audience level (elementary, middle school, high school, college, graduate)
+    - **include_images**: Start Gemini image generation as soon as each image prompt is streamed
+      and push the results as `image_ready` events before the final chunk
+    
+    Text is coalesced and sent every `flush_ms` milliseconds or `flush_bytes` bytes,
+    whichever comes first (defaults: SSE_FLUSH_MS / SSE_FLUSH_BYTES; 0 and 0 sends every chunk).
+    
+    Every event carries an id `<stream_id>:<seq>`. Repeating the request with that id in the
+    `Last-Event-ID` header resumes the stream after that event, without a new LLM call, for
+    STREAM_RESUME_TTL seconds after the stream finished. A malformed id is rejected with 400,
+    and an id of a stream started for another topic, audience or include_images with 409.
     
     Returns:
     - A streaming response with chunks of the generated content
     """
+    sessions = get_stream_session_registry(settings)
+    request_key = (normalize_topic(request.topic), normalize_audience(request.audience), request.include_images)
+    session, after_seq = None, 0
+    if sessions is not None and last_event_id:
+        try:
+            session, after_seq = sessions.resume(last_event_id, request_key)
+        except StreamMismatchError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if session is not None:
+            print(f"Resuming stream {session.stream_id} after event {after_seq}")
+    
     try:
         # Log the incoming request for debugging
         print(f"Received streaming request for topic: {request.topic}, audience: {request.audience}")
         
-        # Initialize content service
-        content_service = ContentService(settings)
+        if session is None:
+            # Initialize content service
+            content_service = ContentService(settings)
+            
+            events = content_service.generate_educational_content_stream(
+                topic=request.topic,
+                audience=request.audience,
+                use_cache=cache_enabled
+            )
+            if request.include_images:
+                image_generator = StreamImageGenerator(ImageService(settings), settings.STREAM_IMAGE_MAX_CONCURRENCY)
+                events = image_generator.stream(events)
+            
+            # Batch token-sized chunks into fewer, larger writes
+            events = coalesce_chunks(
+                events,
+                flush_ms=settings.SSE_FLUSH_MS if flush_ms is None else flush_ms,
+                flush_bytes=settings.SSE_FLUSH_BYTES if flush_bytes is None else flush_bytes
+            )
+            if sessions is not None:
+                # Generation runs independently of this connection so a reconnect can pick it up
+                session = sessions.create(events, request_key)
         
         async def event_generator():
             """Generate server-sent events"""
             try:
                 print("Starting content generation stream")
-                async for chunk in content_service.generate_educational_content_stream(
-                    topic=request.topic,
-                    audience=request.audience
-                ):
-                    # Format as server-sent event
-                    event_data = json.dumps(chunk)
-                    yield f"data: {event_data}\n\n"
-                    
-                    # Small delay to prevent flooding
-                    await asyncio.sleep(0.01)
+                if session is None:
+                    async for chunk in events:
+                        yield format_sse(chunk)
+                else:
+                    subscription = session.subscribe(after_seq)
+                    try:
+                        async for seq, chunk in subscription:
+                            yield format_sse(chunk, event_id=f"{session.stream_id}:{seq}")
+                    finally:
+                        await subscription.aclose()
                 print("Stream completed successfully")
             except Exception as e:
                 print(f"Streaming error: {str(e)}")
-                error_data = {"error": f"Streaming failed: {str(e)}"}
-                yield f"data: {json.dumps(error_data)}\n\n"
+                yield format_sse({"error": f"Streaming failed: {str(e)}"})
         
-        # Set headers required for SSE
-        headers = {
-            "Content-Type": "text/event-stream",
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no"  # Prevents proxy buffering for Nginx
-        }
+        headers = dict(SSE_HEADERS)
+        if session is not None:
+            headers["X-Stream-Id"] = session.stream_id
         
         return StreamingResponse(
             event_generator(),
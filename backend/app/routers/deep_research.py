@@ -1,14 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
-from app.models.deep_research_schemas import DeepResearchRequest, DeepResearchResponse
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from app.models.deep_research_schemas import DeepResearchRequest, DeepResearchResponse, ResearchJobStatus
 from app.models.schemas import ErrorResponse
 from app.services.deep_research_service import DeepResearchService
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.trending_cache import get_trending_topics_cache
+from app.services.research_jobs import get_research_job_manager, JobQueueFullError, ResearchJobManager
+from app.routers.dependencies import use_cache
+from app.routers.sse import format_sse, SSE_HEADERS
 from config.settings import get_settings
 from typing import Dict, Any
 
 router = APIRouter()
 
 @router.post("/research", response_model=DeepResearchResponse, responses={400: {"model": ErrorResponse}, 500: {"model": ErrorResponse}})
-async def deep_research(request: DeepResearchRequest, settings=Depends(get_settings)):
+async def deep_research(request: DeepResearchRequest, settings=Depends(get_settings), cache_enabled: bool = Depends(use_cache)):
     """
     Perform deep research on an educational topic.
     
@@ -16,6 +22,9 @@ async def deep_research(request: DeepResearchRequest, settings=Depends(get_setti
     - **subtopics**: Optional list of specific subtopics to focus on
     - **academic_level**: Academic level (e.g., high school, undergraduate, graduate)
     - **include_references**: Whether to include academic references
+    - **mode**: "single" (one completion) or "parallel" (outline plus concurrently generated sections);
+      requests with subtopics default to "parallel" so their sections are cached and reused
+    - **refresh_subtopics**: Subtopics to regenerate; in parallel mode every other section is reused from the section cache
     
     Returns a comprehensive research response including:
     - Introduction
@@ -34,10 +43,20 @@ async def deep_research(request: DeepResearchRequest, settings=Depends(get_setti
             topic=request.topic,
             subtopics=request.subtopics,
             academic_level=request.academic_level,
-            include_references=request.include_references
+            include_references=request.include_references,
+            use_cache=cache_enabled,
+            mode=request.mode,
+            refresh_subtopics=request.refresh_subtopics
         )
         
         return result
+    except CircuitOpenError as e:
+        # Only reached when CIRCUIT_BREAKER_FALLBACK is "error"
+        print(f"Deep research rejected: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail="Research generation is temporarily unavailable. Please try again shortly."
+        )
     except Exception as e:
         # Log the error (in a real app, you'd use proper logging)
         print(f"Error generating deep research: {str(e)}")
@@ -48,8 +67,59 @@ async def deep_research(request: DeepResearchRequest, settings=Depends(get_setti
             detail=f"Failed to generate research content. Please try again."
         )
 
+@router.post("/research/stream")
+async def deep_research_stream(request: DeepResearchRequest, settings=Depends(get_settings),
+                               cache_enabled: bool = Depends(use_cache)):
+    """
+    Stream deep research on an educational topic as server-sent events.
+    
+    Takes the same request as /research. Each part of the document is sent as soon
+    as it has been parsed from the LLM stream, with a `type` of `introduction`,
+    `section`, `key_concepts`, `visualization_prompts`, `related_topics` or
+    `reference`. The last event has type `complete`, `finished: true` and the whole
+    document under `research`, in the same shape as the /research response.
+    
+    The document is always generated in a single completion; `mode` is ignored.
+    """
+    try:
+        research_service = DeepResearchService(settings)
+        events = research_service.generate_research_stream(
+            topic=request.topic,
+            subtopics=request.subtopics,
+            academic_level=request.academic_level,
+            include_references=request.include_references,
+            use_cache=cache_enabled
+        )
+        
+        async def event_generator():
+            """Generate server-sent events"""
+            try:
+                async for event in events:
+                    if event["type"] == "complete":
+                        # Validate the assembled document against the /research response model
+                        event["research"] = DeepResearchResponse(**event["research"]).model_dump()
+                    yield format_sse(event)
+            except Exception as e:
+                print(f"Research streaming error: {str(e)}")
+                yield format_sse({"error": f"Streaming failed: {str(e)}"})
+            finally:
+                await events.aclose()
+        
+        return StreamingResponse(
+            event_generator(),
+            media_type="text/event-stream",
+            headers=SSE_HEADERS
+        )
+    except Exception as e:
+        print(f"Error setting up research stream: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to set up research stream. Please try again."
+        )
+
 @router.get("/trending-topics", responses={500: {"model": ErrorResponse}})
-async def get_trending_topics(academic_level: str = "college", limit: int = 10, settings=Depends(get_settings)):
+async def get_trending_topics(academic_level: str = "college", limit: int = 10, settings=Depends(get_settings),
+                              cache_enabled: bool = Depends(use_cache)):
     """
     Get trending educational topics for research.
     
@@ -59,13 +129,22 @@ async def get_trending_topics(academic_level: str = "college", limit: int = 10,
     Returns a list of trending educational topics suitable for deep research.
     """
     try:
+        # Served from memory; the background refresher keeps the topics current. A failed
+        # first fetch already returns fallback topics, so only uncached levels fall through
+        trending_cache = get_trending_topics_cache(settings)
+        if trending_cache is not None and cache_enabled:
+            topics = await trending_cache.get(academic_level, limit)
+            if topics is not None:
+                return {"topics": topics}
+        
         # Initialize research service
         research_service = DeepResearchService(settings)
         
         # Get trending topics
         topics = await research_service.get_trending_topics(
             academic_level=academic_level,
-            limit=limit
+            limit=limit,
+            use_cache=cache_enabled
         )
         
         return {"topics": topics}
@@ -78,3 +157,86 @@ async def get_trending_topics(academic_level: str = "college", limit: int = 10,
             status_code=500,
             detail=f"Failed to fetch trending topics. Please try again."
         )
+
+# Seconds between keep-alive comments on an idle job event stream, so proxies keep the connection open
+JOB_EVENTS_KEEPALIVE = 15.0
+
+def _job_manager(settings) -> ResearchJobManager:
+    manager = get_research_job_manager(settings)
+    if manager is None:
+        raise HTTPException(status_code=503, detail="Research jobs are disabled")
+    return manager
+
+@router.post("/jobs", status_code=202, response_model=ResearchJobStatus,
+             responses={429: {"model": ErrorResponse}, 503: {"model": ErrorResponse}})
+async def submit_research_job(request: DeepResearchRequest, settings=Depends(get_settings),
+                              cache_enabled: bool = Depends(use_cache)):
+    """
+    Submit deep research to run in the background.
+    
+    Takes the same request as /research and returns immediately with the job's
+    `job_id`. Poll `GET /jobs/{job_id}` or subscribe to `GET /jobs/{job_id}/events`
+    for its progress and result. Submitting a request identical to a queued,
+    running or recently finished job returns that job instead of starting another.
+    """
+    manager = _job_manager(settings)
+    try:
+        job, _ = manager.submit(
+            {
+                "topic": request.topic,
+                "subtopics": request.subtopics,
+                "academic_level": request.academic_level,
+                "include_references": request.include_references,
+                "mode": request.mode,
+                "refresh_subtopics": request.refresh_subtopics
+            },
+            use_cache=cache_enabled
+        )
+    except JobQueueFullError as e:
+        print(f"Rejecting research job: {str(e)}")
+        raise HTTPException(status_code=429, detail="Too many research jobs are waiting. Please try again later.")
+    return job.to_dict()
+
+@router.get("/jobs/{job_id}", response_model=ResearchJobStatus, responses={404: {"model": ErrorResponse}})
+async def get_research_job(job_id: str, wait: float = Query(0, ge=0, description="Seconds to wait for the job to finish"),
+                           settings=Depends(get_settings)):
+    """
+    Get the status, progress and (once succeeded) result of a research job.
+    
+    - **wait**: Long-poll for up to this many seconds (capped at RESEARCH_JOBS_MAX_WAIT);
+      the response is sent as soon as the job finishes
+    """
+    job = _job_manager(settings).get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Research job not found or expired")
+    
+    await job.wait_until_done(min(wait, settings.RESEARCH_JOBS_MAX_WAIT))
+    return job.to_dict()
+
+@router.get("/jobs/{job_id}/events", responses={404: {"model": ErrorResponse}})
+async def research_job_events(job_id: str, settings=Depends(get_settings)):
+    """
+    Stream the status of a research job as server-sent events.
+    
+    Sends the current status right away and again on every status or progress
+    change, with `type: job` and the job under `job` (as returned by
+    `GET /jobs/{job_id}`). The stream ends with the event that has `finished: true`,
+    which carries the result or error.
+    """
+    job = _job_manager(settings).get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Research job not found or expired")
+    
+    async def event_generator():
+        """Generate server-sent events"""
+        async for status in job.updates(JOB_EVENTS_KEEPALIVE):
+            if status is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield format_sse({"chunk": "", "finished": job.done, "type": "job", "job": status})
+    
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
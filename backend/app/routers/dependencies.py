@@ -0,0 +1,19 @@
+from fastapi import Depends, Request
+from config.settings import get_settings
+
+def use_cache(request: Request, settings=Depends(get_settings)) -> bool:
+    """
+    Decide whether a request may be served from cache.
+
+    Caching is skipped when the configured bypass header (X-Cache-Bypass by default)
+    is set to a truthy value or when Cache-Control asks for no-cache/no-store.
+    """
+    bypass = request.headers.get(settings.CACHE_BYPASS_HEADER, "").strip().lower()
+    if bypass in ("1", "true", "yes", "on"):
+        return False
+
+    cache_control = request.headers.get("Cache-Control", "").lower()
+    if "no-cache" in cache_control or "no-store" in cache_control:
+        return False
+
+    return True
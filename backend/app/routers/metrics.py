@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends
+from app.nvidia_api.client_registry import get_llm_client_registry
+from app.nvidia_api.response_cache import get_cache_stats
+from app.services.circuit_breaker import get_circuit_breaker_stats
+from app.services.lesson_store import get_lesson_store_stats
+from app.services.topic_index import get_topic_index_stats
+from app.services.stream_sessions import get_stream_session_stats
+from app.services.structured_output import get_structured_output_stats
+from app.services.trending_cache import get_trending_cache_stats
+from app.services.research_jobs import get_research_job_stats
+from config.settings import get_settings
+from typing import Dict, Any
+
+router = APIRouter()
+
+@router.get("")
+async def get_metrics(settings=Depends(get_settings)) -> Dict[str, Any]:
+    """
+    Get runtime performance metrics.
+
+    Returns:
+    - **llm_client**: Shared LLM connection pool configuration and connection reuse counters
+    - **caches**: Size, hit/miss and eviction counters for each response cache
+    - **circuit_breakers**: State and counters of the breaker for each upstream
+    - **lesson_store**: Precomputed lesson count and lookup counters (null when disabled)
+    - **topic_index**: Indexed topics with exact and near-duplicate lesson hits (null when disabled)
+    - **stream_sessions**: Resumable stream sessions and resume counters (null when disabled)
+    - **structured_output**: JSON parse outcomes (parsed, repaired, fallback), fallback rate and parse time per output kind
+    - **trending_cache**: Cached academic levels with their age in seconds, hit and refresh counters (null when disabled)
+    - **research_jobs**: Worker count, queue depth and job counters including de-duplicated submissions and jobs cancelled by a shutdown (null when disabled)
+    """
+    registry = get_llm_client_registry(settings)
+
+    return {
+        "llm_client": registry.get_stats(),
+        "caches": get_cache_stats(),
+        "circuit_breakers": get_circuit_breaker_stats(),
+        "lesson_store": get_lesson_store_stats(),
+        "topic_index": get_topic_index_stats(),
+        "stream_sessions": get_stream_session_stats(),
+        "structured_output": get_structured_output_stats(),
+        "trending_cache": get_trending_cache_stats(),
+        "research_jobs": get_research_job_stats()
+    }
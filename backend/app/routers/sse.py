@@ -0,0 +1,109 @@
+from typing import Dict, Any, AsyncGenerator, List, Optional
+import asyncio
+import json
+import time
+
+# Queue sentinel marking the end of the source stream
+_END = object()
+
+# Headers required for SSE
+SSE_HEADERS = {
+    "Content-Type": "text/event-stream",
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no"  # Prevents proxy buffering for Nginx
+}
+
+
+def format_sse(data: Dict[str, Any], event_id: Optional[str] = None) -> str:
+    """Serialize one server-sent event, with an id line when the stream is resumable"""
+    if event_id is not None:
+        return f"id: {event_id}\ndata: {json.dumps(data)}\n\n"
+    return f"data: {json.dumps(data)}\n\n"
+
+
+def _is_text_chunk(event: Dict[str, Any]) -> bool:
+    """Plain text chunks can be merged; anything carrying other fields is delivered as is"""
+    return not event.get("finished") and len(event) == 2 and "chunk" in event
+
+
+async def coalesce_chunks(events: AsyncGenerator[Dict[str, Any], None], flush_ms: int,
+                          flush_bytes: int) -> AsyncGenerator[Dict[str, Any], None]:
+    """
+    Merge consecutive text chunks so token-sized deltas are written in batches.
+
+    Pending text is flushed once it is flush_ms old or reaches flush_bytes
+    bytes, whichever comes first. Other events (image prompts, images, the
+    final chunk, ...) flush pending text and are passed through immediately,
+    so their order relative to the text is preserved.
+
+    Args:
+        events: Stream chunks from a service
+        flush_ms: Maximum time text is held back in milliseconds (0 disables the time limit)
+        flush_bytes: Maximum pending text in UTF-8 bytes (0 disables the size limit)
+
+    Yields:
+        The same events with adjacent text chunks merged
+    """
+    if flush_ms <= 0 and flush_bytes <= 0:
+        async for event in events:
+            yield event
+        return
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=256)
+
+    async def pump():
+        try:
+            async for event in events:
+                await queue.put(event)
+            await queue.put(_END)
+        except Exception as e:
+            await queue.put(e)
+        finally:
+            await events.aclose()
+
+    producer = asyncio.create_task(pump())
+    pending: List[str] = []
+    pending_bytes = 0
+    deadline: Optional[float] = None
+
+    def flush() -> Dict[str, Any]:
+        nonlocal pending, pending_bytes, deadline
+        event = {"chunk": "".join(pending), "finished": False}
+        pending, pending_bytes, deadline = [], 0, None
+        return event
+
+    try:
+        while True:
+            if deadline is None:
+                item = await queue.get()
+            else:
+                try:
+                    item = await asyncio.wait_for(queue.get(), max(deadline - time.monotonic(), 0))
+                except asyncio.TimeoutError:
+                    yield flush()
+                    continue
+
+            if item is _END or isinstance(item, BaseException):
+                if pending:
+                    yield flush()
+                if item is _END:
+                    return
+                raise item
+
+            if not _is_text_chunk(item):
+                if pending:
+                    yield flush()
+                yield item
+                continue
+
+            if not item["chunk"]:
+                continue
+            pending.append(item["chunk"])
+            pending_bytes += len(item["chunk"].encode("utf-8"))
+            if deadline is None and flush_ms > 0:
+                deadline = time.monotonic() + flush_ms / 1000
+            if flush_bytes > 0 and pending_bytes >= flush_bytes:
+                yield flush()
+    finally:
+        producer.cancel()
@@ -1,4 +1,15 @@
 # Import service modules
+from . import circuit_breaker
+from . import lesson_store
+from . import topic_index
 from . import content_service
 from . import image_service
+from . import stream_parser
+from . import research_stream_parser
+from . import structured_output
+from . import stream_images
+from . import stream_sessions
+from . import bundle_service
 from . import deep_research_service
+from . import trending_cache
+from . import research_jobs
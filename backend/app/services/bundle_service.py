@@ -0,0 +1,83 @@
+from config.settings import Settings
+from app.services.content_service import ContentService
+from app.services.image_service import ImageService
+from typing import Dict, Any, Optional
+import asyncio
+import time
+
+
+class BundleService:
+    """Service producing a complete lesson (text and images) in a single call"""
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.content_service = ContentService(settings)
+        self.image_service = ImageService(settings)
+
+    async def generate_lesson_bundle(self, topic: str, audience: str, use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Generate the lesson explanation, then all of its images concurrently.
+
+        Image failures do not fail the bundle: each image reports its own
+        success flag and error, and `partial` is set when any of them failed.
+
+        Args:
+            topic: Educational topic to generate content for
+            audience: Target audience level
+            use_cache: Whether to use the lesson cache
+
+        Returns:
+            Dictionary with the explanation, image prompts, per-image results and timings
+        """
+        started_at = time.perf_counter()
+        lesson = await self.content_service.generate_educational_content(topic, audience, use_cache=use_cache)
+        explanation_ms = self._elapsed_ms(started_at)
+
+        images_started_at = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.settings.BUNDLE_IMAGE_MAX_CONCURRENCY)
+        # Precomputed lessons may already carry their images
+        stored_images = {image["prompt"]: image for image in lesson.get("images", []) if image.get("success")}
+        images = await asyncio.gather(*[
+            self._generate_image(image_prompt, semaphore, stored_images.get(image_prompt))
+            for image_prompt in lesson["image_prompts"]
+        ])
+
+        return {
+            "explanation": lesson["explanation"],
+            "image_prompts": lesson["image_prompts"],
+            "images": images,
+            "partial": any(not image["success"] for image in images),
+            "timings": {
+                "explanation_ms": explanation_ms,
+                "images_ms": self._elapsed_ms(images_started_at),
+                "total_ms": self._elapsed_ms(started_at)
+            }
+        }
+
+    async def _generate_image(self, image_prompt: str, semaphore: asyncio.Semaphore,
+                              stored: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Generate one image, turning any failure into an unsuccessful result"""
+        if stored is not None:
+            return dict(stored, duration_ms=0)
+
+        async with semaphore:
+            started_at = time.perf_counter()
+            try:
+                result = await self.image_service.generate_gemini_image(
+                    image_prompt, ImageService.filename_prefix(image_prompt)
+                )
+            except Exception as e:
+                print(f"Bundle image generation failed: {str(e)}")
+                result = {"success": False, "image_url": None, "error": str(e)}
+
+        return {
+            "prompt": image_prompt,
+            "success": bool(result.get("success")),
+            "image_url": result.get("image_url"),
+            "error": result.get("error"),
+            "duration_ms": self._elapsed_ms(started_at)
+        }
+
+    @staticmethod
+    def _elapsed_ms(started_at: float) -> int:
+        return int((time.perf_counter() - started_at) * 1000)
@@ -0,0 +1,246 @@
+from config.settings import Settings
+from app.nvidia_api.retry import is_retryable_error
+from typing import Dict, Any, AsyncGenerator, AsyncIterator, Awaitable, Callable, Optional, TypeVar
+import asyncio
+import time
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the upstream's circuit is open"""
+    pass
+
+
+def is_upstream_failure(error: BaseException) -> bool:
+    """
+    Check whether an error says the upstream is unhealthy.
+
+    Errors that carry a retryable flag (LLMAPIError) or an HTTP status are
+    failures only when retrying could help: timeouts, connection errors, rate
+    limits and 5xx responses. A rejected request (bad request, auth, an
+    unsupported parameter) is the caller's problem and must not open the
+    circuit for everyone else. Errors without either, such as timeouts of the
+    breaker itself, count as failures.
+    """
+    retryable = getattr(error, "retryable", None)
+    if retryable is not None:
+        return bool(retryable)
+    if getattr(error, "status_code", None) is not None:
+        return is_retryable_error(error)
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        # google-genai's APIError carries the HTTP status as `code`
+        return code >= 500 or code in (408, 409, 429)
+    return True
+
+
+async def first_item_timeout(items: AsyncIterator[T], timeout: Optional[float]) -> AsyncGenerator[T, None]:
+    """
+    Pass a stream through, raising asyncio.TimeoutError if its first item takes longer than timeout.
+
+    Streams cannot go through CircuitBreaker.call, so this bounds the wait for
+    the first token instead: a stream that never starts (e.g. a hung half-open
+    probe) fails like a timed out call instead of holding its probe slot.
+
+    Args:
+        items: The stream
+        timeout: Seconds to wait for the first item (None waits indefinitely)
+
+    Yields:
+        The items of the stream
+    """
+    iterator = aiter(items)
+    try:
+        try:
+            async with asyncio.timeout(timeout):
+                first = await anext(iterator)
+        except StopAsyncIteration:
+            return
+        yield first
+        async for item in iterator:
+            yield item
+    finally:
+        if hasattr(iterator, "aclose"):
+            await iterator.aclose()
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one upstream dependency.
+
+    After failure_threshold consecutive failures the circuit opens and calls
+    fail immediately with CircuitOpenError. Once recovery_time has passed the
+    circuit goes half-open and lets a limited number of probe calls through: a
+    successful probe closes the circuit, a failed one opens it again. Only
+    probes decide a half-open circuit; calls admitted while it was still closed
+    are counted but cannot close it. Only upstream failures count (see
+    is_upstream_failure).
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, recovery_time: float, half_open_max_calls: int = 1):
+        """
+        Initialize the breaker.
+
+        Args:
+            name: Upstream name used in logs and metrics
+            failure_threshold: Consecutive failures that open the circuit
+            recovery_time: Seconds to stay open before probing
+            half_open_max_calls: Concurrent probe calls allowed while half-open
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.half_open_max_calls = half_open_max_calls
+
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probes_in_flight = 0
+
+        self.successes = 0
+        self.failures = 0
+        self.rejections = 0
+        self.times_opened = 0
+
+    def before_call(self) -> bool:
+        """
+        Admit or reject a call.
+
+        Returns:
+            True if the call was admitted as a half-open probe; pass it on to record_*
+
+        Raises:
+            CircuitOpenError: If the circuit is open or no probe slot is free
+        """
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.recovery_time:
+                self.rejections += 1
+                raise CircuitOpenError(f"Circuit for {self.name} is open")
+            self.state = self.HALF_OPEN
+            logger.info(f"Circuit for {self.name} is half-open, probing upstream")
+
+        if self.state == self.HALF_OPEN:
+            if self._probes_in_flight >= self.half_open_max_calls:
+                self.rejections += 1
+                raise CircuitOpenError(f"Circuit for {self.name} is half-open and already probing")
+            self._probes_in_flight += 1
+            return True
+        return False
+
+    def record_success(self, probe: bool = False):
+        """Record a successful call"""
+        self.successes += 1
+        self.consecutive_failures = 0
+        if probe:
+            self._probes_in_flight = max(self._probes_in_flight - 1, 0)
+            if self.state == self.HALF_OPEN:
+                self.state = self.CLOSED
+                logger.info(f"Circuit for {self.name} closed after a successful probe")
+
+    def record_failure(self, probe: bool = False):
+        """Record a failed call"""
+        self.failures += 1
+        self.consecutive_failures += 1
+        if probe:
+            self._probes_in_flight = max(self._probes_in_flight - 1, 0)
+            if self.state == self.HALF_OPEN:
+                self._open()
+        elif self.state == self.CLOSED and self.consecutive_failures >= self.failure_threshold:
+            self._open()
+
+    def record_error(self, error: BaseException, probe: bool = False):
+        """Record a call that raised: a failure if the error is an upstream failure, otherwise no verdict"""
+        if is_upstream_failure(error):
+            self.record_failure(probe)
+        else:
+            self.record_abandoned(probe)
+
+    def record_abandoned(self, probe: bool = False):
+        """Release the probe slot of a call that ended without a verdict on the upstream's health"""
+        if probe:
+            self._probes_in_flight = max(self._probes_in_flight - 1, 0)
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+        logger.warning(f"Circuit for {self.name} opened after {self.consecutive_failures} consecutive failures")
+
+    async def call(self, fn: Callable[[], Awaitable[T]], timeout: Optional[float] = None,
+                   is_failure: Optional[Callable[[T], bool]] = None) -> T:
+        """
+        Run fn through the breaker with an explicit timeout.
+
+        Args:
+            fn: Zero-argument coroutine function performing the upstream call
+            timeout: Seconds before the call is abandoned and counted as a failure
+            is_failure: Optional predicate marking a returned result as a failure
+
+        Returns:
+            The result of fn
+        """
+        probe = self.before_call()
+        try:
+            result = await asyncio.wait_for(fn(), timeout=timeout)
+        except asyncio.CancelledError:
+            self.record_abandoned(probe)
+            raise
+        except Exception as e:
+            self.record_error(e, probe)
+            raise
+
+        if is_failure is not None and is_failure(result):
+            self.record_failure(probe)
+        else:
+            self.record_success(probe)
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return the breaker state and counters"""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "successes": self.successes,
+            "failures": self.failures,
+            "rejections": self.rejections,
+            "times_opened": self.times_opened
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(name: str, settings: Settings) -> CircuitBreaker:
+    """
+    Get the process-wide circuit breaker for an upstream, creating it on first use.
+
+    Args:
+        name: Upstream name ("llm", "gemini", "nvidia_image")
+        settings: Application settings providing thresholds
+
+    Returns:
+        The shared CircuitBreaker
+    """
+    if name not in _breakers:
+        _breakers[name] = CircuitBreaker(
+            name,
+            failure_threshold=settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+            recovery_time=settings.CIRCUIT_BREAKER_RECOVERY_TIME,
+            half_open_max_calls=settings.CIRCUIT_BREAKER_HALF_OPEN_MAX_CALLS
+        )
+    return _breakers[name]
+
+
+def get_circuit_breaker_stats() -> Dict[str, Any]:
+    """Return statistics for every circuit breaker"""
+    return {name: breaker.get_stats() for name, breaker in _breakers.items()}
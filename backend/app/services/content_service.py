@@ -1,24 +1,49 @@
 from config.settings import Settings
-from app.nvidia_api.llm_client import LLMClient
-from typing import Dict, List, Any, AsyncGenerator
+from app.nvidia_api.client_registry import get_llm_client
+from app.nvidia_api.response_cache import get_named_cache, make_cache_key
+from app.services.circuit_breaker import get_circuit_breaker, first_item_timeout, CircuitOpenError
+from app.services.stream_parser import LessonStreamParser, parse_lesson
+from app.services.lesson_store import get_lesson_store
+from app.services.topic_index import get_topic_index, normalize_topic, normalize_audience
+from typing import Dict, List, Any, AsyncGenerator, Optional
 import json
 import re
 import asyncio
+import time
+
+# Audience levels the lesson prompt is tuned for, with the guidance given to the LLM
+AUDIENCE_LEVEL_DESCRIPTIONS = {
+    "elementary": "ages 6-10, simple language, concrete examples, engaging and fun content",
+    "middle-school": "ages 11-13, moderate complexity, mix of concrete and abstract concepts, engaging examples",
+    "high-school": "ages 14-18, higher complexity, abstract concepts, real-world applications, critical thinking",
+    "college": "undergraduate level, sophisticated concepts, theoretical and practical applications, critical analysis",
+    "graduate": "graduate level, advanced concepts, research focus, critical evaluation of competing theories"
+}
+
+AUDIENCE_LEVELS = list(AUDIENCE_LEVEL_DESCRIPTIONS)
+
 
 class ContentService:
     """Service for educational content generation"""
     
     def __init__(self, settings: Settings):
         self.settings = settings
-        self.llm_client = LLMClient(settings)
+        self.llm_client = get_llm_client(settings)
+        self.lesson_cache = get_named_cache("lessons", settings)
+        self.lesson_store = get_lesson_store(settings)
+        self.topic_index = get_topic_index(settings)
+        self.llm_breaker = get_circuit_breaker("llm", settings)
         
-    async def generate_educational_content(self, topic: str, audience: str) -> Dict[str, Any]:
+    async def generate_educational_content(self, topic: str, audience: str, use_cache: bool = True,
+                                           fallback_on_error: bool = True) -> Dict[str, Any]:
         """
         Generate educational content based on a topic and audience level.
         
         Args:
             topic: Educational topic to generate content for
             audience: Target audience level
+            use_cache: Whether to serve and store the lesson in the lesson cache
+            fallback_on_error: Serve degraded content on failure instead of raising the error
             
         Returns:
             Dictionary containing the explanation and image prompts
@@ -35,37 +60,157 @@ class ContentService:
             print("DEBUG: Using mock data")
             return self._generate_mock_content(topic, audience)
         
+        if use_cache:
+            cached = await self.get_cached_lesson(topic, audience)
+            if cached is not None:
+                print(f"DEBUG: Serving cached lesson for {topic}, {audience}")
+                return cached
+        
+        if use_cache and self.settings.LESSON_DERIVATION_ENABLED:
+            derived = await self._derive_from_other_level(topic, audience, use_cache)
+            if derived is not None:
+                return derived
+        
         try:
             # Construct prompt for the LLM
             prompt = self._create_content_prompt(topic, audience)
             print(f"DEBUG: Sending prompt to LLM: {prompt[:100]}...")
             
-            # Call the LLM API
+            # Call the LLM API (fails fast while the LLM circuit is open)
             print("DEBUG: Calling LLM API...")
-            response = await self.llm_client.generate_text(prompt)
+            response = await self.llm_breaker.call(
+                lambda: self.llm_client.generate_text(prompt, use_cache=use_cache),
+                timeout=self.settings.LLM_CALL_TIMEOUT
+            )
             print(f"DEBUG: Received response from LLM API: {response[:100]}...")
             
             # Parse the response to extract explanation and image prompts
             print("DEBUG: Parsing LLM response...")
             explanation, image_prompts = self._parse_llm_response(response, topic, audience)
             
-            return {
+            result = {
                 "explanation": explanation,
                 "image_prompts": image_prompts
             }
+            self.cache_lesson(topic, audience, result)
+            return result
         except Exception as e:
             print(f"ERROR in generate_educational_content: {str(e)}")
-            # For development/demo, return mock data as fallback
-            print("DEBUG: Falling back to mock data due to error")
-            return self._generate_mock_content(topic, audience)
+            if not fallback_on_error:
+                raise
+            print("DEBUG: Serving degraded content due to error")
+            return await self._degraded_content(topic, audience, e)
+    
+    async def _derive_from_other_level(self, topic: str, audience: str, use_cache: bool) -> Optional[Dict[str, Any]]:
+        """
+        Produce a lesson by rewriting the cached lesson of another audience level.
+        
+        Higher levels are preferred as the source (simplifying keeps more substance
+        than elaborating), nearest level first. The rewrite runs with the smaller
+        LESSON_DERIVATION_MAX_TOKENS budget.
+        
+        Returns:
+            The derived lesson, or None if no source exists or the rewrite failed
+        """
+        canonical, level = normalize_topic(topic), normalize_audience(audience)
+        if level not in AUDIENCE_LEVELS:
+            return None
+        
+        position = AUDIENCE_LEVELS.index(level)
+        candidates = AUDIENCE_LEVELS[position + 1:] + AUDIENCE_LEVELS[:position][::-1]
+        for source_level in candidates:
+            source = await self._lookup_lesson(self._canonical_lesson_key(canonical, source_level), allow_stale=False)
+            if source is not None:
+                break
+        else:
+            return None
+        
+        print(f"DEBUG: Deriving {level} lesson for {topic} from the cached {source_level} lesson")
+        prompt = self._create_derivation_prompt(topic, audience, source_level, source["explanation"])
+        try:
+            response = await self.llm_breaker.call(
+                lambda: self.llm_client.generate_text(
+                    prompt, use_cache=use_cache, max_tokens=self.settings.LESSON_DERIVATION_MAX_TOKENS
+                ),
+                timeout=self.settings.LLM_CALL_TIMEOUT
+            )
+        except Exception as e:
+            # Fall back to full generation
+            print(f"ERROR deriving lesson, generating from scratch: {str(e)}")
+            return None
+        
+        explanation, image_prompts = self._parse_llm_response(response, topic, audience)
+        result = {
+            "explanation": explanation,
+            "image_prompts": image_prompts
+        }
+        self.cache_lesson(topic, audience, result)
+        return result
     
-    async def generate_educational_content_stream(self, topic: str, audience: str) -> AsyncGenerator[Dict[str, Any], None]:
+    async def generate_educational_content_batch(self, items: List[Dict[str, str]], concurrency: int,
+                                                 use_cache: bool = True) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Generate lessons for many (topic, audience) items with bounded concurrency.
+        
+        Cached lessons are returned without an LLM call. Failures are reported
+        per item instead of being replaced by degraded content.
+        
+        Args:
+            items: Dictionaries with "topic" and "audience"
+            concurrency: Maximum number of lessons generated at the same time
+            use_cache: Whether to serve and store lessons in the lesson cache
+            
+        Yields:
+            One result per item in completion order, with its index, status, lesson or error and duration
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        for index, item in enumerate(items):
+            queue.put_nowait((index, item))
+        results: asyncio.Queue = asyncio.Queue()
+        
+        async def worker():
+            while not queue.empty():
+                index, item = queue.get_nowait()
+                results.put_nowait(await self._generate_batch_item(index, item, use_cache))
+        
+        workers = [asyncio.create_task(worker()) for _ in range(max(1, min(concurrency, len(items))))]
+        try:
+            for _ in range(len(items)):
+                yield await results.get()
+        finally:
+            # Stop outstanding work if the client goes away
+            for task in workers:
+                task.cancel()
+    
+    async def _generate_batch_item(self, index: int, item: Dict[str, str], use_cache: bool) -> Dict[str, Any]:
+        topic, audience = item["topic"], item["audience"]
+        started_at = time.perf_counter()
+        result = {"index": index, "topic": topic, "audience": audience}
+        try:
+            lesson = await self.get_cached_lesson(topic, audience) if use_cache else None
+            result["cached"] = lesson is not None
+            if lesson is None:
+                lesson = await self.generate_educational_content(
+                    topic, audience, use_cache=use_cache, fallback_on_error=False
+                )
+            result.update({
+                "status": "ok",
+                "explanation": lesson["explanation"],
+                "image_prompts": lesson["image_prompts"]
+            })
+        except Exception as e:
+            result.update({"status": "error", "error": str(e)})
+        result["duration_ms"] = int((time.perf_counter() - started_at) * 1000)
+        return result
+    
+    async def generate_educational_content_stream(self, topic: str, audience: str, use_cache: bool = True) -> AsyncGenerator[Dict[str, Any], None]:
         """
         Generate educational content with streaming responses.
         
         Args:
             topic: Educational topic to generate content for
             audience: Target audience level
+            use_cache: Whether to replay a cached lesson and store the finished one
             
         Yields:
             Dictionary containing chunks of the explanation
@@ -91,37 +236,191 @@ class ContentService:
             }
             return
         
+        cached = await self.get_cached_lesson(topic, audience) if use_cache else None
+        if cached is not None:
+            # Replay the cached lesson without calling the LLM
+            for event in self._replay_lesson(cached):
+                yield event
+            return
+        
+        try:
+            probe = self.llm_breaker.before_call()
+        except CircuitOpenError as e:
+            # Fail fast with the degraded lesson instead of waiting on an unhealthy upstream
+            for event in self._replay_lesson(await self._degraded_content(topic, audience, e)):
+                yield event
+            return
+        
         # Construct prompt for the LLM
         prompt = self._create_content_prompt(topic, audience)
         
-        # Call the LLM API with streaming
-        collected_text = ""
+        # Call the LLM API with streaming, splitting explanation text from image prompts as it arrives
+        parser = LessonStreamParser()
         
-        async for chunk in self.llm_client.generate_text_stream(prompt):
-            collected_text += chunk
-            yield {"chunk": chunk, "finished": False}
+        try:
+            async for chunk in first_item_timeout(self.llm_client.generate_text_stream(prompt),
+                                                  self.settings.LLM_FIRST_TOKEN_TIMEOUT):
+                for event in parser.feed(chunk):
+                    yield self._stream_event(event)
+            for event in parser.finish():
+                yield self._stream_event(event)
+        except Exception as e:
+            self.llm_breaker.record_error(e, probe)
+            raise
+        except BaseException:
+            # Client went away: no verdict on the upstream's health
+            self.llm_breaker.record_abandoned(probe)
+            raise
+        self.llm_breaker.record_success(probe)
         
-        # Parse the complete response to extract explanation and image prompts
-        explanation, image_prompts = self._parse_llm_response(collected_text, topic, audience)
+        explanation = parser.explanation
+        image_prompts = parser.image_prompts
+        if len(image_prompts) < 3:
+            # Pad rather than replace, the streamed prompts keep their image_prompt_index
+            image_prompts = image_prompts + self._default_image_prompts(topic, audience)[len(image_prompts):3]
+        self.cache_lesson(topic, audience, {"explanation": explanation, "image_prompts": image_prompts})
         
-        # Final yield with image prompts
+        # Final yield with the authoritative image prompts
         yield {
             "chunk": "",
             "finished": True,
             "image_prompts": image_prompts
         }
     
+    def _stream_event(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a LessonStreamParser event into a stream chunk"""
+        if event["type"] == "image_prompt":
+            return {
+                "chunk": "",
+                "finished": False,
+                "image_prompt": event["prompt"],
+                "image_prompt_index": event["index"]
+            }
+        return {"chunk": event["text"], "finished": False}
+    
+    def _replay_lesson(self, lesson: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Build the stream chunks for a lesson that is already complete"""
+        events = [{"chunk": lesson["explanation"], "finished": False}]
+        for index, image_prompt in enumerate(lesson["image_prompts"]):
+            events.append(self._stream_event({"type": "image_prompt", "prompt": image_prompt, "index": index}))
+        events.append({
+            "chunk": "",
+            "finished": True,
+            "image_prompts": lesson["image_prompts"]
+        })
+        return events
+    
+    async def _degraded_content(self, topic: str, audience: str, error: Exception) -> Dict[str, Any]:
+        """
+        Build the response served when the LLM call failed or its circuit is open.
+        
+        Depending on CIRCUIT_BREAKER_FALLBACK this is a cached lesson (even if
+        expired) with mock content as the last resort, mock content only, or the
+        original error re-raised.
+        """
+        mode = self.settings.CIRCUIT_BREAKER_FALLBACK
+        if mode == "error":
+            raise error
+        
+        if mode == "cache_or_mock":
+            cached = await self.get_cached_lesson(topic, audience, allow_stale=True)
+            if cached is not None:
+                return cached
+        
+        return self._generate_mock_content(topic, audience)
+    
+    async def get_cached_lesson(self, topic: str, audience: str, allow_stale: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Look up a previously generated lesson.
+        
+        The in-memory lesson cache is checked first, then the precomputed lesson
+        store; store hits are promoted into the memory cache.
+        
+        Args:
+            topic: Educational topic
+            audience: Target audience level
+            allow_stale: Also return expired entries that have not been evicted yet
+            
+        Returns:
+            A copy of the cached lesson (with "images" when they were precomputed), or None on a miss
+        """
+        canonical, level = normalize_topic(topic), normalize_audience(audience)
+        cached = await self._lookup_lesson(self._canonical_lesson_key(canonical, level), allow_stale)
+        exact = cached is not None
+        
+        if cached is None and self.topic_index is not None:
+            # Reuse the lesson of a near-identical topic, e.g. a typo ("photosynthesis and cellular respiraton"):
+            # LSH narrows the index to candidates, which must reach TOPIC_SIMILARITY_THRESHOLD trigram Jaccard
+            similar = self.topic_index.find(level, canonical)
+            if similar is not None and similar != canonical:
+                cached = await self._lookup_lesson(self._canonical_lesson_key(similar, level), allow_stale)
+                if cached is not None:
+                    print(f"DEBUG: Reusing lesson for '{similar}' for topic '{topic}'")
+        
+        if cached is None:
+            return None
+        if self.topic_index is not None:
+            self.topic_index.record_hit(exact)
+        return self._copy_lesson(cached)
+    
+    async def _lookup_lesson(self, key: str, allow_stale: bool) -> Optional[Dict[str, Any]]:
+        """Check the memory cache, then the lesson store (promoting store hits into memory)"""
+        cached = self.lesson_cache.get(key, allow_stale=allow_stale)
+        if cached is None and self.lesson_store is not None:
+            cached = await self.lesson_store.get(key)
+            if cached is not None:
+                self.lesson_cache.set(key, self._copy_lesson(cached))
+        return cached
+    
+    def cache_lesson(self, topic: str, audience: str, lesson: Dict[str, Any]):
+        """Store a generated lesson in the lesson cache and index its topic for near-duplicate reuse"""
+        canonical, level = normalize_topic(topic), normalize_audience(audience)
+        self.lesson_cache.set(self._canonical_lesson_key(canonical, level), self._copy_lesson(lesson))
+        if self.topic_index is not None:
+            self.topic_index.add(level, canonical)
+    
+    def store_lesson(self, topic: str, audience: str, lesson: Dict[str, Any]):
+        """
+        Persist a precomputed lesson in the lesson store and the lesson cache.
+        
+        Args:
+            topic: Educational topic
+            audience: Target audience level
+            lesson: Lesson with explanation, image_prompts and optional images
+        """
+        if self.lesson_store is None:
+            raise RuntimeError("LESSON_STORE_DIR is not configured")
+        record = self._copy_lesson(lesson)
+        record.update({"topic": topic, "audience": audience, "model_id": self.llm_client.model_id})
+        self.lesson_store.put(self._lesson_cache_key(topic, audience), record)
+        self.cache_lesson(topic, audience, record)
+    
+    async def get_stored_lesson(self, topic: str, audience: str) -> Optional[Dict[str, Any]]:
+        """Load a lesson from the lesson store only (no memory cache or near-duplicate lookup)"""
+        if self.lesson_store is None:
+            return None
+        return await self.lesson_store.get(self._lesson_cache_key(topic, audience))
+    
+    @staticmethod
+    def _copy_lesson(lesson: Dict[str, Any]) -> Dict[str, Any]:
+        copied = {
+            "explanation": lesson["explanation"],
+            "image_prompts": list(lesson["image_prompts"])
+        }
+        if lesson.get("images"):
+            copied["images"] = [dict(image) for image in lesson["images"]]
+        return copied
+    
+    def _lesson_cache_key(self, topic: str, audience: str) -> str:
+        """Build the lesson cache key from the model, canonical topic and audience"""
+        return self._canonical_lesson_key(normalize_topic(topic), normalize_audience(audience))
+    
+    def _canonical_lesson_key(self, canonical_topic: str, audience_level: str) -> str:
+        return make_cache_key("lesson", self.llm_client.model_id, canonical_topic, audience_level)
+    
     def _create_content_prompt(self, topic: str, audience: str) -> str:
         """Create a prompt for the LLM to generate educational content"""
-        audience_level_descriptions = {
-            "elementary": "ages 6-10, simple language, concrete examples, engaging and fun content",
-            "middle-school": "ages 11-13, moderate complexity, mix of concrete and abstract concepts, engaging examples",
-            "high-school": "ages 14-18, higher complexity, abstract concepts, real-world applications, critical thinking",
-            "college": "undergraduate level, sophisticated concepts, theoretical and practical applications, critical analysis",
-            "graduate": "graduate level, advanced concepts, research focus, critical evaluation of competing theories"
-        }
-        
-        audience_description = audience_level_descriptions.get(audience.lower(), f"{audience} level")
+        audience_description = AUDIENCE_LEVEL_DESCRIPTIONS.get(normalize_audience(audience), f"{audience} level")
         
         return f"""
         You are an expert educator specializing in creating high-quality, in-depth educational content for students. 
@@ -146,6 +445,25 @@ class ContentService:
         Ensure all content is accurate, thoughtful, and demonstrates sophisticated reasoning about the topic.
         """
     
+    def _create_derivation_prompt(self, topic: str, audience: str, source_level: str, source_explanation: str) -> str:
+        """Create a prompt that rewrites an existing lesson for a different audience level"""
+        audience_description = AUDIENCE_LEVEL_DESCRIPTIONS.get(normalize_audience(audience), f"{audience} level")
+        source_description = AUDIENCE_LEVEL_DESCRIPTIONS[source_level]
+        
+        return f"""
+        You are an expert educator. Below is a lesson on "{topic}" written for {source_description} students.
+        
+        Rewrite it for {audience_description} students. Adapt vocabulary, depth, examples and questions
+        to that level, keep the markdown structure (headings, lists) and keep every statement accurate.
+        Do not mention that the lesson was rewritten.
+        
+        After the lesson, include a section titled "IMAGE_PROMPTS" that provides 3 detailed image prompts,
+        each on a separate line starting with "- ", appropriate for {audience} students.
+        
+        LESSON:
+        {source_explanation}
+        """
+    
     def _parse_llm_response(self, response: str, topic: str, audience: str) -> tuple:
         """
         Parse the LLM response to extract explanation and image prompts.
@@ -159,26 +477,12 @@ class ContentService:
             Tuple of (explanation, image_prompts)
         """
         try:
-            # Split the response to extract explanation and image prompts
-            parts = response.split("IMAGE_PROMPTS")
-            
-            explanation = parts[0].strip()
-            
-            # Extract image prompts if available
-            image_prompts = []
-            if len(parts) > 1:
-                prompt_text = parts[1].strip()
-                # Extract bullet points
-                image_prompts = [line.strip()[2:].strip() for line in prompt_text.split('\n') 
-                                if line.strip().startswith('- ')]
-            
-            # If no image prompts were found, generate default ones
-            if not image_prompts or len(image_prompts) < 3:
-                image_prompts = [
-                    f"Educational diagram showing the process of {topic} for {audience} students",
-                    f"Visual representation of key concepts in {topic} appropriate for {audience} level",
-                    f"Illustrative example of {topic} in action for {audience} understanding"
-                ]
+            # Split the response into explanation and image prompts exactly as streamed lessons are
+            explanation, image_prompts = parse_lesson(response)
+            
+            # If fewer than three image prompts were found, fill up with default ones
+            if len(image_prompts) < 3:
+                image_prompts = image_prompts + self._default_image_prompts(topic, audience)[len(image_prompts):3]
             
             return explanation, image_prompts[:3]  # Limit to 3 prompts
             
@@ -206,6 +510,14 @@ class ContentService:
             
             return default_explanation, default_image_prompts
     
+    def _default_image_prompts(self, topic: str, audience: str) -> List[str]:
+        """Image prompts used when the LLM did not provide three of its own"""
+        return [
+            f"Educational diagram showing the process of {topic} for {audience} students",
+            f"Visual representation of key concepts in {topic} appropriate for {audience} level",
+            f"Illustrative example of {topic} in action for {audience} understanding"
+        ]
+    
     def _generate_mock_content(self, topic: str, audience: str) -> Dict[str, Any]:
         """Generate mock content for development and testing"""
         explanation = f"""
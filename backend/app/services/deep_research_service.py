@@ -1,20 +1,37 @@
 from config.settings import Settings
-from app.nvidia_api.llm_client import LLMClient
-from typing import Dict, List, Any, Optional
-import json
-import re
+from app.nvidia_api.client_registry import get_llm_client
+from app.nvidia_api.response_cache import get_named_cache, make_cache_key
+from app.services.circuit_breaker import get_circuit_breaker, first_item_timeout, CircuitOpenError
+from app.services.research_stream_parser import ResearchStreamParser, parse_research_document
+from app.services.structured_output import structured_response_format, parse_structured
+from app.models.deep_research_schemas import DeepResearchResponse, TrendingTopic, TrendingTopicList
+from pydantic import TypeAdapter
+from typing import Callable, Dict, List, Any, Optional, AsyncGenerator, Iterator, Set, Union
 import asyncio
 import random
+import copy
+
+_RESEARCH_ADAPTER = TypeAdapter(DeepResearchResponse)
+# Fields that may be lost when truncated structured research output is repaired
+_RESEARCH_DEFAULTS = {"references": None, "related_topics": [], "key_concepts": [], "visualization_prompts": []}
+# {"topics": [...]} with a JSON schema; plain JSON mode and free-form prompts usually return a bare array
+_TRENDING_ADAPTER = TypeAdapter(Union[TrendingTopicList, List[TrendingTopic]])
 
 class DeepResearchService:
     """Service for deep educational research"""
     
     def __init__(self, settings: Settings):
         self.settings = settings
-        self.llm_client = LLMClient(settings)
+        self.llm_client = get_llm_client(settings)
+        self.research_cache = get_named_cache("research", settings)
+        self.section_cache = get_named_cache("research_sections", settings)
+        self.llm_breaker = get_circuit_breaker("llm", settings)
     
     async def generate_research(self, topic: str, subtopics: Optional[List[str]] = None, 
-                               academic_level: str = "undergraduate", include_references: bool = True) -> Dict[str, Any]:
+                               academic_level: str = "undergraduate", include_references: bool = True,
+                               use_cache: bool = True, mode: Optional[str] = None,
+                               refresh_subtopics: Optional[List[str]] = None,
+                               progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
         """
         Generate comprehensive research on an educational topic.
         
@@ -23,6 +40,13 @@ class DeepResearchService:
             subtopics: Optional list of specific subtopics to focus on
             academic_level: Academic level (e.g., high school, undergraduate, graduate)
             include_references: Whether to include academic references
+            use_cache: Whether to serve and store the result in the research cache
+            mode: "single" or "parallel"; defaults to "parallel" for requests with subtopics
+                while the section cache is enabled, otherwise to RESEARCH_MODE
+            refresh_subtopics: Sections to regenerate instead of reusing cached ones (in
+                single mode the whole document is regenerated)
+            progress: Called with (completed, total) LLM calls as parallel-mode
+                sections finish
             
         Returns:
             Dictionary containing the research content
@@ -31,32 +55,217 @@ class DeepResearchService:
             # For development/demo, return mock data
             return self._generate_mock_research(topic, subtopics, academic_level, include_references)
         
+        mode = self.resolve_mode(mode, subtopics)
+        cache_key = self._research_cache_key(topic, subtopics, academic_level, include_references, mode)
+        if use_cache and not refresh_subtopics:
+            cached = self.research_cache.get(cache_key)
+            if cached is not None:
+                return copy.deepcopy(cached)
+        
+        if mode == "parallel":
+            return await self._generate_research_parallel(cache_key, topic, subtopics, academic_level,
+                                                          include_references, use_cache, refresh_subtopics, progress)
+        
         # Construct prompt for the LLM
-        prompt = self._create_research_prompt(topic, subtopics, academic_level, include_references)
+        structured = self.settings.LLM_STRUCTURED_OUTPUT
+        if structured:
+            prompt = self._create_structured_research_prompt(topic, subtopics, academic_level, include_references)
+            response_format = structured_response_format("deep_research", DeepResearchResponse,
+                                                         self.settings.LLM_STRUCTURED_OUTPUT_FORMAT)
+        else:
+            prompt = self._create_research_prompt(topic, subtopics, academic_level, include_references)
+            response_format = None
         
-        # Call NVIDIA's LLM API
-        response = await self.llm_client.generate_text(prompt)
+        # Call NVIDIA's LLM API (fails fast while the LLM circuit is open)
+        use_response_cache = use_cache and not refresh_subtopics
+        try:
+            response = await self.llm_breaker.call(
+                lambda: self.llm_client.generate_text(prompt, use_cache=use_response_cache, response_format=response_format),
+                timeout=self.settings.LLM_CALL_TIMEOUT
+            )
+        except Exception as e:
+            print(f"Error generating research, serving degraded response: {str(e)}")
+            return self._degraded_research(cache_key, topic, subtopics, academic_level, include_references, e)
         
         # Parse the response to extract research content
-        research_content = self._parse_research_response(response, topic, academic_level, include_references)
+        if structured:
+            research_content = self._parse_structured_research(response, topic, academic_level, include_references)
+        else:
+            research_content = self._parse_research_response(response, topic, academic_level, include_references)
         
+        self.research_cache.set(cache_key, copy.deepcopy(research_content))
         return research_content
     
-    async def get_trending_topics(self, academic_level: str = "undergraduate", limit: int = 10) -> List[Dict[str, str]]:
+    def resolve_mode(self, mode: Optional[str], subtopics: Optional[List[str]]) -> str:
+        """
+        Resolve the generation mode of a research request.
+        
+        Args:
+            mode: Requested mode ("single", "parallel" or None)
+            subtopics: Requested subtopics
+            
+        Returns:
+            The requested mode; without one, "parallel" for requests with subtopics while the
+            section cache is enabled, otherwise RESEARCH_MODE
+        """
+        if mode:
+            return mode
+        if subtopics and self.settings.RESEARCH_SECTION_CACHE_ENABLED:
+            # Section-wise, so editing the subtopics only generates the sections that changed. Sections
+            # are written without seeing each other, at the cost of one outline call per request
+            return "parallel"
+        return self.settings.RESEARCH_MODE
+    
+    async def generate_research_stream(self, topic: str, subtopics: Optional[List[str]] = None,
+                                       academic_level: str = "undergraduate", include_references: bool = True,
+                                       use_cache: bool = True) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Generate research with streaming, emitting each part as soon as it is parsed.
+        
+        Args:
+            topic: Main educational topic to research
+            subtopics: Optional list of specific subtopics to focus on
+            academic_level: Academic level (e.g., high school, undergraduate, graduate)
+            include_references: Whether to include academic references
+            use_cache: Whether to replay cached research and store the finished document
+            
+        Yields:
+            Typed events (introduction, section, key_concepts, visualization_prompts,
+            related_topics, reference) and finally a "complete" event carrying the
+            whole document in the DeepResearchResponse shape
+        """
+        if self.settings.USE_MOCK_DATA:
+            for event in self._replay_research(self._generate_mock_research(topic, subtopics, academic_level, include_references)):
+                yield event
+            return
+        
+        cache_key = self._research_cache_key(topic, subtopics, academic_level, include_references)
+        if use_cache:
+            cached = self.research_cache.get(cache_key)
+            if cached is not None:
+                for event in self._replay_research(copy.deepcopy(cached)):
+                    yield event
+                return
+        
+        try:
+            probe = self.llm_breaker.before_call()
+        except CircuitOpenError as e:
+            degraded = self._degraded_research(cache_key, topic, subtopics, academic_level, include_references, e)
+            for event in self._replay_research(degraded):
+                yield event
+            return
+        
+        prompt = self._create_research_prompt(topic, subtopics, academic_level, include_references)
+        parser = ResearchStreamParser(include_references)
+        
+        try:
+            async for chunk in first_item_timeout(self.llm_client.generate_text_stream(prompt),
+                                                  self.settings.LLM_FIRST_TOKEN_TIMEOUT):
+                for event in parser.feed(chunk):
+                    yield self._research_event(event)
+            for event in parser.finish():
+                yield self._research_event(event)
+        except Exception as e:
+            self.llm_breaker.record_error(e, probe)
+            raise
+        except BaseException:
+            # Client went away: no verdict on the upstream's health
+            self.llm_breaker.record_abandoned(probe)
+            raise
+        self.llm_breaker.record_success(probe)
+        
+        research_content = parser.research
+        self.research_cache.set(cache_key, copy.deepcopy(research_content))
+        yield {"type": "complete", "chunk": "", "finished": True, "research": research_content}
+    
+    def _research_event(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """Mark a parser event as an intermediate stream event"""
+        return dict(event, chunk="", finished=False)
+    
+    def _replay_research(self, research: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Emit the stream events of an already complete research document"""
+        if research["introduction"]:
+            yield self._research_event({"type": "introduction", "content": research["introduction"]})
+        for index, section in enumerate(research["sections"]):
+            yield self._research_event(dict(section, type="section", index=index))
+        for field in ("key_concepts", "visualization_prompts", "related_topics"):
+            if research[field]:
+                yield self._research_event({"type": field, "items": research[field]})
+        for index, reference in enumerate(research["references"] or []):
+            yield self._research_event({"type": "reference", "index": index, "reference": reference})
+        yield {"type": "complete", "chunk": "", "finished": True, "research": research}
+    
+    async def get_trending_topics(self, academic_level: str = "undergraduate", limit: int = 10,
+                                  use_cache: bool = True) -> List[Dict[str, str]]:
         """
         Get trending educational topics for research.
         
         Args:
             academic_level: Academic level filter
             limit: Maximum number of topics to return
+            use_cache: Whether to serve the LLM response from the response cache
             
         Returns:
             List of trending topics with descriptions
         """
+        try:
+            topics = await self.fetch_trending_topics(academic_level, limit, use_cache=use_cache)
+        except Exception as e:
+            return self.fallback_trending_topics(academic_level, limit, e)
+        
+        # Fallback if parsing fails or the list is empty
+        return topics or self._generate_mock_trending_topics(academic_level, limit)
+    
+    def fallback_trending_topics(self, academic_level: str, limit: int, error: Optional[Exception]) -> List[Dict[str, str]]:
+        """
+        Build the topics served when fetching them failed.
+        
+        Args:
+            academic_level: Academic level filter
+            limit: Maximum number of topics to return
+            error: The LLM error, or None if the response could not be parsed
+            
+        Returns:
+            Mock trending topics
+            
+        Raises:
+            Exception: The LLM error, when CIRCUIT_BREAKER_FALLBACK is "error"
+        """
+        if error is not None:
+            print(f"Error fetching trending topics, serving fallback topics: {str(error)}")
+            if self.settings.CIRCUIT_BREAKER_FALLBACK == "error":
+                raise error
+        return self._generate_mock_trending_topics(academic_level, limit)
+    
+    async def fetch_trending_topics(self, academic_level: str, limit: int,
+                                    use_cache: bool = True) -> Optional[List[Dict[str, str]]]:
+        """
+        Ask the LLM for trending topics, without falling back to mock topics.
+        
+        Args:
+            academic_level: Academic level filter
+            limit: Maximum number of topics to return
+            use_cache: Whether to serve the LLM response from the response cache
+            
+        Returns:
+            The topics, or None if the response could not be parsed
+            
+        Raises:
+            Exception: If the LLM call fails or its circuit is open
+        """
         if self.settings.USE_MOCK_DATA:
             # For development/demo, return mock trending topics
             return self._generate_mock_trending_topics(academic_level, limit)
         
+        structured = self.settings.LLM_STRUCTURED_OUTPUT
+        if structured:
+            response_format = structured_response_format("trending_topics", TrendingTopicList,
+                                                         self.settings.LLM_STRUCTURED_OUTPUT_FORMAT)
+            format_text = 'Format the response as a JSON object whose "topics" field is a list of objects containing "topic", "description", and "relevance" fields.'
+        else:
+            response_format = None
+            format_text = 'Format the response as a JSON array with objects containing "topic", "description", and "relevance" fields.'
+        
         # Construct prompt for the LLM
         prompt = f"""
         Generate a list of {limit} trending educational topics suitable for {academic_level} level research.
@@ -66,27 +275,221 @@ class DeepResearchService:
         2. A brief description (2-3 sentences)
         3. Why it's currently relevant or trending
         
-        Format the response as a JSON array with objects containing "topic", "description", and "relevance" fields.
+        {format_text}
         """
         
-        # Call NVIDIA's LLM API
-        response = await self.llm_client.generate_text(prompt)
+        # Call NVIDIA's LLM API (fails fast while the LLM circuit is open)
+        response = await self.llm_breaker.call(
+            lambda: self.llm_client.generate_text(prompt, use_cache=use_cache, response_format=response_format),
+            timeout=self.settings.LLM_CALL_TIMEOUT
+        )
+        
+        # Validate the JSON in one pass, repairing fenced or truncated output
+        topics = parse_structured(response, _TRENDING_ADAPTER, "trending_topics")
+        if isinstance(topics, TrendingTopicList):
+            topics = topics.topics
+        if not topics:
+            return None
+        
+        # Limit to requested number of topics
+        return [item.model_dump() for item in topics[:limit]]
+    
+    async def _generate_research_parallel(self, cache_key: str, topic: str, subtopics: Optional[List[str]],
+                                          academic_level: str, include_references: bool, use_cache: bool,
+                                          refresh_subtopics: Optional[List[str]] = None,
+                                          progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """
+        Generate research as an outline plus concurrently generated sections.
+        
+        The outline (introduction, key concepts, related topics, ...) is a short
+        completion. When subtopics are given they are the sections, so the outline
+        and all sections run at the same time; otherwise the section titles come
+        from the outline. Each section is its own call with its own token budget,
+        so the document is no longer limited by a single completion and the wall
+        clock time is close to that of the slowest call.
+        
+        Sections are also cached on their own, keyed by topic, title, academic
+        level and model, so a request that adds or removes a subtopic only
+        generates the sections that are not cached yet.
+        
+        Args:
+            cache_key: Research cache key of the request
+            topic: Main educational topic to research
+            subtopics: Optional list of subtopics, one section each
+            academic_level: Academic level
+            include_references: Whether to include academic references
+            use_cache: Whether to serve sections and LLM responses from the caches
+            refresh_subtopics: Section titles to regenerate even if they are cached
+            progress: Called with (completed, total) LLM calls, counting the outline and each section
+            
+        Returns:
+            Dictionary containing the research content
+        """
+        semaphore = asyncio.Semaphore(max(self.settings.RESEARCH_SECTION_MAX_CONCURRENCY, 1))
+        section_titles = [subtopic.strip() for subtopic in subtopics or [] if subtopic.strip()]
+        refresh = {subtopic.strip().lower() for subtopic in refresh_subtopics or []}
+        
+        outline_task = asyncio.ensure_future(
+            self._complete(self._create_outline_prompt(topic, section_titles, academic_level, include_references),
+                           use_cache, self.settings.RESEARCH_OUTLINE_MAX_TOKENS)
+        )
+        section_tasks = self._start_sections(semaphore, topic, section_titles, academic_level, use_cache, refresh)
+        
+        def report_progress(_=None):
+            # Cached sections count as completed
+            if progress is not None:
+                completed = [outline_task.done()] + [not isinstance(task, asyncio.Future) or task.done() for task in section_tasks]
+                progress(sum(completed), len(completed))
+        
+        if section_titles:
+            # Without subtopics the total is only known once the outline is parsed
+            outline_task.add_done_callback(report_progress)
+        for task in section_tasks:
+            if isinstance(task, asyncio.Future):
+                task.add_done_callback(report_progress)
+        report_progress()
         
-        # Parse the response to extract topics
         try:
-            # Try to parse as JSON
-            topics_data = json.loads(response)
+            try:
+                outline = await outline_task
+            except Exception as e:
+                print(f"Error generating research outline, serving degraded response: {str(e)}")
+                return self._degraded_research(cache_key, topic, subtopics, academic_level, include_references, e)
+            
+            research_content = self._parse_research_response(outline, topic, academic_level, include_references)
             
-            # Ensure we have the right structure
-            if isinstance(topics_data, list) and all("topic" in item for item in topics_data):
-                # Limit to requested number of topics
-                return topics_data[:limit]
+            if not section_titles:
+                # The outline lists the section titles as empty sections
+                section_titles = [section["title"] for section in research_content["sections"]][:self.settings.RESEARCH_MAX_SECTIONS]
+                section_tasks = self._start_sections(semaphore, topic, section_titles, academic_level, use_cache, refresh)
+                for task in section_tasks:
+                    if isinstance(task, asyncio.Future):
+                        task.add_done_callback(report_progress)
+                report_progress()
+            
+            # Cached sections are plain strings, only the missing ones are awaited
+            results = await asyncio.gather(*[task for task in section_tasks if isinstance(task, asyncio.Future)],
+                                           return_exceptions=True)
+        finally:
+            # A failed outline or a cancelled request must not leave section calls running
+            pending = [task for task in [outline_task, *section_tasks]
+                       if isinstance(task, asyncio.Future) and not task.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        
+        generated = iter(results)
+        sections = []
+        errors = []
+        for title, task in zip(section_titles, section_tasks):
+            result = next(generated) if isinstance(task, asyncio.Future) else task
+            # A section cancelled on its own is a failed section, not content
+            if isinstance(result, BaseException):
+                print(f"Error generating research section '{title}': {str(result)}")
+                errors.append(result)
             else:
-                # Fallback if structure is wrong
-                return self._generate_mock_trending_topics(academic_level, limit)
-        except:
-            # Fallback if parsing fails
-            return self._generate_mock_trending_topics(academic_level, limit)
+                sections.append({"title": title, "content": result})
+                if isinstance(task, asyncio.Future) and self.settings.RESEARCH_SECTION_CACHE_ENABLED:
+                    self.section_cache.set(self._section_cache_key(topic, title, academic_level), result)
+        
+        if errors and (not sections or self.settings.CIRCUIT_BREAKER_FALLBACK == "error"):
+            return self._degraded_research(cache_key, topic, subtopics, academic_level, include_references, errors[0])
+        
+        research_content["sections"] = sections
+        # A document with missing sections is served but not cached, so the next request retries them
+        if not errors:
+            self.research_cache.set(cache_key, copy.deepcopy(research_content))
+        return research_content
+    
+    def _start_sections(self, semaphore: asyncio.Semaphore, topic: str, titles: List[str], academic_level: str,
+                        use_cache: bool, refresh: Set[str]) -> List[Union[str, asyncio.Future]]:
+        """
+        Look up each section in the section cache and start generating the missing ones.
+        
+        Args:
+            semaphore: Limits the concurrent section calls
+            topic: Main educational topic
+            titles: Section titles in document order
+            academic_level: Academic level
+            use_cache: Whether cached sections and LLM responses may be served
+            refresh: Lower-cased titles to regenerate even if cached
+            
+        Returns:
+            Per title, the cached content or the task generating it
+        """
+        sections: List[Union[str, asyncio.Future]] = []
+        for title in titles:
+            regenerate = title.lower() in refresh
+            cached = None
+            if use_cache and not regenerate and self.settings.RESEARCH_SECTION_CACHE_ENABLED:
+                cached = self.section_cache.get(self._section_cache_key(topic, title, academic_level))
+            if cached is not None:
+                sections.append(cached)
+            else:
+                # A forced refresh must not be answered from the LLM response cache either
+                sections.append(asyncio.ensure_future(
+                    self._generate_section(semaphore, topic, title, academic_level, use_cache and not regenerate)
+                ))
+        return sections
+    
+    async def _generate_section(self, semaphore: asyncio.Semaphore, topic: str, title: str, academic_level: str,
+                                use_cache: bool) -> str:
+        """Generate the content of one research section"""
+        async with semaphore:
+            response = await self._complete(self._create_section_prompt(topic, title, academic_level),
+                                            use_cache, self.settings.RESEARCH_SECTION_MAX_TOKENS)
+        return self._strip_section_heading(response, title)
+    
+    async def _complete(self, prompt: str, use_cache: bool, max_tokens: int) -> str:
+        """Call the LLM through its circuit breaker with a completion budget"""
+        return await self.llm_breaker.call(
+            lambda: self.llm_client.generate_text(prompt, use_cache=use_cache, max_tokens=max_tokens),
+            timeout=self.settings.LLM_CALL_TIMEOUT
+        )
+    
+    def _degraded_research(self, cache_key: str, topic: str, subtopics: Optional[List[str]], academic_level: str,
+                           include_references: bool, error: Exception) -> Dict[str, Any]:
+        """
+        Build the response served when the LLM call failed or its circuit is open.
+        
+        Depending on CIRCUIT_BREAKER_FALLBACK this is cached research (even if
+        expired) with mock research as the last resort, mock research only, or
+        the original error re-raised.
+        """
+        mode = self.settings.CIRCUIT_BREAKER_FALLBACK
+        if mode == "error":
+            raise error
+        
+        if mode == "cache_or_mock":
+            cached = self.research_cache.get(cache_key, allow_stale=True)
+            if cached is not None:
+                return copy.deepcopy(cached)
+        
+        return self._generate_mock_research(topic, subtopics, academic_level, include_references)
+    
+    def _research_cache_key(self, topic: str, subtopics: Optional[List[str]], academic_level: str, include_references: bool,
+                            mode: str = "single") -> str:
+        """Build the research cache key from the model and request parameters"""
+        return make_cache_key(
+            "research",
+            self.llm_client.model_id,
+            topic.strip().lower(),
+            [subtopic.strip().lower() for subtopic in subtopics or []],
+            academic_level.strip().lower(),
+            include_references,
+            mode
+        )
+    
+    def _section_cache_key(self, topic: str, title: str, academic_level: str) -> str:
+        """Build the section cache key; section prompts do not depend on the other sections"""
+        return make_cache_key(
+            "research_section",
+            self.llm_client.model_id,
+            topic.strip().lower(),
+            title.strip().lower(),
+            academic_level.strip().lower()
+        )
     
     def _create_research_prompt(self, topic: str, subtopics: Optional[List[str]], academic_level: str, include_references: bool) -> str:
         """Create a prompt for the LLM to generate comprehensive research"""
@@ -120,10 +523,119 @@ class DeepResearchService:
         The content should be academically rigorous and appropriate for {academic_level} level.
         """
     
+    def _create_outline_prompt(self, topic: str, section_titles: List[str], academic_level: str, include_references: bool) -> str:
+        """Create a prompt for the research outline: everything but the section content"""
+        if section_titles:
+            sections_text = "The document's sections cover these subtopics (they are written separately, do not write them):\n" + \
+                "\n".join([f"- {title}" for title in section_titles])
+            sections_format = ""
+        else:
+            sections_text = ""
+            sections_format = f"""
+        SECTIONS: {self.settings.RESEARCH_MAX_SECTIONS} or fewer section titles covering key aspects of the topic, one per line as
+        SECTION 1: <title>
+        SECTION 2: <title>
+        (titles only, the section content is written separately)
+        """
+        
+        references_text = "REFERENCES: Academic references in Chicago style, one per line." if include_references else "Do not include references."
+        
+        return f"""
+        Generate the outline of a research document on "{topic}" suitable for {academic_level} level.
+        
+        {sections_text}
+        
+        The response should be structured as follows:
+        
+        INTRODUCTION: A detailed introduction to the topic
+        {sections_format}
+        KEY_CONCEPTS: A list of important concepts covered, one per line starting with "- "
+        
+        VISUALIZATION_PROMPTS: 3-5 detailed prompts for generating visualizations, one per line starting with "- "
+        
+        RELATED_TOPICS: 3-5 related topics, one per line as "- <topic>: <relevance to the main topic>"
+        
+        {references_text}
+        
+        The content should be academically rigorous and appropriate for {academic_level} level.
+        """
+    
+    def _create_section_prompt(self, topic: str, title: str, academic_level: str) -> str:
+        """Create a prompt for the content of a single research section"""
+        return f"""
+        Write the section "{title}" of a research document on "{topic}" suitable for {academic_level} level.
+        
+        Give comprehensive, academically rigorous content in markdown for this section only.
+        Do not repeat the section title and do not write an introduction or conclusion for the whole document.
+        """
+    
+    def _strip_section_heading(self, content: str, title: str) -> str:
+        """Drop a leading heading that repeats the section title"""
+        content = content.strip()
+        first_line, _, rest = content.partition("\n")
+        if first_line.strip("#*: ").lower() == title.lower():
+            return rest.strip()
+        return content
+    
+    def _create_structured_research_prompt(self, topic: str, subtopics: Optional[List[str]], academic_level: str,
+                                           include_references: bool) -> str:
+        """Create a prompt for research returned as a JSON object in the DeepResearchResponse shape"""
+        subtopics_text = ""
+        if subtopics and len(subtopics) > 0:
+            subtopics_text = "Focus on these specific subtopics:\n" + "\n".join([f"- {subtopic}" for subtopic in subtopics])
+        
+        references_text = (
+            '"references": academic references, each with "title", "authors" (list), "publication", "year", "doi" and "url"'
+            if include_references else '"references": null'
+        )
+        
+        return f"""
+        Generate a comprehensive research document on "{topic}" suitable for {academic_level} level.
+        
+        {subtopics_text}
+        
+        Respond with a single JSON object with these fields:
+        - "introduction": a detailed introduction to the topic in markdown
+        - "sections": multiple content sections covering key aspects of the topic, each with a "title" and comprehensive markdown "content"
+        - "key_concepts": a list of important concepts covered
+        - "visualization_prompts": 3-5 detailed prompts for generating visualizations that would enhance understanding
+        - "related_topics": 3-5 related topics, each with a "topic" and its "relevance" to the main topic
+        - {references_text}
+        
+        The content should be academically rigorous and appropriate for {academic_level} level.
+        """
+    
+    def _parse_structured_research(self, response: str, topic: str, academic_level: str, include_references: bool) -> Dict[str, Any]:
+        """
+        Validate research requested as JSON, falling back to the text parser.
+        
+        Args:
+            response: Raw response from the LLM
+            topic: Original topic
+            academic_level: Academic level requested
+            include_references: Whether references were requested
+            
+        Returns:
+            Structured research content
+        """
+        research = parse_structured(response, _RESEARCH_ADAPTER, "research", defaults=_RESEARCH_DEFAULTS)
+        if research is None:
+            # The server ignored response_format or the JSON could not be repaired
+            print("Structured research output did not validate, parsing it as text")
+            return self._parse_research_response(response, topic, academic_level, include_references)
+        
+        research_content = research.model_dump()
+        if not include_references:
+            research_content["references"] = None
+        return research_content
+    
     def _parse_research_response(self, response: str, topic: str, academic_level: str, include_references: bool) -> Dict[str, Any]:
         """
         Parse the LLM response to extract research content.
         
+        The response is tokenized line by line in a single pass (see
+        ResearchStreamParser), so parsing time grows linearly with its length.
+        
         Args:
             response: Raw response from the LLM
             topic: Original topic
@@ -134,111 +646,7 @@ class DeepResearchService:
             Structured research content
         """
         try:
-            # Initialize default structure
-            research_content = {
-                "introduction": "",
-                "sections": [],
-                "references": [] if include_references else None,
-                "related_topics": [],
-                "key_concepts": [],
-                "visualization_prompts": []
-            }
-            
-            # Extract introduction
-            intro_match = re.search(r"(?:INTRODUCTION:?|Introduction:?)(.*?)(?:SECTIONS|SECTION 1|Sections|Section 1|##)", response, re.DOTALL)
-            if intro_match:
-                research_content["introduction"] = intro_match.group(1).strip()
-            else:
-                # Fallback: use first paragraph as introduction
-                paragraphs = response.split('\n\n')
-                if paragraphs:
-                    research_content["introduction"] = paragraphs[0].strip()
-            
-            # Extract sections
-            # Look for sections with patterns like "SECTION: Title" or "## Title" or "Title\n---"
-            section_matches = re.finditer(r"(?:SECTION \d+:?|Section \d+:?|##\s+|#\s+)(.*?)(?=(?:SECTION \d+:?|Section \d+:?|##\s+|#\s+|KEY_CONCEPTS|VISUALIZATION_PROMPTS|RELATED_TOPICS|REFERENCES|$))", response, re.DOTALL)
-            
-            for match in section_matches:
-                section_text = match.group(0).strip()
-                
-                # Try to extract title and content
-                title_match = re.match(r"(?:SECTION \d+:?|Section \d+:?|##\s+|#\s+)(.*?)(?:\n|\r\n)", section_text)
-                if title_match:
-                    title = title_match.group(1).strip()
-                    content = section_text[title_match.end():].strip()
-                    research_content["sections"].append({"title": title, "content": content})
-            
-            # Extract key concepts
-            key_concepts_match = re.search(r"(?:KEY_CONCEPTS:?|Key Concepts:?)(.*?)(?:VISUALIZATION_PROMPTS|RELATED_TOPICS|REFERENCES|$)", response, re.DOTALL)
-            if key_concepts_match:
-                concepts_text = key_concepts_match.group(1).strip()
-                # Extract bullet points
-                concepts = [item.strip().lstrip('- ') for item in concepts_text.split('\n') if item.strip() and item.strip().startswith('-')]
-                research_content["key_concepts"] = concepts
-            
-            # Extract visualization prompts
-            viz_match = re.search(r"(?:VISUALIZATION_PROMPTS:?|Visualization Prompts:?)(.*?)(?:RELATED_TOPICS|REFERENCES|$)", response, re.DOTALL)
-            if viz_match:
-                viz_text = viz_match.group(1).strip()
-                # Extract bullet points
-                prompts = [item.strip().lstrip('- ') for item in viz_text.split('\n') if item.strip() and item.strip().startswith('-')]
-                research_content["visualization_prompts"] = prompts
-            
-            # Extract related topics
-            related_match = re.search(r"(?:RELATED_TOPICS:?|Related Topics:?)(.*?)(?:REFERENCES|$)", response, re.DOTALL)
-            if related_match:
-                related_text = related_match.group(1).strip()
-                # Process each line that starts with a bullet or number
-                for line in related_text.split('\n'):
-                    line = line.strip()
-                    if line and (line.startswith('-') or line.startswith('*') or re.match(r'^\d+\.', line)):
-                        # Extract topic and relevance if there's a colon or dash separating them
-                        parts = re.split(r'[:\-–]', line.lstrip('- *0123456789.'), 1)
-                        if len(parts) > 1:
-                            research_content["related_topics"].append({
-                                "topic": parts[0].strip(),
-                                "relevance": parts[1].strip()
-                            })
-                        else:
-                            # Just use the whole line as the topic
-                            research_content["related_topics"].append({
-                                "topic": parts[0].strip(),
-                                "relevance": "Related area of study"
-                            })
-            
-            # Extract references if requested
-            if include_references:
-                ref_match = re.search(r"(?:REFERENCES:?|References:?)(.*?)$", response, re.DOTALL)
-                if ref_match:
-                    ref_text = ref_match.group(1).strip()
-                    # Split by line
-                    ref_lines = [line.strip() for line in ref_text.split('\n') if line.strip()]
-                    
-                    # Process each reference
-                    for ref in ref_lines:
-                        if not ref or ref.startswith('-') or len(ref) < 10:
-                            continue
-                        
-                        # Extract basic reference data
-                        author_match = re.search(r'^([^\.]+)', ref)
-                        title_match = re.search(r'"([^"]+)"', ref) or re.search(r'"([^"]+)"', ref)
-                        year_match = re.search(r'\((\d{4})\)', ref) or re.search(r',\s*(\d{4})\b', ref)
-                        doi_match = re.search(r'(10\.\d{4,}(?:\.\d+)*\/\S+)', ref)
-                        url_match = re.search(r'(https?://\S+)', ref)
-                        
-                        # Construct reference object
-                        reference = {
-                            "title": title_match.group(1) if title_match else "Unknown title",
-                            "authors": [a.strip() for a in author_match.group(1).split(',') if a.strip()] if author_match else ["Unknown author"],
-                            "year": int(year_match.group(1)) if year_match else None,
-                            "doi": doi_match.group(1) if doi_match else None,
-                            "url": url_match.group(1) if url_match else None
-                        }
-                        
-                        research_content["references"].append(reference)
-            
-            return research_content
-            
+            return parse_research_document(response, include_references)
         except Exception as e:
             # If parsing fails, return a default structure
             print(f"Error parsing research response: {str(e)}")
@@ -1,6 +1,7 @@
 from config.settings import Settings
 from app.nvidia_api.image_client import NvidiaImageClient
 from app.gemini_api.gemini_image_client import GeminiImageClient
+from app.services.circuit_breaker import get_circuit_breaker, is_upstream_failure, CircuitOpenError
 from typing import Dict, List, Any
 import asyncio
 import time
@@ -19,6 +20,8 @@ class ImageService:
         self.settings = settings
         self.image_client = NvidiaImageClient(settings)
         self.gemini_client = GeminiImageClient(settings)
+        self.nvidia_breaker = get_circuit_breaker("nvidia_image", settings)
+        self.gemini_breaker = get_circuit_breaker("gemini", settings)
         
     async def generate_image(self, prompt: str) -> str:
         """
@@ -37,8 +40,17 @@ class ImageService:
         # Enhance the prompt for educational context
         enhanced_prompt = self._enhance_prompt(prompt)
         
-        # Call NVIDIA's text-to-image API
-        image_url = await self.image_client.generate_image(enhanced_prompt)
+        # Call NVIDIA's text-to-image API (fails fast while its circuit is open)
+        try:
+            image_url = await self.nvidia_breaker.call(
+                lambda: self.image_client.generate_image(enhanced_prompt),
+                timeout=self.settings.NVIDIA_IMAGE_CALL_TIMEOUT
+            )
+        except CircuitOpenError:
+            if self.settings.CIRCUIT_BREAKER_FALLBACK == "error":
+                raise
+            logger.warning("NVIDIA image circuit is open, serving placeholder image")
+            return self._generate_mock_image(prompt)
         
         return image_url
     
@@ -79,12 +91,25 @@ class ImageService:
             enhanced_prompt = self._enhance_prompt(prompt)
             logger.info(f"Enhanced prompt: {enhanced_prompt[:50]}...")
             
-            # Call Gemini's text-to-image API
+            # Call Gemini's text-to-image API (fails fast while its circuit is open)
             logger.info("Calling Gemini image client...")
-            result = await self.gemini_client.generate_image(enhanced_prompt, filename_prefix)
+            result = await self.gemini_breaker.call(
+                lambda: self.gemini_client.generate_image(enhanced_prompt, filename_prefix),
+                timeout=self.settings.GEMINI_CALL_TIMEOUT,
+                is_failure=self._is_gemini_failure
+            )
+            result.pop("upstream_error", None)
             logger.info(f"Gemini image generation result: {result}")
             
             return result
+        except CircuitOpenError as e:
+            logger.warning(f"Gemini circuit is open, failing fast: {str(e)}")
+            return {
+                "success": False,
+                "image_url": None,
+                "file_path": None,
+                "error": "Gemini image generation is temporarily unavailable. Please try again shortly."
+            }
         except Exception as e:
             logger.error(f"Error in generate_gemini_image: {str(e)}")
             return {
@@ -98,6 +123,25 @@ class ImageService:
             self.settings.USE_MOCK_DATA = original_mock_setting
             logger.info(f"Restored USE_MOCK_DATA to: {self.settings.USE_MOCK_DATA}")
     
+    @staticmethod
+    def _is_gemini_failure(result: Dict[str, Any]) -> bool:
+        """
+        Whether a Gemini result says the upstream is unhealthy.
+        
+        The client turns API errors into fallback images, so only the API error it
+        reports counts, judged like a raised error (transport, 5xx, rate limits).
+        Unsuccessful results without one, such as a refused prompt or a missing
+        API key, are not upstream failures.
+        """
+        error = result.get("upstream_error")
+        return error is not None and is_upstream_failure(error)
+    
+    @staticmethod
+    def filename_prefix(prompt: str) -> str:
+        """Build a filesystem-safe filename prefix from the start of a prompt"""
+        prefix = prompt[:10].replace(" ", "_")
+        return ''.join(c if c.isalnum() or c == '_' else '_' for c in prefix)
+    
     def _enhance_prompt(self, prompt: str) -> str:
         """
         Enhance the prompt to improve image generation quality for educational content.
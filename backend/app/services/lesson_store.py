@@ -0,0 +1,132 @@
+from config.settings import Settings
+from typing import Dict, Any, Iterator, Optional
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+
+class LessonStore:
+    """
+    Disk-backed store for precomputed lessons.
+
+    Each lesson is a JSON file named after its lesson cache key, so entries
+    survive restarts and are shared by every worker process. Writes go through
+    a temporary file and an atomic rename, which keeps readers from ever seeing
+    a half-written lesson and lets an interrupted precompute run resume safely.
+    Reads run in a worker thread so a slow disk never blocks the event loop.
+    The number of stored lessons is counted once on startup and kept up to date
+    on every write through this store.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Initialize the store.
+
+        Args:
+            directory: Directory holding one JSON file per lesson (created if missing)
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.entries = sum(1 for name in os.listdir(directory) if name.endswith(".json"))
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Load a stored lesson without blocking the event loop.
+
+        Args:
+            key: Lesson cache key
+
+        Returns:
+            The stored lesson, or None if it is missing or unreadable
+        """
+        lesson = await asyncio.to_thread(self._read, self._path(key))
+        if lesson is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return lesson
+
+    @staticmethod
+    def _read(path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, lesson: Dict[str, Any]):
+        """
+        Store a lesson atomically.
+
+        Args:
+            key: Lesson cache key
+            lesson: Lesson data (explanation, image_prompts and optional images/metadata)
+        """
+        record = dict(lesson, stored_at=time.time())
+        path = self._path(key)
+        existed = os.path.exists(path)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(record, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.writes += 1
+        if not existed:
+            self.entries += 1
+
+    def iter_lessons(self) -> Iterator[Dict[str, Any]]:
+        """Yield every readable stored lesson"""
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith(".json"):
+                lesson = self._read(os.path.join(self.directory, name))
+                if lesson is not None:
+                    yield lesson
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return lookup counters and the number of stored lessons"""
+        return {
+            "directory": self.directory,
+            "entries": self.entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes
+        }
+
+
+_store: Optional[LessonStore] = None
+
+
+def get_lesson_store(settings: Settings) -> Optional[LessonStore]:
+    """
+    Get the process-wide lesson store.
+
+    Args:
+        settings: Application settings providing LESSON_STORE_DIR
+
+    Returns:
+        The shared LessonStore, or None when LESSON_STORE_DIR is empty
+    """
+    global _store
+    if not settings.LESSON_STORE_DIR:
+        return None
+    if _store is None:
+        _store = LessonStore(settings.LESSON_STORE_DIR)
+    return _store
+
+
+def get_lesson_store_stats() -> Optional[Dict[str, Any]]:
+    """Return statistics for the lesson store, if it is in use"""
+    return _store.get_stats() if _store is not None else None
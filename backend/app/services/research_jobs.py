@@ -0,0 +1,319 @@
+from config.settings import Settings
+from app.models.deep_research_schemas import DeepResearchResponse
+from app.nvidia_api.response_cache import make_cache_key
+from app.services.deep_research_service import DeepResearchService
+from typing import Dict, Any, AsyncGenerator, List, Optional, Tuple
+import asyncio
+import time
+import uuid
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class JobQueueFullError(Exception):
+    """Raised when a job is submitted while the queue holds the maximum number of waiting jobs"""
+    pass
+
+
+class ResearchJob:
+    """
+    A deep research request running in the background.
+
+    Progress is counted in LLM calls (in parallel mode, the outline plus one
+    per section; in single mode, the whole document). Waiters are woken on
+    every status or progress change; use wait_until_done or updates to follow
+    a job.
+    """
+
+    def __init__(self, job_id: str, request_hash: str, params: Dict[str, Any], use_cache: bool):
+        self.job_id = job_id
+        self.request_hash = request_hash
+        self.params = params
+        self.use_cache = use_cache
+
+        self.status = QUEUED
+        self.completed = 0
+        self.total = 1
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.expires_at: Optional[float] = None  # Monotonic; set when the job finishes
+        self._updated = asyncio.Event()
+
+    @property
+    def done(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED, CANCELLED)
+
+    def start(self):
+        """Mark the job as picked up by a worker"""
+        self.status = RUNNING
+        self.started_at = time.time()
+        self._notify()
+
+    def set_progress(self, completed: int, total: int):
+        """Progress callback passed to DeepResearchService.generate_research"""
+        self.completed, self.total = completed, total
+        self._notify()
+
+    def finish(self, status: str, ttl: float, error: Optional[str] = None):
+        """
+        Mark the job finished.
+
+        Args:
+            status: SUCCEEDED, FAILED or CANCELLED
+            ttl: Seconds the job and its result are kept
+            error: Error message of a failed or cancelled job
+        """
+        if status == SUCCEEDED:
+            self.completed = self.total
+        self.status = status
+        self.error = error
+        self.finished_at = time.time()
+        self.expires_at = time.monotonic() + ttl
+        self._notify()
+
+    def _notify(self):
+        self._updated.set()
+        self._updated = asyncio.Event()
+
+    async def wait_until_done(self, timeout: float) -> bool:
+        """
+        Wait for the job to finish.
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            True if the job is done
+        """
+        deadline = time.monotonic() + timeout
+        while not self.done and time.monotonic() < deadline:
+            try:
+                await asyncio.wait_for(self._updated.wait(), deadline - time.monotonic())
+            except asyncio.TimeoutError:
+                break
+        return self.done
+
+    async def updates(self, keepalive: float) -> AsyncGenerator[Optional[Dict[str, Any]], None]:
+        """
+        Follow the job until it finishes.
+
+        Args:
+            keepalive: Seconds without a change after which None is yielded
+
+        Yields:
+            The job (see to_dict) right away and after every status or progress
+            change, ending with the finished job; None when nothing changed for
+            keepalive seconds
+        """
+        while True:
+            # Taken before yielding so a change made while the caller sends the status is not missed
+            updated = self._updated
+            yield self.to_dict()
+            if self.done:
+                return
+            while True:
+                try:
+                    await asyncio.wait_for(updated.wait(), keepalive)
+                    break
+                except asyncio.TimeoutError:
+                    yield None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the job in the ResearchJobStatus shape"""
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "progress": {"completed": self.completed, "total": self.total},
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "result": self.result
+        }
+
+
+class ResearchJobManager:
+    """
+    Runs deep research jobs on a bounded pool of worker tasks.
+
+    Jobs are de-duplicated by a hash of their request: submitting a request
+    that is queued, running, or finished and not yet expired returns the
+    existing job. Finished jobs are kept for `ttl` seconds.
+    """
+
+    def __init__(self, service: DeepResearchService, workers: int, max_queued: int, ttl: float):
+        """
+        Initialize the manager.
+
+        Args:
+            service: Research service the jobs run on
+            workers: Number of jobs generated at the same time
+            max_queued: Maximum number of jobs waiting for a worker
+            ttl: Seconds a finished job and its result are kept
+        """
+        self.service = service
+        self.workers = max(workers, 1)
+        self.ttl = ttl
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max(max_queued, 1))
+        self._jobs: Dict[str, ResearchJob] = {}
+        self._by_hash: Dict[str, str] = {}
+        self._tasks: List[asyncio.Task] = []
+
+        self.submitted = 0
+        self.deduplicated = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.expired = 0
+
+    def start(self):
+        """Start the worker tasks"""
+        if not self._tasks:
+            self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Cancel the workers; running and queued jobs are marked cancelled"""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        while not self._queue.empty():
+            self._queue.get_nowait().finish(CANCELLED, self.ttl, "The server shut down before the job started")
+            self.cancelled += 1
+            self._queue.task_done()
+
+    def submit(self, params: Dict[str, Any], use_cache: bool = True) -> Tuple[ResearchJob, bool]:
+        """
+        Queue a research job, or find the job already answering the same request.
+
+        Args:
+            params: Keyword arguments for DeepResearchService.generate_research
+            use_cache: Whether the job may use cached research; when False, only
+                queued or running jobs are reused
+
+        Returns:
+            (job, created) where created is False for a de-duplicated request
+
+        Raises:
+            JobQueueFullError: If the queue is full
+        """
+        self._purge()
+        request_hash = self._request_hash(params)
+        existing = self._jobs.get(self._by_hash.get(request_hash, ""))
+        # Failed and cancelled jobs are not reused, so a resubmitted request is retried
+        if existing is not None and existing.status not in (FAILED, CANCELLED) and (use_cache or not existing.done):
+            self.deduplicated += 1
+            return existing, False
+
+        job = ResearchJob(uuid.uuid4().hex, request_hash, params, use_cache)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFullError(f"{self._queue.qsize()} research jobs are already waiting")
+        self._jobs[job.job_id] = job
+        self._by_hash[request_hash] = job.job_id
+        self.submitted += 1
+        return job, True
+
+    def get(self, job_id: str) -> Optional[ResearchJob]:
+        """Look up a job that has not expired"""
+        self._purge()
+        return self._jobs.get(job_id)
+
+    def _request_hash(self, params: Dict[str, Any]) -> str:
+        """Hash the request the way the research cache keys it, so equivalent requests share a job"""
+        return make_cache_key(
+            "research_job",
+            params["topic"].strip().lower(),
+            [subtopic.strip().lower() for subtopic in params.get("subtopics") or []],
+            params["academic_level"].strip().lower(),
+            params["include_references"],
+            self.service.resolve_mode(params.get("mode"), params.get("subtopics")),
+            sorted(subtopic.strip().lower() for subtopic in params.get("refresh_subtopics") or [])
+        )
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            job.start()
+            try:
+                research = await self.service.generate_research(
+                    **job.params, use_cache=job.use_cache, progress=job.set_progress
+                )
+                # Validate here so a malformed document fails the job instead of every poll
+                job.result = DeepResearchResponse(**research).model_dump()
+                job.finish(SUCCEEDED, self.ttl)
+                self.succeeded += 1
+            except asyncio.CancelledError:
+                job.finish(CANCELLED, self.ttl, "The server shut down before the job finished")
+                self.cancelled += 1
+                raise
+            except Exception as e:
+                print(f"Research job {job.job_id} failed: {str(e)}")
+                job.finish(FAILED, self.ttl, str(e))
+                self.failed += 1
+            finally:
+                self._queue.task_done()
+
+    def _purge(self):
+        now = time.monotonic()
+        for job_id, job in list(self._jobs.items()):
+            if job.expires_at is not None and job.expires_at < now:
+                del self._jobs[job_id]
+                if self._by_hash.get(job.request_hash) == job_id:
+                    del self._by_hash[job.request_hash]
+                self.expired += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return queue depth and job counters"""
+        return {
+            "workers": len(self._tasks),
+            "queued": self._queue.qsize(),
+            "running": sum(1 for job in self._jobs.values() if job.status == RUNNING),
+            "retained": len(self._jobs),
+            "submitted": self.submitted,
+            "deduplicated": self.deduplicated,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "expired": self.expired
+        }
+
+
+_manager: Optional[ResearchJobManager] = None
+
+
+def get_research_job_manager(settings: Settings) -> Optional[ResearchJobManager]:
+    """
+    Get the process-wide research job manager.
+
+    Args:
+        settings: Application settings providing the pool size, queue size and TTL
+
+    Returns:
+        The shared ResearchJobManager, or None when research jobs are disabled
+    """
+    global _manager
+    if not settings.RESEARCH_JOBS_ENABLED:
+        return None
+    if _manager is None:
+        _manager = ResearchJobManager(
+            DeepResearchService(settings),
+            workers=settings.RESEARCH_JOBS_WORKERS,
+            max_queued=settings.RESEARCH_JOBS_MAX_QUEUED,
+            ttl=settings.RESEARCH_JOBS_TTL
+        )
+    return _manager
+
+
+def get_research_job_stats() -> Optional[Dict[str, Any]]:
+    """Return statistics for research jobs, if they are in use"""
+    return _manager.get_stats() if _manager is not None else None
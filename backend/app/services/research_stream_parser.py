@@ -0,0 +1,245 @@
+from typing import Dict, Any, List, Optional
+import re
+
+# Block headings of the research format ("INTRODUCTION:", "## Key Concepts", "4. VISUALIZATION_PROMPTS:")
+_BLOCK_HEADING = re.compile(
+    r"^[\s#*]*(?:\d+\.\s*)?"
+    r"(INTRODUCTION|SECTIONS|KEY[_ ]CONCEPTS|VISUALIZATION[_ ]PROMPTS|RELATED[_ ]TOPICS|REFERENCES)\b"
+    r"[*\s]*(:?)[*\s]*(.*)$",
+    re.IGNORECASE
+)
+
+# Section headings ("SECTION 2: Title", "Section 2 - Title", "## Title", "## Section 2: Title")
+_SECTION_HEADING = re.compile(
+    r"^[\s*]*(?:#{1,6}\s+[\s*]*(?:SECTION\s+\d+\s*[:.\-]?)?|SECTION\s+\d+\s*[:.\-]?)\s*(.*)$",
+    re.IGNORECASE
+)
+
+_LIST_ITEM = re.compile(r'^\d+\.')
+_RELATED_SEPARATOR = re.compile(r'[:\-–]')
+_REF_AUTHORS = re.compile(r'^([^\.]+)')
+_REF_TITLE = re.compile(r'"([^"]+)"')
+_REF_TITLE_CURLY = re.compile(r'“([^”]+)”')
+_REF_YEAR = re.compile(r'\((\d{4})\)')
+_REF_YEAR_AFTER_COMMA = re.compile(r',\s*(\d{4})\b')
+_REF_DOI = re.compile(r'(10\.\d{4,}(?:\.\d+)*\/\S+)')
+_REF_URL = re.compile(r'(https?://\S+)')
+
+
+def parse_related_topic(line: str) -> Optional[Dict[str, str]]:
+    """
+    Parse one line of the RELATED_TOPICS block.
+
+    Args:
+        line: A line such as "- Quantum Cryptography: secure communication"
+
+    Returns:
+        {"topic", "relevance"}, or None if the line is not a list item
+    """
+    line = line.strip()
+    if not line or not (line.startswith('-') or line.startswith('*') or _LIST_ITEM.match(line)):
+        return None
+    # Split topic and relevance at the first colon or dash
+    parts = _RELATED_SEPARATOR.split(line.lstrip('- *0123456789.'), 1)
+    if len(parts) > 1:
+        return {"topic": parts[0].strip(), "relevance": parts[1].strip()}
+    return {"topic": parts[0].strip(), "relevance": "Related area of study"}
+
+
+def parse_reference(line: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse one line of the REFERENCES block.
+
+    Args:
+        line: A Chicago-style reference
+
+    Returns:
+        Reference data (title, authors, year, doi, url), or None for bullets and short lines
+    """
+    ref = line.strip()
+    if not ref or ref.startswith('-') or len(ref) < 10:
+        return None
+
+    author_match = _REF_AUTHORS.search(ref)
+    title_match = _REF_TITLE.search(ref) or _REF_TITLE_CURLY.search(ref)
+    year_match = _REF_YEAR.search(ref) or _REF_YEAR_AFTER_COMMA.search(ref)
+    doi_match = _REF_DOI.search(ref)
+    url_match = _REF_URL.search(ref)
+
+    return {
+        "title": title_match.group(1) if title_match else "Unknown title",
+        "authors": [a.strip() for a in author_match.group(1).split(',') if a.strip()] if author_match else ["Unknown author"],
+        "year": int(year_match.group(1)) if year_match else None,
+        "doi": doi_match.group(1) if doi_match else None,
+        "url": url_match.group(1) if url_match else None
+    }
+
+
+class ResearchStreamParser:
+    """
+    Incremental, line-based parser for streamed research documents.
+
+    Feeds on raw LLM chunks and emits each part of the research format as
+    soon as it is complete: the introduction and every section when the next
+    heading starts, the key concepts, visualization prompts and related topics
+    when their block ends, and every reference as soon as its line is complete.
+    Only the current line and the current block are buffered.
+
+    `research` holds the assembled result in the DeepResearchResponse shape.
+    """
+
+    PREAMBLE = "preamble"
+    INTRODUCTION = "introduction"
+    SECTIONS = "sections"
+    SECTION = "section"
+    KEY_CONCEPTS = "key_concepts"
+    VISUALIZATION_PROMPTS = "visualization_prompts"
+    RELATED_TOPICS = "related_topics"
+    REFERENCES = "references"
+
+    def __init__(self, include_references: bool = True):
+        """
+        Initialize the parser.
+
+        Args:
+            include_references: Whether references are parsed (otherwise `references` stays None)
+        """
+        self.include_references = include_references
+        self.state = self.PREAMBLE
+        self.research: Dict[str, Any] = {
+            "introduction": "",
+            "sections": [],
+            "references": [] if include_references else None,
+            "related_topics": [],
+            "key_concepts": [],
+            "visualization_prompts": []
+        }
+        self._buffer = ""
+        self._block: List[str] = []
+        self._section_title: Optional[str] = None
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        Consume one chunk of streamed text.
+
+        Args:
+            chunk: Raw text from the LLM stream
+
+        Returns:
+            Events for the parts completed by this chunk, each with a "type" of
+            introduction, section, key_concepts, visualization_prompts,
+            related_topics or reference
+        """
+        events: List[Dict[str, Any]] = []
+        if "\n" not in chunk:
+            self._buffer += chunk
+            return events
+        # Split once per chunk so the cost stays linear however large the chunk is
+        *lines, self._buffer = (self._buffer + chunk).split("\n")
+        for line in lines:
+            self._parse_line(line.rstrip("\r"), events)
+        return events
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """
+        Parse the last line and close the open block at the end of the stream.
+
+        Returns:
+            The remaining events
+        """
+        events: List[Dict[str, Any]] = []
+        if self._buffer:
+            self._parse_line(self._buffer.rstrip("\r"), events)
+            self._buffer = ""
+        self._close_block(events)
+        self.state = self.PREAMBLE
+        return events
+
+    def _parse_line(self, line: str, events: List[Dict[str, Any]]):
+        heading = _BLOCK_HEADING.match(line)
+        # Title-case words only count as headings when they stand alone or end with a colon
+        if heading and (heading.group(1).isupper() or heading.group(2) or not heading.group(3)):
+            state = heading.group(1).lower().replace(" ", "_")
+            if self.state == self.PREAMBLE and state == self.INTRODUCTION:
+                # An explicit introduction replaces any text before it
+                self._block = []
+            else:
+                self._close_block(events)
+            self.state = state
+            if heading.group(3).strip():
+                self._parse_line(heading.group(3), events)
+            return
+
+        section = _SECTION_HEADING.match(line)
+        if section:
+            self._close_block(events)
+            self.state = self.SECTION
+            title = section.group(1).strip("*#: ")
+            self._section_title = title or None
+            return
+
+        if self.state == self.SECTION and self._section_title is None:
+            # "SECTION 1:" with the title on the next line
+            if line.strip():
+                self._section_title = line.strip("*#: ")
+            return
+
+        if self.state == self.REFERENCES:
+            reference = parse_reference(line) if self.include_references else None
+            if reference is not None:
+                self.research["references"].append(reference)
+                events.append({"type": "reference", "index": len(self.research["references"]) - 1,
+                               "reference": reference})
+            return
+
+        self._block.append(line)
+
+    def _close_block(self, events: List[Dict[str, Any]]):
+        """Turn the lines collected for the current block into its result and event"""
+        lines, self._block = self._block, []
+        text = "\n".join(lines).strip()
+
+        if self.state == self.PREAMBLE:
+            # Without an INTRODUCTION heading, the first paragraph serves as the introduction
+            if text and not self.research["introduction"]:
+                self._set_introduction(text.split("\n\n")[0].strip(), events)
+        elif self.state == self.INTRODUCTION:
+            if text:
+                self._set_introduction(text, events)
+        elif self.state == self.SECTION:
+            if self._section_title:
+                section = {"title": self._section_title, "content": text}
+                self.research["sections"].append(section)
+                events.append(dict(section, type="section", index=len(self.research["sections"]) - 1))
+            self._section_title = None
+        elif self.state in (self.KEY_CONCEPTS, self.VISUALIZATION_PROMPTS):
+            items = [line.strip().lstrip('- ') for line in lines if line.strip().startswith('-')]
+            if items:
+                self.research[self.state].extend(items)
+                events.append({"type": self.state, "items": list(self.research[self.state])})
+        elif self.state == self.RELATED_TOPICS:
+            items = [topic for topic in (parse_related_topic(line) for line in lines) if topic is not None]
+            if items:
+                self.research["related_topics"].extend(items)
+                events.append({"type": "related_topics", "items": list(self.research["related_topics"])})
+
+    def _set_introduction(self, text: str, events: List[Dict[str, Any]]):
+        self.research["introduction"] = text
+        events.append({"type": "introduction", "content": text})
+
+
+def parse_research_document(text: str, include_references: bool = True) -> Dict[str, Any]:
+    """
+    Parse a complete research document in a single linear pass.
+
+    Args:
+        text: Full LLM response
+        include_references: Whether references were requested
+
+    Returns:
+        Structured research content in the DeepResearchResponse shape
+    """
+    parser = ResearchStreamParser(include_references)
+    parser.feed(text)
+    parser.finish()
+    return parser.research
@@ -0,0 +1,110 @@
+from app.services.image_service import ImageService
+from typing import Dict, Any, AsyncGenerator, Set
+import asyncio
+
+# Queue sentinel marking the end of the lesson stream
+_LESSON_DONE = object()
+
+
+class StreamImageGenerator:
+    """
+    Generates lesson images while the lesson text is still streaming.
+
+    Wraps a ContentService stream: every image_prompt event starts a background
+    Gemini generation (at most max_concurrency at a time) and each result is
+    pushed into the same stream as an image_ready event. The final chunk is held
+    back until all images have been reported, so `finished: true` stays the last
+    event. Closing the stream (e.g. the client disconnecting) cancels the lesson
+    and any images still in flight.
+    """
+
+    def __init__(self, image_service: ImageService, max_concurrency: int):
+        self.image_service = image_service
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._started: Set[int] = set()  # Image indices already being generated
+        self._tasks: Set[asyncio.Task] = set()
+        self._pending = 0
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    async def stream(self, lesson_events: AsyncGenerator[Dict[str, Any], None]) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Merge lesson chunks and image_ready events.
+
+        Args:
+            lesson_events: Chunks from ContentService.generate_educational_content_stream
+
+        Yields:
+            The lesson chunks interleaved with image_ready chunks
+        """
+        producer = asyncio.create_task(self._pump(lesson_events))
+        final_event = None
+        lesson_done = False
+        try:
+            while not lesson_done or self._pending or not self._queue.empty():
+                item = await self._queue.get()
+                if item is _LESSON_DONE:
+                    lesson_done = True
+                    continue
+                if isinstance(item, BaseException):
+                    raise item
+
+                if item.get("image_prompt"):
+                    self._start(item["image_prompt"], item["image_prompt_index"])
+                if item.get("finished"):
+                    # Only indices that never streamed: when defaults replace a partial list,
+                    # the streamed images keep their slots instead of being generated twice
+                    for index, image_prompt in enumerate(item.get("image_prompts") or []):
+                        self._start(image_prompt, index)
+                    final_event = item
+                    continue
+                yield item
+
+            if final_event is not None:
+                yield final_event
+        finally:
+            producer.cancel()
+            for task in self._tasks:
+                task.cancel()
+
+    async def _pump(self, lesson_events: AsyncGenerator[Dict[str, Any], None]):
+        try:
+            async for event in lesson_events:
+                self._queue.put_nowait(event)
+        except Exception as e:
+            self._queue.put_nowait(e)
+        finally:
+            self._queue.put_nowait(_LESSON_DONE)
+            # Cancelling the pump must also release the LLM stream it was reading
+            await lesson_events.aclose()
+
+    def _start(self, image_prompt: str, index: int):
+        if index in self._started:
+            return
+        self._started.add(index)
+        self._pending += 1
+        task = asyncio.create_task(self._generate(image_prompt, index))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _generate(self, image_prompt: str, index: int):
+        try:
+            async with self._semaphore:
+                result = await self.image_service.generate_gemini_image(
+                    image_prompt, ImageService.filename_prefix(image_prompt)
+                )
+        except Exception as e:
+            result = {"success": False, "image_url": None, "error": str(e)}
+
+        # Enqueue and settle the count in one step so the merge loop never waits on a finished image
+        self._queue.put_nowait({
+            "chunk": "",
+            "finished": False,
+            "image_ready": {
+                "index": index,
+                "prompt": image_prompt,
+                "success": bool(result.get("success")),
+                "image_url": result.get("image_url"),
+                "error": result.get("error")
+            }
+        })
+        self._pending -= 1
@@ -0,0 +1,146 @@
+from typing import Dict, Any, List, Tuple
+
+IMAGE_PROMPTS_MARKER = "IMAGE_PROMPTS"
+
+# Characters that may decorate the marker line ("## IMAGE_PROMPTS", "**IMAGE_PROMPTS**")
+_MARKUP_CHARS = set(" \t#*_`>")
+
+
+class LessonStreamParser:
+    """
+    Incremental parser for streamed lesson text.
+
+    Feeds on raw LLM chunks and splits them into explanation text and image
+    prompts as they arrive. Text is forwarded as soon as it can no longer be
+    part of the IMAGE_PROMPTS marker (which may be split across chunks); once
+    the marker is seen nothing else is forwarded as explanation, and each
+    "- " bullet becomes an image prompt the moment its line is complete. Only
+    the bullets between the first marker and a repeated one count.
+
+    ContentService._parse_llm_response parses complete responses with the same
+    parser (see parse_lesson), so streamed and non-streamed lessons agree.
+    """
+
+    EXPLANATION = "explanation"
+    IMAGE_PROMPTS = "image_prompts"
+    DONE = "done"
+
+    def __init__(self, max_prompts: int = 3):
+        """
+        Initialize the parser.
+
+        Args:
+            max_prompts: Number of image prompts to emit; later bullets are ignored
+        """
+        self.max_prompts = max_prompts
+        self.state = self.EXPLANATION
+        self.image_prompts: List[str] = []
+        self._explanation_parts: List[str] = []
+        self._buffer = ""
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        Consume one chunk of streamed text.
+
+        Args:
+            chunk: Raw text from the LLM stream
+
+        Returns:
+            Events ready to forward: {"type": "text", "text": ...} and
+            {"type": "image_prompt", "prompt": ..., "index": ...}
+        """
+        self._buffer += chunk
+        events: List[Dict[str, Any]] = []
+
+        if self.state == self.EXPLANATION:
+            marker_at = self._buffer.find(IMAGE_PROMPTS_MARKER)
+            if marker_at == -1:
+                cut = self._safe_cut()
+                self._emit_text(self._buffer[:cut], events)
+                self._buffer = self._buffer[cut:]
+                return events
+
+            line_start = self._buffer.rfind("\n", 0, marker_at) + 1
+            # Drop heading/bold markup that only decorates the marker
+            text_end = line_start if self._is_markup(self._buffer[line_start:marker_at]) else marker_at
+            self._emit_text(self._buffer[:text_end], events)
+            self._buffer = self._buffer[marker_at + len(IMAGE_PROMPTS_MARKER):]
+            self.state = self.IMAGE_PROMPTS
+
+        while "\n" in self._buffer:
+            line, self._buffer = self._buffer.split("\n", 1)
+            self._parse_prompt_line(line, events)
+        return events
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """
+        Flush text held back at the end of the stream.
+
+        Returns:
+            The remaining events
+        """
+        events: List[Dict[str, Any]] = []
+        if self.state == self.EXPLANATION:
+            self._emit_text(self._buffer, events)
+        else:
+            self._parse_prompt_line(self._buffer, events)
+        self._buffer = ""
+        return events
+
+    @property
+    def explanation(self) -> str:
+        """The explanation text seen so far, stripped"""
+        return "".join(self._explanation_parts).strip()
+
+    def _safe_cut(self) -> int:
+        """Length of the buffer prefix that cannot belong to a marker line"""
+        cut = len(self._buffer)
+        for length in range(min(len(IMAGE_PROMPTS_MARKER) - 1, len(self._buffer)), 0, -1):
+            if self._buffer.endswith(IMAGE_PROMPTS_MARKER[:length]):
+                cut -= length
+                break
+
+        line_start = self._buffer.rfind("\n", 0, cut) + 1
+        if line_start < cut and self._is_markup(self._buffer[line_start:cut]):
+            cut = line_start
+        return cut
+
+    @staticmethod
+    def _is_markup(text: str) -> bool:
+        return all(char in _MARKUP_CHARS for char in text)
+
+    def _emit_text(self, text: str, events: List[Dict[str, Any]]):
+        if text:
+            self._explanation_parts.append(text)
+            events.append({"type": "text", "text": text})
+
+    def _parse_prompt_line(self, line: str, events: List[Dict[str, Any]]):
+        if self.state == self.DONE:
+            return
+        line, marker, _ = line.partition(IMAGE_PROMPTS_MARKER)
+        if marker:
+            # A repeated marker ends the prompt list; text before it on the same line still counts
+            self.state = self.DONE
+        stripped = line.strip()
+        if not stripped.startswith("- ") or len(self.image_prompts) >= self.max_prompts:
+            return
+        prompt = stripped[2:].strip()
+        self.image_prompts.append(prompt)
+        events.append({"type": "image_prompt", "prompt": prompt, "index": len(self.image_prompts) - 1})
+
+
+def parse_lesson(text: str, max_prompts: int = 3) -> Tuple[str, List[str]]:
+    """
+    Parse a complete lesson response.
+
+    Args:
+        text: Full LLM response
+        max_prompts: Maximum number of image prompts
+
+    Returns:
+        Tuple of (explanation, image_prompts), before any fallback to default prompts
+    """
+    parser = LessonStreamParser(max_prompts)
+    parser.feed(text)
+    parser.finish()
+    return parser.explanation, parser.image_prompts
@@ -0,0 +1,241 @@
+from config.settings import Settings
+from typing import Dict, Any, AsyncGenerator, Optional, Tuple
+from collections import deque
+import asyncio
+import time
+import uuid
+
+
+class StreamGapError(Exception):
+    """Raised when a resumed stream asks for events that were already dropped from the ring buffer"""
+    pass
+
+
+class StreamMismatchError(Exception):
+    """Raised when a Last-Event-ID belongs to a stream started for a different request"""
+    pass
+
+
+class StreamSession:
+    """
+    A content stream that outlives the connection that started it.
+
+    A producer task drains the source stream into a bounded ring buffer of
+    sequence-numbered events (the first event has seq 1). Subscribers read from
+    any sequence number still in the buffer, so a client that reconnects with
+    the last seq it saw receives exactly the events it missed. When the last
+    subscriber leaves an unfinished stream, the producer keeps running for a
+    grace period and is cancelled only if nobody reconnects in time.
+    """
+
+    def __init__(self, stream_id: str, source: AsyncGenerator[Dict[str, Any], None], max_events: int,
+                 ttl: float, grace_period: float, request_key: Tuple = ()):
+        self.stream_id = stream_id
+        self.request_key = request_key
+        self._source = source
+        self._ttl = ttl
+        self._grace_period = grace_period
+
+        self._events: deque = deque(maxlen=max_events)
+        self._first_seq = 1  # Seq of the oldest buffered event
+        self._updated = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._grace_timer: Optional[asyncio.TimerHandle] = None
+        self.subscribers = 0
+
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.abandoned = False
+        self.expires_at: Optional[float] = None
+
+    @property
+    def last_seq(self) -> int:
+        return self._first_seq + len(self._events) - 1
+
+    def start(self):
+        """Start draining the source stream"""
+        self._task = asyncio.ensure_future(self._pump())
+
+    async def _pump(self):
+        try:
+            async for event in self._source:
+                if len(self._events) == self._events.maxlen:
+                    self._first_seq += 1
+                self._events.append(event)
+                self._notify()
+        except asyncio.CancelledError:
+            self.error = RuntimeError("Stream was cancelled after its client disconnected")
+            raise
+        except Exception as e:
+            self.error = e
+        finally:
+            await self._source.aclose()
+            self.done = True
+            self.expires_at = time.monotonic() + self._ttl
+            self._notify()
+
+    def _notify(self):
+        self._updated.set()
+        self._updated = asyncio.Event()
+
+    async def subscribe(self, after_seq: int = 0) -> AsyncGenerator[Tuple[int, Dict[str, Any]], None]:
+        """
+        Read the stream starting after a sequence number.
+
+        Args:
+            after_seq: Last sequence number the client received (0 for the whole stream)
+
+        Yields:
+            (seq, event) pairs, replayed from the buffer and then live
+
+        Raises:
+            StreamGapError: If events after after_seq are no longer buffered
+        """
+        self.subscribers += 1
+        if self._grace_timer is not None:
+            self._grace_timer.cancel()
+            self._grace_timer = None
+
+        try:
+            next_seq = after_seq + 1
+            while True:
+                if next_seq < self._first_seq:
+                    raise StreamGapError(f"Events after {after_seq} of stream {self.stream_id} are no longer available")
+                if next_seq <= self.last_seq:
+                    yield next_seq, self._events[next_seq - self._first_seq]
+                    next_seq += 1
+                    continue
+
+                if self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+
+                await self._updated.wait()
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done:
+                self._grace_timer = asyncio.get_running_loop().call_later(self._grace_period, self._abandon)
+
+    def _abandon(self):
+        """Cancel the producer because no client came back within the grace period"""
+        self._grace_timer = None
+        if self.subscribers == 0 and self._task is not None and not self._task.done():
+            self.abandoned = True
+            self._task.cancel()
+
+    def close(self):
+        if self._grace_timer is not None:
+            self._grace_timer.cancel()
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._events.clear()
+
+
+class StreamSessionRegistry:
+    """Keeps stream sessions addressable by id until they expire"""
+
+    def __init__(self, max_events: int, ttl: float, grace_period: float):
+        self.max_events = max_events
+        self.ttl = ttl
+        self.grace_period = grace_period
+        self._sessions: Dict[str, StreamSession] = {}
+
+        self.started = 0
+        self.resumed = 0
+        self.expired = 0
+
+    def create(self, source: AsyncGenerator[Dict[str, Any], None], request_key: Tuple = ()) -> StreamSession:
+        """
+        Start a new session draining source.
+
+        Args:
+            source: Stream chunks to buffer
+            request_key: Identifies the request the stream answers; only the same request may resume it
+
+        Returns:
+            The running session
+        """
+        self._purge()
+        session = StreamSession(uuid.uuid4().hex, source, self.max_events, self.ttl, self.grace_period, request_key)
+        self._sessions[session.stream_id] = session
+        session.start()
+        self.started += 1
+        return session
+
+    def resume(self, last_event_id: str, request_key: Tuple = ()) -> Tuple[Optional[StreamSession], int]:
+        """
+        Find the session a Last-Event-ID belongs to.
+
+        Args:
+            last_event_id: Event id in the form "<stream_id>:<seq>"
+            request_key: Key of the resuming request, compared with the one the stream was created for
+
+        Returns:
+            (session, seq) or (None, 0) if the session has expired
+
+        Raises:
+            ValueError: If the id is malformed
+            StreamMismatchError: If the stream was started for a different request
+        """
+        self._purge()
+        stream_id, _, seq = last_event_id.strip().partition(":")
+        if not stream_id or not seq.isdigit():
+            raise ValueError(f"Malformed Last-Event-ID: {last_event_id!r}")
+        session = self._sessions.get(stream_id)
+        if session is None:
+            return None, 0
+        if session.request_key != request_key:
+            raise StreamMismatchError(f"Stream {stream_id} belongs to a different request")
+        self.resumed += 1
+        return session, int(seq)
+
+    def _purge(self):
+        now = time.monotonic()
+        for stream_id, session in list(self._sessions.items()):
+            if session.expires_at is not None and session.expires_at < now and session.subscribers == 0:
+                session.close()
+                del self._sessions[stream_id]
+                self.expired += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return session counters"""
+        return {
+            "sessions": len(self._sessions),
+            "running": sum(1 for session in self._sessions.values() if not session.done),
+            "subscribers": sum(session.subscribers for session in self._sessions.values()),
+            "started": self.started,
+            "resumed": self.resumed,
+            "abandoned": sum(1 for session in self._sessions.values() if session.abandoned),
+            "expired": self.expired
+        }
+
+
+_registry: Optional[StreamSessionRegistry] = None
+
+
+def get_stream_session_registry(settings: Settings) -> Optional[StreamSessionRegistry]:
+    """
+    Get the process-wide stream session registry.
+
+    Args:
+        settings: Application settings providing buffer size, TTL and grace period
+
+    Returns:
+        The shared registry, or None when resumable streams are disabled
+    """
+    global _registry
+    if not settings.STREAM_RESUME_ENABLED:
+        return None
+    if _registry is None:
+        _registry = StreamSessionRegistry(
+            settings.STREAM_RESUME_MAX_EVENTS,
+            settings.STREAM_RESUME_TTL,
+            settings.STREAM_RESUME_GRACE_PERIOD
+        )
+    return _registry
+
+
+def get_stream_session_stats() -> Optional[Dict[str, Any]]:
+    """Return statistics for resumable streams, if they are in use"""
+    return _registry.get_stats() if _registry is not None else None
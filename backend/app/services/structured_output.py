@@ -0,0 +1,178 @@
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from typing import Dict, Any, List, Optional, Tuple, Type
+import json
+import re
+import time
+
+# Opening fence of output wrapped in a ```json ... ``` block. Only a leading fence is stripped, a
+# fence inside a string value is content; the closing fence is skipped with the text after the document
+_FENCE = re.compile(r"\s*```(?:json|JSON)?")
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+_schemas: Dict[Type[BaseModel], Dict[str, Any]] = {}
+
+
+def structured_response_format(name: str, model: Type[BaseModel], mode: str = "json_schema") -> Dict[str, Any]:
+    """
+    Build the OpenAI-compatible response_format asking for JSON that matches a model.
+
+    Args:
+        name: Schema name sent to the server
+        model: Pydantic model describing the expected JSON object
+        mode: "json_schema" to send the model's JSON schema, or "json_object" for
+            servers that only support plain JSON mode
+
+    Returns:
+        The response_format parameter
+    """
+    if mode == "json_object":
+        return {"type": "json_object"}
+    if model not in _schemas:
+        _schemas[model] = model.model_json_schema()
+    return {"type": "json_schema", "json_schema": {"name": name, "schema": _schemas[model]}}
+
+
+def repair_json(text: str) -> Optional[str]:
+    """
+    Recover a JSON document from fenced, wrapped or truncated LLM output.
+
+    Drops the opening markdown code fence if the output starts with one, skips prose
+    before the first bracket and after the document ends, drops trailing
+    commas, and closes a truncated document after its last complete object or
+    array (partially written objects are dropped). Runs in a single pass over
+    the text.
+
+    Args:
+        text: Raw LLM output
+
+    Returns:
+        The repaired JSON text, or None if it contains no JSON object or array
+    """
+    fence = _FENCE.match(text)
+    if fence:
+        text = text[fence.end():]
+
+    starts = [index for index in (text.find("{"), text.find("[")) if index != -1]
+    if not starts:
+        return None
+
+    out: List[str] = []
+    stack: List[str] = []
+    # (length of out, open brackets) after the last complete object or array, for closing truncated output
+    last_cut: Tuple[int, Tuple[str, ...]] = (0, ())
+    in_string = False
+    escaped = False
+
+    for char in text[min(starts):]:
+        if in_string:
+            out.append(char)
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+
+        if char == '"':
+            in_string = True
+        elif char in _CLOSERS:
+            stack.append(char)
+            out.append(char)
+            # An empty array or outer object is valid, an empty nested object would not be
+            if char == "[" or len(stack) == 1:
+                last_cut = (len(out), tuple(stack))
+            continue
+        elif char in "}]":
+            if not stack or _CLOSERS[stack[-1]] != char:
+                break
+            # Trailing comma before a closing bracket
+            if out and out[-1] == ",":
+                out.pop()
+            stack.pop()
+            out.append(char)
+            if not stack:
+                return "".join(out)
+            last_cut = (len(out), tuple(stack))
+            continue
+        elif char == "," and out and out[-1] in "}]":
+            last_cut = (len(out), tuple(stack))
+        if not char.isspace():
+            out.append(char)
+
+    # Truncated: keep everything up to the last complete element and close the open brackets
+    length, open_brackets = last_cut
+    if not open_brackets:
+        return None
+    return "".join(out[:length]) + "".join(_CLOSERS[bracket] for bracket in reversed(open_brackets))
+
+
+class StructuredOutputStats:
+    """Counts how structured LLM output was parsed, per kind of output"""
+
+    OUTCOMES = ("parsed", "repaired", "fallback")
+
+    def __init__(self):
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._parse_seconds: Dict[str, float] = {}
+
+    def record(self, kind: str, outcome: str, seconds: float):
+        counts = self._counts.setdefault(kind, dict.fromkeys(self.OUTCOMES, 0))
+        counts[outcome] += 1
+        self._parse_seconds[kind] = self._parse_seconds.get(kind, 0.0) + seconds
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {}
+        for kind, counts in self._counts.items():
+            total = sum(counts.values())
+            stats[kind] = dict(
+                counts,
+                fallback_rate=round(counts["fallback"] / total, 4),
+                avg_parse_ms=round(self._parse_seconds[kind] * 1000 / total, 3)
+            )
+        return stats
+
+
+_stats = StructuredOutputStats()
+
+
+def parse_structured(text: str, adapter: TypeAdapter, kind: str,
+                     defaults: Optional[Dict[str, Any]] = None) -> Optional[Any]:
+    """
+    Validate structured LLM output, repairing it if needed.
+
+    The output is validated in one pass with pydantic's JSON validator; only if
+    that fails is it repaired (see repair_json) and validated again.
+
+    Args:
+        text: Raw LLM output
+        adapter: Type adapter for the expected structure
+        kind: Output kind used in the statistics (e.g. "research")
+        defaults: Values for top-level fields lost when truncated output was repaired
+
+    Returns:
+        The validated value, or None if the caller should fall back to its text parser
+    """
+    started_at = time.perf_counter()
+    try:
+        result, outcome = adapter.validate_json(text), "parsed"
+    except ValidationError:
+        repaired = repair_json(text)
+        try:
+            if repaired is None:
+                result, outcome = None, "fallback"
+            else:
+                data = json.loads(repaired)
+                if defaults and isinstance(data, dict):
+                    data = dict(defaults, **data)
+                result, outcome = adapter.validate_python(data), "repaired"
+        except (ValueError, ValidationError):
+            result, outcome = None, "fallback"
+    _stats.record(kind, outcome, time.perf_counter() - started_at)
+    return result
+
+
+def get_structured_output_stats() -> Dict[str, Any]:
+    """Return parse outcome counters per output kind"""
+    return _stats.get_stats()
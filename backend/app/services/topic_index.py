@@ -0,0 +1,271 @@
+from config.settings import Settings
+from app.services.lesson_store import get_lesson_store
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+import re
+import zlib
+
+# Function words only: content words such as "work" or "process" can be what a lesson is about
+TOPIC_STOPWORDS = {
+    "a", "an", "the", "of", "and", "in", "on", "for", "to", "with", "about", "into", "its", "their",
+    "how", "what", "why", "does", "do", "is", "are"
+}
+
+_ROMAN_NUMERALS = {"i", "ii", "iii", "iv", "v", "vi", "vii", "viii", "ix", "x"}
+
+# Standalone negations ("non linear" after punctuation is removed) must match exactly
+_NEGATIONS = {"no", "non", "not", "anti"}
+
+# Prefixes that turn a word into its opposite ("organic" vs "inorganic")
+_NEGATING_PREFIXES = ("in", "im", "il", "ir", "un", "non", "dis", "anti")
+
+# Words that end in "s" without being plurals, or whose plural stays the same
+_INVARIANT_WORDS = {
+    "news", "species", "series", "means", "lens", "diabetes", "measles", "rabies", "physics", "mathematics",
+    "economics", "politics", "ethics", "genetics", "statistics", "linguistics", "electronics", "mechanics",
+    "dynamics", "thermodynamics", "optics", "acoustics", "robotics", "logistics", "graphics"
+}
+
+# Mersenne prime used for the MinHash permutations
+_PRIME = (1 << 61) - 1
+
+
+def _singular(word: str) -> str:
+    """Strip a plural ending ("acids" -> "acid", "bases" -> "base", "processes" -> "process")"""
+    if word in _INVARIANT_WORDS:
+        return word
+    # Short "-ies" words are rarely plurals of "-y" words ("lies", "ties", "pies")
+    if len(word) > 5 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("sses", "xes", "zzes", "ches", "shes")):
+        return word[:-2]
+    # After a, i, o, u or s the "s" usually belongs to the word ("atlas", "chaos", "virus", "analysis")
+    if len(word) > 3 and word.endswith("s") and word[-2] not in "aious":
+        return word[:-1]
+    return word
+
+
+def normalize_topic(topic: str) -> str:
+    """
+    Canonicalize a topic for cache lookups.
+
+    Lowercases, removes punctuation, collapses whitespace, drops function words
+    and strips plural endings, so "Photosynthesis", "photosynthesis " and
+    "the photosynthesis" all become "photosynthesis", and "Acids and Bases"
+    becomes "acid base".
+
+    Args:
+        topic: Topic as entered by the user
+
+    Returns:
+        The canonical topic
+    """
+    words = re.sub(r"[^\w\s]", " ", topic.lower().replace("'", "")).split()
+    meaningful = [word for word in words if word not in TOPIC_STOPWORDS]
+    # A topic made only of stopwords keeps its words rather than becoming empty
+    return " ".join(_singular(word) for word in (meaningful or words))
+
+
+def normalize_audience(audience: str) -> str:
+    """Map spellings like "High School" or "high_school" onto the audience level names"""
+    return "-".join(audience.strip().lower().replace("_", " ").split())
+
+
+def _distinguishing_tokens(canonical: str) -> Set[str]:
+    """Numbers, roman numerals and negations, which must match exactly ("world war i" vs "world war ii")"""
+    return {word for word in canonical.split() if word.isdigit() or word in _ROMAN_NUMERALS or word in _NEGATIONS}
+
+
+def _differ_by_prefix(canonical: str, other: str) -> bool:
+    """Whether a word of one topic is a negated word of the other ("organic" vs "inorganic")"""
+    words, other_words = set(canonical.split()), set(other.split())
+    for word in words ^ other_words:
+        for prefix in _NEGATING_PREFIXES:
+            if word.startswith(prefix) and word[len(prefix):] in (words | other_words):
+                return True
+    return False
+
+
+def _shingles(canonical: str) -> Set[str]:
+    padded = f" {canonical} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TopicIndex:
+    """
+    MinHash/LSH index of canonical topics, partitioned by audience level.
+
+    Topics are represented by their character trigrams. LSH banding over the
+    MinHash signatures narrows a lookup to a few candidates, which are then
+    verified with the exact trigram Jaccard similarity against the threshold.
+    Candidates whose numbers, roman numerals or negations differ, or where a
+    word is the negated form of the other's ("organic" vs "inorganic"), never
+    match, however similar their trigrams are.
+
+    The index holds at most max_topics topics; the least recently added or
+    matched topic is dropped first.
+    """
+
+    def __init__(self, threshold: float, num_perm: int = 64, bands: int = 16, max_topics: int = 10000):
+        """
+        Initialize the index.
+
+        Args:
+            threshold: Minimum Jaccard similarity for two topics to count as the same lesson
+            num_perm: Number of MinHash permutations
+            bands: Number of LSH bands (num_perm must be divisible by it)
+            max_topics: Maximum number of indexed topics across audience levels
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.max_topics = max_topics
+        self.bands = bands
+        self.rows = num_perm // bands
+        # Fixed coefficients keep signatures identical across processes
+        self._permutations = [
+            (zlib.crc32(f"a{i}".encode()) | 1, zlib.crc32(f"b{i}".encode())) for i in range(num_perm)
+        ]
+
+        # In recency order, with the LSH bands each topic is filed under
+        self._shingles: "OrderedDict[Tuple[str, str], Set[str]]" = OrderedDict()
+        self._topic_bands: Dict[Tuple[str, str], List[Tuple[int, Tuple[int, ...]]]] = {}
+        self._buckets: Dict[Tuple[str, int, Tuple[int, ...]], Set[str]] = {}
+
+        self.lookups = 0
+        self.evictions = 0
+        self.exact_hits = 0
+        self.near_hits = 0
+
+    def _signature(self, shingles: Iterable[str]) -> List[int]:
+        hashes = [zlib.crc32(shingle.encode("utf-8")) for shingle in shingles]
+        return [min((a * h + b) % _PRIME for h in hashes) for a, b in self._permutations]
+
+    def _bands(self, signature: List[int]) -> List[Tuple[int, Tuple[int, ...]]]:
+        return [(band, tuple(signature[band * self.rows:(band + 1) * self.rows])) for band in range(self.bands)]
+
+    def add(self, audience: str, canonical: str):
+        """
+        Index a topic that has a generated lesson.
+
+        Args:
+            audience: Normalized audience level
+            canonical: Canonical topic (see normalize_topic)
+        """
+        if not canonical:
+            return
+        if (audience, canonical) in self._shingles:
+            self._shingles.move_to_end((audience, canonical))
+            return
+        shingles = _shingles(canonical)
+        bands = self._bands(self._signature(shingles))
+        self._shingles[(audience, canonical)] = shingles
+        self._topic_bands[(audience, canonical)] = bands
+        for band, rows in bands:
+            self._buckets.setdefault((audience, band, rows), set()).add(canonical)
+
+        while len(self._shingles) > self.max_topics:
+            self.remove(*next(iter(self._shingles)))
+            self.evictions += 1
+
+    def remove(self, audience: str, canonical: str):
+        """
+        Drop a topic from the index.
+
+        Args:
+            audience: Normalized audience level
+            canonical: Canonical topic (see normalize_topic)
+        """
+        if self._shingles.pop((audience, canonical), None) is None:
+            return
+        for band, rows in self._topic_bands.pop((audience, canonical)):
+            bucket = self._buckets[(audience, band, rows)]
+            bucket.discard(canonical)
+            if not bucket:
+                del self._buckets[(audience, band, rows)]
+
+    def find(self, audience: str, canonical: str) -> Optional[str]:
+        """
+        Find the most similar indexed topic for an audience level.
+
+        Args:
+            audience: Normalized audience level
+            canonical: Canonical topic being requested
+
+        Returns:
+            The matching indexed topic if its similarity reaches the threshold, otherwise None
+        """
+        self.lookups += 1
+        if (audience, canonical) in self._shingles:
+            self._shingles.move_to_end((audience, canonical))
+            return canonical
+
+        shingles = _shingles(canonical)
+        candidates: Set[str] = set()
+        for band, rows in self._bands(self._signature(shingles)):
+            candidates |= self._buckets.get((audience, band, rows), set())
+
+        best, best_score = None, 0.0
+        for candidate in candidates:
+            if _distinguishing_tokens(candidate) != _distinguishing_tokens(canonical) or \
+                    _differ_by_prefix(candidate, canonical):
+                continue
+            other = self._shingles[(audience, candidate)]
+            score = len(shingles & other) / len(shingles | other)
+            if score > best_score:
+                best, best_score = candidate, score
+        if best_score < self.threshold:
+            return None
+        self._shingles.move_to_end((audience, best))
+        return best
+
+    def record_hit(self, exact: bool):
+        """Count a lookup that was served from an existing lesson"""
+        if exact:
+            self.exact_hits += 1
+        else:
+            self.near_hits += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return index size and hit counters"""
+        return {
+            "topics": len(self._shingles),
+            "max_topics": self.max_topics,
+            "evictions": self.evictions,
+            "threshold": self.threshold,
+            "lookups": self.lookups,
+            "exact_hits": self.exact_hits,
+            "near_duplicate_hits": self.near_hits
+        }
+
+
+_index: Optional[TopicIndex] = None
+
+
+def get_topic_index(settings: Settings) -> Optional[TopicIndex]:
+    """
+    Get the process-wide topic index.
+
+    Args:
+        settings: Application settings providing the similarity threshold
+
+    Returns:
+        The shared TopicIndex, or None when near-duplicate reuse is disabled
+    """
+    global _index
+    if not settings.TOPIC_SIMILARITY_ENABLED:
+        return None
+    if _index is None:
+        _index = TopicIndex(settings.TOPIC_SIMILARITY_THRESHOLD, max_topics=settings.TOPIC_INDEX_MAX_TOPICS)
+        # Make precomputed lessons reachable by similar topics right after startup
+        store = get_lesson_store(settings)
+        if store is not None:
+            for lesson in store.iter_lessons():
+                if lesson.get("topic") and lesson.get("audience"):
+                    _index.add(normalize_audience(lesson["audience"]), normalize_topic(lesson["topic"]))
+    return _index
+
+
+def get_topic_index_stats() -> Optional[Dict[str, Any]]:
+    """Return statistics for the topic index, if it is in use"""
+    return _index.get_stats() if _index is not None else None
@@ -0,0 +1,214 @@
+from config.settings import Settings
+from app.services.deep_research_service import DeepResearchService
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
+import time
+
+
+def normalize_level(academic_level: str) -> str:
+    """Map spellings like "High-School" or "high_school" onto one level name ("high school")"""
+    return " ".join(academic_level.strip().lower().replace("_", " ").replace("-", " ").split())
+
+
+class TrendingTopicsCache:
+    """
+    Stale-while-revalidate cache of trending topics per academic level.
+
+    Only a fixed set of levels is cached, so clients cannot make the process
+    refresh arbitrary query strings. Requests are answered from memory. A
+    background task refreshes every cached level once its entry is older than
+    the refresh interval; until the new topics arrive, the previous ones keep
+    being served, and a failed refresh leaves them in place. Levels nobody
+    asked for within the idle TTL are evicted instead of refreshed. Refreshes
+    are single-flighted per level, so concurrent requests for a level that is
+    not cached yet share one LLM call.
+    """
+
+    def __init__(self, service: DeepResearchService, levels: List[str], refresh_interval: float, idle_ttl: float,
+                 max_topics: int, max_levels: int, prewarm_levels: List[str]):
+        """
+        Initialize the cache.
+
+        Args:
+            service: Research service used to fetch topics
+            levels: Academic levels that may be cached
+            refresh_interval: Seconds after which a level's topics are refreshed
+            idle_ttl: Seconds without requests after which a level is evicted
+            max_topics: Topics fetched per level (requests get the first `limit` of them)
+            max_levels: Maximum number of academic levels kept
+            prewarm_levels: Levels fetched as soon as the refresher starts
+        """
+        self.service = service
+        self.levels = {normalize_level(level) for level in levels}
+        self.refresh_interval = refresh_interval
+        self.idle_ttl = idle_ttl
+        self.max_topics = max_topics
+        self.max_levels = max_levels
+        self.prewarm_levels = [level for level in map(normalize_level, prewarm_levels) if level in self.levels]
+
+        self._entries: Dict[str, Tuple[List[Dict[str, str]], float]] = {}  # level -> (topics, fetched at)
+        self._last_requested: Dict[str, float] = {}
+        self._refreshes: Dict[str, asyncio.Task] = {}
+        self._task: Optional[asyncio.Task] = None
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.evictions = 0
+
+    async def get(self, academic_level: str, limit: int) -> Optional[List[Dict[str, str]]]:
+        """
+        Get the cached topics for a level.
+
+        Args:
+            academic_level: Academic level filter
+            limit: Maximum number of topics to return
+
+        Returns:
+            The topics (fallback topics if the first fetch of a level failed), or None
+            if the level is not cacheable, in which case the caller should fetch directly
+
+        Raises:
+            Exception: The LLM error of a failed first fetch, when CIRCUIT_BREAKER_FALLBACK is "error"
+        """
+        level = normalize_level(academic_level)
+        if level not in self.levels:
+            return None
+        entry = self._entries.get(level)
+
+        if entry is None:
+            if len(self._entries) >= self.max_levels:
+                return None
+            self.misses += 1
+            self._last_requested[level] = time.monotonic()
+            # Shielded so a client that disconnects does not cancel the shared refresh
+            error = await asyncio.shield(self._refresh(level))
+            entry = self._entries.get(level)
+            if entry is None:
+                # Serve the fallback right away rather than letting the caller try the LLM a second time
+                return self.service.fallback_trending_topics(academic_level, limit, error)
+        elif time.monotonic() - entry[1] >= self.refresh_interval:
+            self.stale_hits += 1
+            self._refresh(level)
+        else:
+            self.hits += 1
+
+        self._last_requested[level] = time.monotonic()
+        return [dict(topic) for topic in entry[0][:limit]]
+
+    def _refresh(self, level: str) -> asyncio.Task:
+        """Start refreshing a level, or join the refresh already running for it"""
+        task = self._refreshes.get(level)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(level))
+            self._refreshes[level] = task
+        return task
+
+    async def _fetch(self, level: str) -> Optional[Exception]:
+        """Fetch a level's topics; returns the LLM error of a failed fetch"""
+        error = None
+        try:
+            # Bypass the LLM response cache, which would hand back the topics being refreshed
+            topics = await self.service.fetch_trending_topics(level, self.max_topics, use_cache=False)
+        except Exception as e:
+            topics, error = None, e
+            print(f"Error refreshing trending topics for {level}: {str(e)}")
+        finally:
+            self._refreshes.pop(level, None)
+        if not topics:
+            # Keep serving the previous topics; the next refresh tries again
+            self.refresh_errors += 1
+            return error
+        self._entries[level] = (topics, time.monotonic())
+        self.refreshes += 1
+        return None
+
+    def start(self):
+        """Start the background refresher"""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        """Stop the background refresher and any running refresh"""
+        tasks = list(self._refreshes.values())
+        if self._task is not None:
+            tasks.append(self._task)
+            self._task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self):
+        # Check a few times per interval so levels first requested between runs are not refreshed late
+        tick = min(max(self.refresh_interval / 4, 1.0), 60.0)
+        now = time.monotonic()
+        for level in self.prewarm_levels:
+            # Prewarmed levels are kept only if they are requested within the idle TTL
+            self._last_requested.setdefault(level, now)
+            self._refresh(level)
+        while True:
+            await asyncio.sleep(tick)
+            self.refresh_due()
+
+    def refresh_due(self):
+        """Evict idle levels and start refreshing the stale ones"""
+        now = time.monotonic()
+        for level in set(self._entries) | set(self._last_requested):
+            if now - self._last_requested.get(level, 0.0) >= self.idle_ttl:
+                if self._entries.pop(level, None) is not None:
+                    self.evictions += 1
+                self._last_requested.pop(level, None)
+            elif level not in self._entries or now - self._entries[level][1] >= self.refresh_interval:
+                # Stale, or a prewarm or first fetch that failed
+                self._refresh(level)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return cached levels and hit/refresh counters"""
+        now = time.monotonic()
+        return {
+            "levels": {level: round(now - fetched_at, 1) for level, (_, fetched_at) in self._entries.items()},
+            "refresh_interval": self.refresh_interval,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "evictions": self.evictions,
+            "refreshing": len(self._refreshes)
+        }
+
+
+_cache: Optional[TrendingTopicsCache] = None
+
+
+def get_trending_topics_cache(settings: Settings) -> Optional[TrendingTopicsCache]:
+    """
+    Get the process-wide trending topics cache.
+
+    Args:
+        settings: Application settings providing the levels and refresh schedule
+
+    Returns:
+        The shared TrendingTopicsCache, or None when it is disabled
+    """
+    global _cache
+    if not settings.TRENDING_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        _cache = TrendingTopicsCache(
+            DeepResearchService(settings),
+            levels=settings.TRENDING_CACHE_LEVELS,
+            refresh_interval=settings.TRENDING_CACHE_REFRESH_INTERVAL,
+            idle_ttl=settings.TRENDING_CACHE_IDLE_TTL,
+            max_topics=settings.TRENDING_CACHE_MAX_TOPICS,
+            max_levels=settings.TRENDING_CACHE_MAX_LEVELS,
+            prewarm_levels=settings.TRENDING_CACHE_PREWARM_LEVELS
+        )
+    return _cache
+
+
+def get_trending_cache_stats() -> Optional[Dict[str, Any]]:
+    """Return statistics for the trending topics cache, if it is in use"""
+    return _cache.get_stats() if _cache is not None else None
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Check the single-pass research parser against the previous regex parser and time both.
+
+DeepResearchService._parse_research_response used to run about eight DOTALL
+searches over the whole response, a lookahead-heavy finditer for the sections
+and five more searches per reference line. It now tokenizes the response line
+by line in one pass (app/services/research_stream_parser.py). This script keeps
+the previous implementation as `legacy_parse_research_response` and
+
+1. requires both parsers to agree exactly on responses in the canonical format
+   the research prompt asks for (data/research_corpus/canonical/*.txt),
+2. checks every intentional difference (SEMANTIC_CHANGES) on a minimal
+   response: the single-pass parser must give the new result and the legacy
+   parser must not,
+3. compares the single-pass parser with the expected parse of responses in the
+   markdown, bold and numbered-heading shapes models also return
+   (data/research_corpus/variants/*.txt, expected result in the .json next to each), and
+4. benchmarks both on synthetic documents of 10KB-500KB built from a canonical response.
+
+    python benchmark_research_parser.py
+    python benchmark_research_parser.py --corpus /path/to/corpus --sizes 10 100 500
+
+The single-pass parser only treats whole lines as headings; SEMANTIC_CHANGES
+lists where that changes the result.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from app.services.research_stream_parser import parse_research_document
+
+# Intentional differences from the legacy parser: (change, response, field, result of the single-pass parser)
+SEMANTIC_CHANGES = [
+    (
+        '"## Introduction", "## Key Concepts", ... are block headings, not extra sections',
+        "## Introduction\nIntro.\n\n## Basics\nBody.\n\n## Key Concepts\n- a\n",
+        "sections", [{"title": "Basics", "content": "Body."}]
+    ),
+    (
+        '"#", "SECTION n" or "References" in the middle of a line do not start a section or truncate the block',
+        "INTRODUCTION:\nIntro.\n\nSECTION 1: Cells\nSee SECTION 2 below; the # sign and the References list are cited.\n",
+        "sections", [{"title": "Cells", "content": "See SECTION 2 below; the # sign and the References list are cited."}]
+    ),
+    (
+        'Heading numbers ("2. SECTIONS:") do not end up in the preceding block',
+        "1. INTRODUCTION: Intro.\n\n2. SECTIONS:\n\nSECTION 1: A\nBody.\n",
+        "introduction", "Intro."
+    ),
+    (
+        'Markup around section headings ("**SECTION 1: Cells**") is not part of the title',
+        "INTRODUCTION:\nIntro.\n\n**SECTION 1: Cells**\nBody.\n",
+        "sections", [{"title": "Cells", "content": "Body."}]
+    ),
+    (
+        'Title-case headings ("Visualization Prompts:") end the previous block like upper-case ones',
+        "Key Concepts:\n- a\n\nVisualization Prompts:\n- b\n",
+        "key_concepts", ["a"]
+    ),
+    (
+        "The last section is kept even when its title line is the end of the document",
+        "INTRODUCTION:\nIntro.\n\nSECTION 1: A\nBody.\n\nSECTION 2: Outlook",
+        "sections", [{"title": "A", "content": "Body."}, {"title": "Outlook", "content": ""}]
+    ),
+    (
+        "Reference titles in curly quotes are recognized",
+        "REFERENCES:\nSmith, Jane. \u201cA Title\u201d (2020). Press.\n",
+        "references", [{"title": "A Title", "authors": ["Smith", "Jane"], "year": 2020, "doi": None, "url": None}]
+    ),
+    (
+        "Without an INTRODUCTION heading, the introduction is the first paragraph before any heading",
+        "# Photosynthesis\n\nPlants make sugar.\n\nSECTION 1: A\nBody.\n",
+        "introduction", ""
+    )
+]
+
+
+def legacy_parse_research_response(response: str, include_references: bool) -> Dict[str, Any]:
+    """The regex-based parser DeepResearchService used before the single-pass parser"""
+    research_content = {
+        "introduction": "",
+        "sections": [],
+        "references": [] if include_references else None,
+        "related_topics": [],
+        "key_concepts": [],
+        "visualization_prompts": []
+    }
+
+    intro_match = re.search(r"(?:INTRODUCTION:?|Introduction:?)(.*?)(?:SECTIONS|SECTION 1|Sections|Section 1|##)", response, re.DOTALL)
+    if intro_match:
+        research_content["introduction"] = intro_match.group(1).strip()
+    else:
+        paragraphs = response.split('\n\n')
+        if paragraphs:
+            research_content["introduction"] = paragraphs[0].strip()
+
+    section_matches = re.finditer(r"(?:SECTION \d+:?|Section \d+:?|##\s+|#\s+)(.*?)(?=(?:SECTION \d+:?|Section \d+:?|##\s+|#\s+|KEY_CONCEPTS|VISUALIZATION_PROMPTS|RELATED_TOPICS|REFERENCES|$))", response, re.DOTALL)
+    for match in section_matches:
+        section_text = match.group(0).strip()
+        title_match = re.match(r"(?:SECTION \d+:?|Section \d+:?|##\s+|#\s+)(.*?)(?:\n|\r\n)", section_text)
+        if title_match:
+            title = title_match.group(1).strip()
+            content = section_text[title_match.end():].strip()
+            research_content["sections"].append({"title": title, "content": content})
+
+    key_concepts_match = re.search(r"(?:KEY_CONCEPTS:?|Key Concepts:?)(.*?)(?:VISUALIZATION_PROMPTS|RELATED_TOPICS|REFERENCES|$)", response, re.DOTALL)
+    if key_concepts_match:
+        concepts_text = key_concepts_match.group(1).strip()
+        research_content["key_concepts"] = [item.strip().lstrip('- ') for item in concepts_text.split('\n') if item.strip() and item.strip().startswith('-')]
+
+    viz_match = re.search(r"(?:VISUALIZATION_PROMPTS:?|Visualization Prompts:?)(.*?)(?:RELATED_TOPICS|REFERENCES|$)", response, re.DOTALL)
+    if viz_match:
+        viz_text = viz_match.group(1).strip()
+        research_content["visualization_prompts"] = [item.strip().lstrip('- ') for item in viz_text.split('\n') if item.strip() and item.strip().startswith('-')]
+
+    related_match = re.search(r"(?:RELATED_TOPICS:?|Related Topics:?)(.*?)(?:REFERENCES|$)", response, re.DOTALL)
+    if related_match:
+        related_text = related_match.group(1).strip()
+        for line in related_text.split('\n'):
+            line = line.strip()
+            if line and (line.startswith('-') or line.startswith('*') or re.match(r'^\d+\.', line)):
+                parts = re.split(r'[:\-–]', line.lstrip('- *0123456789.'), 1)
+                if len(parts) > 1:
+                    research_content["related_topics"].append({"topic": parts[0].strip(), "relevance": parts[1].strip()})
+                else:
+                    research_content["related_topics"].append({"topic": parts[0].strip(), "relevance": "Related area of study"})
+
+    if include_references:
+        ref_match = re.search(r"(?:REFERENCES:?|References:?)(.*?)$", response, re.DOTALL)
+        if ref_match:
+            ref_text = ref_match.group(1).strip()
+            for ref in [line.strip() for line in ref_text.split('\n') if line.strip()]:
+                if not ref or ref.startswith('-') or len(ref) < 10:
+                    continue
+                author_match = re.search(r'^([^\.]+)', ref)
+                title_match = re.search(r'"([^"]+)"', ref) or re.search(r'"([^"]+)"', ref)
+                year_match = re.search(r'\((\d{4})\)', ref) or re.search(r',\s*(\d{4})\b', ref)
+                doi_match = re.search(r'(10\.\d{4,}(?:\.\d+)*\/\S+)', ref)
+                url_match = re.search(r'(https?://\S+)', ref)
+                research_content["references"].append({
+                    "title": title_match.group(1) if title_match else "Unknown title",
+                    "authors": [a.strip() for a in author_match.group(1).split(',') if a.strip()] if author_match else ["Unknown author"],
+                    "year": int(year_match.group(1)) if year_match else None,
+                    "doi": doi_match.group(1) if doi_match else None,
+                    "url": url_match.group(1) if url_match else None
+                })
+
+    return research_content
+
+
+def load_corpus(directory: str) -> List[Tuple[str, str]]:
+    """Read every .txt file in a directory as one response"""
+    corpus = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".txt"):
+            with open(os.path.join(directory, name), "r", encoding="utf-8") as f:
+                corpus.append((name, f.read()))
+    return corpus
+
+
+def load_expected(directory: str, name: str) -> Dict[str, Any]:
+    """Read the expected parse stored next to a variant response"""
+    with open(os.path.join(directory, name[:-len(".txt")] + ".json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def differing_fields(expected: Dict[str, Any], actual: Dict[str, Any]) -> List[str]:
+    return [field for field in expected if expected[field] != actual.get(field)]
+
+
+def synthesize(base: str, size: int) -> str:
+    """
+    Grow a response to about `size` characters by repeating its sections.
+
+    Args:
+        base: A response in the canonical format (INTRODUCTION:, SECTION n:, KEY_CONCEPTS: ...)
+        size: Target length in characters
+
+    Returns:
+        A response with renumbered sections and the original trailing blocks
+    """
+    head, rest = base.split("SECTION 1:", 1)
+    body, tail = rest.split("KEY_CONCEPTS:", 1)
+    sections = re.split(r"\nSECTION \d+:", "SECTION 1:" + body)
+    sections = [re.sub(r"^SECTION 1:", "", section).strip() for section in sections]
+
+    parts = [head]
+    length = len(head) + len(tail)
+    number = 0
+    while length < size:
+        section = f"SECTION {number + 1}: {sections[number % len(sections)]}\n\n"
+        parts.append(section)
+        length += len(section)
+        number += 1
+    parts.append("KEY_CONCEPTS:" + tail)
+    return "".join(parts)
+
+
+def best_time(parse: Callable[[str, bool], Dict[str, Any]], text: str, repeat: int) -> float:
+    """Fastest of `repeat` runs, in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        parse(text, True)
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings)
+
+
+def check_parity(corpus: List[Tuple[str, str]]) -> int:
+    """Print the parity of both parsers per canonical response and return the number of differences"""
+    failures = 0
+    print("Parity on canonical responses")
+    for name, text in corpus:
+        fields = differing_fields(legacy_parse_research_response(text, True), parse_research_document(text, True))
+        print(f"  {name}: {'identical' if not fields else 'DIFFERS in ' + ', '.join(fields)}")
+        failures += 1 if fields else 0
+    return failures
+
+
+def check_semantic_changes() -> int:
+    """Print whether each intentional difference holds and return the number that do not"""
+    failures = 0
+    print("\nIntentional differences")
+    for change, text, field, expected in SEMANTIC_CHANGES:
+        holds = parse_research_document(text, True)[field] == expected
+        is_change = legacy_parse_research_response(text, True)[field] != expected
+        if holds and is_change:
+            print(f"  ok: {change}")
+        else:
+            print(f"  FAILED: {change} ({'same as the legacy parser' if holds else 'unexpected ' + field})")
+            failures += 1
+    return failures
+
+
+def check_variants(directory: str, corpus: List[Tuple[str, str]]) -> int:
+    """Print whether each variant response parses as expected and return the number that do not"""
+    failures = 0
+    print("\nVariant responses")
+    for name, text in corpus:
+        fields = differing_fields(load_expected(directory, name), parse_research_document(text, True))
+        print(f"  {name}: {'as expected' if not fields else 'DIFFERS in ' + ', '.join(fields)}")
+        failures += 1 if fields else 0
+    return failures
+
+
+def run_benchmark(base: str, sizes_kb: List[int], repeat: int) -> int:
+    """Print timings of both parsers per document size and return the number of parity failures"""
+    failures = 0
+    print(f"\n{'size':>8} {'legacy ms':>12} {'single-pass ms':>16} {'speedup':>9}  parity")
+    for size_kb in sizes_kb:
+        text = synthesize(base, size_kb * 1024)
+        identical = legacy_parse_research_response(text, True) == parse_research_document(text, True)
+        failures += 0 if identical else 1
+        legacy_ms = best_time(legacy_parse_research_response, text, repeat)
+        single_pass_ms = best_time(parse_research_document, text, repeat)
+        print(f"{size_kb:>6}KB {legacy_ms:>12.2f} {single_pass_ms:>16.2f} {legacy_ms / single_pass_ms:>8.1f}x  "
+              f"{'identical' if identical else 'DIFFERS'}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare and benchmark the research response parsers")
+    parser.add_argument("--corpus", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "research_corpus"),
+                        help="Directory with canonical/ and variants/ responses (.txt)")
+    parser.add_argument("--base", default="quantum_computing.txt",
+                        help="Canonical response used to build the benchmark documents")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10, 50, 100, 250, 500], help="Document sizes in KB")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per parser and size (the fastest is reported)")
+    args = parser.parse_args()
+
+    canonical = load_corpus(os.path.join(args.corpus, "canonical"))
+    if not canonical:
+        parser.error(f"No .txt responses in {os.path.join(args.corpus, 'canonical')}")
+    variants_dir = os.path.join(args.corpus, "variants")
+    variants = load_corpus(variants_dir) if os.path.isdir(variants_dir) else []
+
+    failures = check_parity(canonical)
+    failures += check_semantic_changes()
+    failures += check_variants(variants_dir, variants)
+    base = dict(canonical).get(args.base)
+    if base is None:
+        parser.error(f"{args.base} is not a canonical response")
+    failures += run_benchmark(base, args.sizes, args.repeat)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -35,13 +35,105 @@ class Settings(BaseSettings):
     LLM_FREQUENCY_PENALTY: float = 0.1  # Add slight penalty to avoid repetitive text
     LLM_PRESENCE_PENALTY: float = 0.1  # Add slight penalty to encourage diverse topics
     LLM_STREAM: bool = False  # Set to True for streaming responses in async handlers
+    LLM_STREAM_FANOUT_ENABLED: bool = True  # Share one upstream stream between identical concurrent requests
+    LLM_STREAM_HUB_MAX_BUFFER_CHARS: int = 262144  # Replay buffer size per shared stream
+    LLM_STRUCTURED_OUTPUT: bool = False  # Request schema-conforming JSON (response_format) for research and trending topics
+    LLM_STRUCTURED_OUTPUT_FORMAT: str = "json_schema"  # "json_schema", or "json_object" for servers without schema support
+
+    # Optional list of OpenAI-compatible endpoints to load-balance across, as JSON:
+    # [{"base_url": "...", "api_key": "...", "model_id": "...", "weight": 1.0}]
+    # api_key and model_id default to LLM_API_KEY and LLM_MODEL_ID; empty means LLM_API_BASE_URL only.
+    # Endpoints should serve the same model: responses are cached per set of models, not per endpoint
+    LLM_ENDPOINTS: List[Dict[str, Any]] = []
+    LLM_LOAD_BALANCING_STRATEGY: str = "least_outstanding"  # "least_outstanding" or "latency_weighted"
+    LLM_ENDPOINT_FAILURE_THRESHOLD: int = 3  # Consecutive failures before an endpoint is ejected
+    LLM_ENDPOINT_EJECTION_TIME: float = 30.0  # Seconds, doubled for repeated ejections
+    LLM_ENDPOINT_MAX_EJECTION_TIME: float = 300.0
     
+    # LLM HTTP connection pool settings (one pool shared by all services)
+    LLM_HTTP_MAX_CONNECTIONS: int = 100
+    LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_HTTP_KEEPALIVE_EXPIRY: float = 30.0  # Seconds an idle connection is kept open
+    LLM_HTTP2: bool = True  # Requires the h2 package, falls back to HTTP/1.1 otherwise
+    LLM_HTTP_TIMEOUT: float = 120.0  # Read/write timeout in seconds
+    LLM_HTTP_CONNECT_TIMEOUT: float = 10.0
+
+    # Adaptive (AIMD) concurrency limit for upstream chat completions
+    LLM_CONCURRENCY_INITIAL_LIMIT: int = 8
+    LLM_CONCURRENCY_MIN_LIMIT: int = 1
+    LLM_CONCURRENCY_MAX_LIMIT: int = 64
+    LLM_CONCURRENCY_BACKOFF_RATIO: float = 0.5  # Limit multiplier on 429s/timeouts
+    LLM_CONCURRENCY_MAX_WAIT: float = 30.0  # Seconds a request may queue for a slot
+    LLM_CONCURRENCY_LATENCY_TARGET: float = 60.0  # Completions faster than this grow the limit
+    LLM_CONCURRENCY_TTFT_TARGET: float = 5.0  # Same for time-to-first-token of streams
+
+    # Retries (jittered exponential backoff) and hedged requests for LLM calls
+    LLM_MAX_RETRIES: int = 2
+    LLM_RETRY_BASE_DELAY: float = 0.5  # Seconds, doubled per attempt
+    LLM_RETRY_MAX_DELAY: float = 8.0
+    LLM_HEDGE_ENABLED: bool = False  # Fire a second call when the first is slower than the rolling percentile
+    LLM_HEDGE_PERCENTILE: float = 0.95
+    LLM_HEDGE_MIN_SAMPLES: int = 20  # Latency samples required before hedging starts
+    LLM_HEDGE_WINDOW_SIZE: int = 200
+    LLM_HEDGE_BUDGET_RATIO: float = 0.1  # Hedges are capped at about this fraction of calls
+
     # System message for the model
     LLM_SYSTEM_MESSAGE: str = """You are an expert educational AI assistant designed to create high-quality, 
     detailed, and thoughtful educational content. Your explanations should be comprehensive, accurate, 
     and demonstrate deep reasoning appropriate for the target audience level. Include real-world examples, 
     historical context when relevant, and connections to related concepts."""
     
+    # Circuit breakers and per-call timeouts for upstream APIs
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = 5  # Consecutive failures that open a circuit
+    CIRCUIT_BREAKER_RECOVERY_TIME: float = 30.0  # Seconds before a half-open probe is allowed
+    CIRCUIT_BREAKER_HALF_OPEN_MAX_CALLS: int = 1
+    CIRCUIT_BREAKER_FALLBACK: str = "cache_or_mock"  # "cache_or_mock", "mock" or "error"
+    LLM_CALL_TIMEOUT: float = 120.0
+    LLM_FIRST_TOKEN_TIMEOUT: float = 60.0  # Streams failing to produce a first chunk in time count as failed calls
+    GEMINI_CALL_TIMEOUT: float = 60.0
+    NVIDIA_IMAGE_CALL_TIMEOUT: float = 60.0
+    
+    # Images generated inside lesson streams (include_images=true)
+    STREAM_IMAGE_MAX_CONCURRENCY: int = 3  # Concurrent Gemini calls per stream
+    BUNDLE_IMAGE_MAX_CONCURRENCY: int = 3  # Concurrent Gemini calls per /api/content/bundle request
+    BATCH_MAX_CONCURRENCY: int = 4  # Concurrent lessons per /api/content/generate/batch request
+    BATCH_MAX_ITEMS: int = 500  # Largest accepted batch
+    
+    # SSE coalescing: pending stream text is sent every SSE_FLUSH_MS or SSE_FLUSH_BYTES, whichever comes first
+    SSE_FLUSH_MS: int = 50
+    SSE_FLUSH_BYTES: int = 2048
+    
+    # Resumable streams: reconnecting with Last-Event-ID replays missed events without a new LLM call
+    STREAM_RESUME_ENABLED: bool = True
+    STREAM_RESUME_MAX_EVENTS: int = 4096  # Ring buffer size per stream (events, after coalescing)
+    STREAM_RESUME_TTL: float = 300.0  # Seconds a finished stream stays resumable
+    STREAM_RESUME_GRACE_PERIOD: float = 30.0  # Seconds an unfinished stream keeps generating without clients
+    
+    # Deep research: "single" asks for the whole document in one completion, "parallel" generates
+    # a short outline and then every section concurrently with its own token budget
+    RESEARCH_MODE: str = "single"
+    RESEARCH_OUTLINE_MAX_TOKENS: int = 1024
+    RESEARCH_SECTION_MAX_TOKENS: int = 1536
+    RESEARCH_SECTION_MAX_CONCURRENCY: int = 6  # Concurrent section calls per request
+    RESEARCH_MAX_SECTIONS: int = 6  # Sections taken from the outline when no subtopics are given
+    RESEARCH_SECTION_CACHE_ENABLED: bool = True  # Cache sections per subtopic; requests with subtopics are then generated section-wise unless they ask for "single"
+    
+    # Background research jobs (/api/deep-research/jobs)
+    RESEARCH_JOBS_ENABLED: bool = True
+    RESEARCH_JOBS_WORKERS: int = 2  # Jobs generated at the same time
+    RESEARCH_JOBS_MAX_QUEUED: int = 100  # Jobs waiting for a worker before submissions are rejected
+    RESEARCH_JOBS_TTL: float = 3600.0  # Seconds a finished job and its result are kept
+    RESEARCH_JOBS_MAX_WAIT: float = 30.0  # Longest long-poll wait on GET /jobs/{id}
+    
+    # Trending topics are served from memory and refreshed in the background
+    TRENDING_CACHE_ENABLED: bool = True
+    TRENDING_CACHE_LEVELS: List[str] = ["elementary", "middle school", "high school", "college", "undergraduate", "graduate"]  # Others are fetched per request
+    TRENDING_CACHE_REFRESH_INTERVAL: float = 3600.0  # Seconds before a level's topics are refreshed (stale ones are served meanwhile)
+    TRENDING_CACHE_IDLE_TTL: float = 86400.0  # Levels not requested for this long are evicted instead of refreshed
+    TRENDING_CACHE_MAX_TOPICS: int = 20  # Topics fetched per level, requests get the first `limit`
+    TRENDING_CACHE_MAX_LEVELS: int = 8  # Academic levels kept at the same time
+    TRENDING_CACHE_PREWARM_LEVELS: List[str] = ["college", "high school", "undergraduate", "graduate"]  # Fetched on startup
+    
     # Text-to-image model settings
     IMAGE_MODEL_ID: str = "stable-diffusion-xl"
     IMAGE_SIZE: str = "1024x1024"
@@ -50,7 +142,18 @@ class Settings(BaseSettings):
     STATIC_DIR: str = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static")
     
     # Cache settings
-    CONTENT_CACHE_TTL: int = 3600  # Cache TTL in seconds (1 hour)
+    CONTENT_CACHE_TTL: int = 3600  # Cache TTL in seconds (1 hour), 0 disables caching
+    CONTENT_CACHE_MAX_ENTRIES: int = 1024  # Per cache, least recently used entries are evicted first
+    CACHE_BYPASS_HEADER: str = "X-Cache-Bypass"  # Request header that skips cache lookups
+    LESSON_DERIVATION_ENABLED: bool = False  # Rewrite a cached lesson of another audience level instead of generating from scratch
+    LESSON_DERIVATION_MAX_TOKENS: int = 2048  # Completion budget for the rewrite call
+    TOPIC_SIMILARITY_ENABLED: bool = True  # Reuse lessons of near-identical topics for the same audience
+    # Candidates found by the MinHash/LSH index are reused from this trigram Jaccard similarity. Only function words
+    # are ignored, so broader or narrower topics ("the photosynthesis process" vs "photosynthesis") are intentionally
+    # separate lessons
+    TOPIC_SIMILARITY_THRESHOLD: float = 0.85
+    TOPIC_INDEX_MAX_TOPICS: int = 10000  # Topics kept in the similarity index, least recently used are dropped first
+    LESSON_STORE_DIR: str = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "lessons")  # Precomputed lessons, empty disables
     
     # Mock mode for development
     USE_MOCK_DATA: bool = False  # Set to False to use the real API instead of mock data
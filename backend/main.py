@@ -1,15 +1,41 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from contextlib import asynccontextmanager
 from pathlib import Path
 import os
-from app.routers import content, images, deep_research
+from app.routers import content, images, deep_research, metrics
+from app.nvidia_api.client_registry import get_llm_client_registry, shutdown_llm_client_registry
+from app.services.trending_cache import get_trending_topics_cache
+from app.services.research_jobs import get_research_job_manager
+from config.settings import get_settings
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared resources on startup and release them on shutdown"""
+    # Pooled LLM clients shared by all services for the lifetime of the app
+    get_llm_client_registry(get_settings())
+    # Trending topics are refreshed in the background and served from memory
+    trending_cache = get_trending_topics_cache(get_settings())
+    if trending_cache is not None:
+        trending_cache.start()
+    # Worker pool for background research jobs
+    research_jobs = get_research_job_manager(get_settings())
+    if research_jobs is not None:
+        research_jobs.start()
+    yield
+    if research_jobs is not None:
+        await research_jobs.stop()
+    if trending_cache is not None:
+        await trending_cache.stop()
+    await shutdown_llm_client_registry()
 
 # Initialize FastAPI app
 app = FastAPI(
     title="ShoppingAI API",
     description="Backend API for ShoppingAI: AI-Powered Shopping Assistant",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -27,6 +53,7 @@ app.add_middleware(
 app.include_router(content.router, prefix="/api/content", tags=["content"])
 app.include_router(images.router, prefix="/api/images", tags=["images"])
 app.include_router(deep_research.router, prefix="/api/deep-research", tags=["deep-research"])
+app.include_router(metrics.router, prefix="/api/metrics", tags=["metrics"])
 
 # Set up static files directory
 static_directory = Path(__file__).parent / "static"
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Offline OpenAI-compatible mock LLM server for load testing.
+
+Serves /v1/chat/completions (streaming and non-streaming) with canned responses
+in the formats the backend parsers expect (IMAGE_PROMPTS lessons,
+INTRODUCTION/SECTIONS research documents and JSON trending topic lists, or JSON
+objects when the request sets response_format), with configurable
+time-to-first-token, token rate and error rates. Point the backend
+at it to exercise the real LLMClient/ContentService/DeepResearchService path
+without spending tokens:
+
+    python mock_llm_server.py --port 8001 --ttft-ms 400 --tokens-per-sec 60
+    LLM_API_BASE_URL=http://localhost:8001/v1 USE_MOCK_DATA=False uvicorn main:app
+
+Every option can also be set through a MOCK_LLM_* environment variable.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+class MockLLMConfig:
+    """Behaviour of the mock server, read from MOCK_LLM_* environment variables"""
+
+    def __init__(self):
+        self.ttft_ms = float(os.getenv("MOCK_LLM_TTFT_MS", "300"))
+        self.tokens_per_sec = float(os.getenv("MOCK_LLM_TOKENS_PER_SEC", "50"))
+        self.error_rate = float(os.getenv("MOCK_LLM_ERROR_RATE", "0"))
+        self.rate_limit_rate = float(os.getenv("MOCK_LLM_RATE_LIMIT_RATE", "0"))
+        self.corpus_dir = os.getenv("MOCK_LLM_CORPUS_DIR", "")
+        seed = os.getenv("MOCK_LLM_SEED")
+        self.random = random.Random(int(seed) if seed else None)
+
+
+LESSON_TEMPLATE = """# Understanding {title}
+
+## Introduction
+Why does {topic} matter? This lesson for {audience} students explores {topic} step by step, starting from everyday observations and building up to the core ideas that scientists and scholars use today.
+
+## Background
+People have studied {topic} for a long time. Early observations were often simple descriptions, but careful experiments and new tools gradually revealed the mechanisms behind it. Understanding this history helps us see how knowledge is built and revised.
+
+## Core Concepts
+- **Definition:** {title} can be described as a set of related processes and ideas that explain how something works.
+- **Key components:** Each part of {topic} plays a specific role, and the parts interact with one another.
+- **Cause and effect:** Changes in one component lead to predictable changes elsewhere.
+- **Measurement:** We can observe and measure {topic} to test our explanations.
+
+## Deeper Analysis
+Looking more closely, {topic} connects to many other areas of study. The same principles appear in different contexts, which is why learning them carefully pays off. Experts often compare competing explanations and use evidence to decide which one fits best.
+
+## Real-World Examples
+1. A common everyday situation where {topic} can be observed directly.
+2. A technology or industry that depends on understanding {topic}.
+3. A current research question related to {topic}.
+
+## Questions to Think About
+- How would you explain {topic} to someone younger than you?
+- What might happen if one of the key components of {topic} changed?
+- Where else do you think similar ideas might apply?
+
+IMAGE_PROMPTS
+- A clearly labeled diagram showing the main components of {topic} and how they interact, suitable for {audience} students
+- A step-by-step illustrated flowchart of the process behind {topic} with arrows and short captions
+- A real-world scene that shows {topic} in action, with callouts highlighting the key concepts
+"""
+
+RESEARCH_TEMPLATE = """INTRODUCTION:
+{title} is an active area of study with implications across several disciplines. This document surveys its foundations, current developments and open questions at the {audience} level, drawing connections to related fields and highlighting areas for further investigation.
+
+SECTION 1: Theoretical Foundations
+The theoretical foundations of {topic} rest on a small number of core principles. Over time, these principles were formalized into models that make testable predictions. This section reviews those models and discusses their assumptions and limitations.
+
+SECTION 2: Current Developments
+Recent work on {topic} has expanded both its methods and its applications. New experimental techniques and computational tools have made it possible to study questions that were previously out of reach.
+
+SECTION 3: Applications and Implications
+{title} informs practice in industry, policy and education. Its applications raise practical and ethical considerations that researchers continue to debate.
+
+KEY_CONCEPTS:
+- Core principles of {topic}
+- Models and their assumptions
+- Experimental and computational methods
+- Applications and ethical considerations
+
+VISUALIZATION_PROMPTS:
+- Concept map linking the core principles of {topic} with labeled relationships
+- Timeline of major developments in {topic}
+- Comparison chart of competing models of {topic}
+
+RELATED_TOPICS:
+- Philosophy of science: How evidence and models are evaluated in {topic}
+- Data analysis methods: Tools used to study {topic} quantitatively
+- Science policy: How findings about {topic} shape decisions
+
+REFERENCES:
+Smith, J., Johnson, A. "Foundations of {title}" (2021). Academic Press. doi:10.1000/mock.2021.001
+Williams, M. "Recent Advances in {title}: A Review" (2023). Journal of Advanced Studies. https://example.com/mock/2023
+"""
+
+TRENDING_TOPICS = [
+    ("Quantum Machine Learning", "The intersection of quantum computing and machine learning."),
+    ("CRISPR Gene Editing Ethics", "Ethical questions raised by accessible gene editing tools."),
+    ("Climate Adaptation Strategies", "Approaches for adapting infrastructure and communities to climate change."),
+    ("Neuromorphic Computing", "Hardware that mimics the structure of biological neural networks."),
+    ("Algorithmic Fairness", "Methods for detecting and reducing bias in automated decisions."),
+    ("Synthetic Biology", "Engineering biological systems for new purposes."),
+    ("Circular Economy Models", "Economic systems designed to eliminate waste."),
+    ("Extended Reality in Education", "Using VR and AR to support learning."),
+    ("Zero-Knowledge Proofs", "Proving statements without revealing the underlying data."),
+    ("Sustainable Urban Planning", "Designing cities that meet environmental and social goals."),
+]
+
+GENERIC_TEMPLATE = """This is a response from the offline mock LLM server. It echoes the start of your prompt so that the request and response can be matched in logs: "{excerpt}"
+"""
+
+
+def extract_fields(prompt: str) -> Dict[str, str]:
+    """Pull the topic and audience out of the backend's prompt templates"""
+    topic_match = re.search(r'(?:lesson on|document on|research on|on) "([^"]+)"', prompt)
+    audience_match = re.search(r"targeted at (.+?) students|suitable for (.+?) level", prompt)
+    topic = topic_match.group(1) if topic_match else "the requested topic"
+    audience = "general"
+    if audience_match:
+        audience = (audience_match.group(1) or audience_match.group(2)).split(",")[0].strip()
+    return {"topic": topic, "title": topic.title(), "audience": audience}
+
+
+def classify_prompt(prompt: str) -> str:
+    """Decide which canned response format a prompt expects"""
+    if "IMAGE_PROMPTS" in prompt:
+        return "lesson"
+    if "JSON array" in prompt:
+        return "trending"
+    if "INTRODUCTION" in prompt or "RELATED_TOPICS" in prompt:
+        return "research"
+    return "generic"
+
+
+def load_corpus(corpus_dir: str) -> Dict[str, List[str]]:
+    """
+    Load custom response templates from a directory.
+
+    Files are grouped by name prefix (lesson*, research*, trending*, generic*) and
+    may use {topic}, {title} and {audience} placeholders.
+    """
+    corpus: Dict[str, List[str]] = {}
+    if not corpus_dir:
+        return corpus
+    for path in sorted(Path(corpus_dir).glob("*")):
+        if not path.is_file():
+            continue
+        for kind in ("lesson", "research", "trending", "generic"):
+            if path.name.startswith(kind):
+                corpus.setdefault(kind, []).append(path.read_text(encoding="utf-8"))
+    return corpus
+
+
+def research_as_json(document: str) -> Dict[str, Any]:
+    """Convert a research response in the INTRODUCTION/SECTION n/... text format to the structured shape"""
+    blocks = re.split(r"^(INTRODUCTION|SECTION \d+|KEY_CONCEPTS|VISUALIZATION_PROMPTS|RELATED_TOPICS|REFERENCES):",
+                      document, flags=re.MULTILINE)
+    research: Dict[str, Any] = {"introduction": "", "sections": [], "key_concepts": [], "visualization_prompts": [],
+                                "related_topics": [], "references": []}
+    for heading, body in zip(blocks[1::2], blocks[2::2]):
+        body = body.strip()
+        items = [line.strip()[2:] for line in body.splitlines() if line.strip().startswith("- ")]
+        if heading == "INTRODUCTION":
+            research["introduction"] = body
+        elif heading.startswith("SECTION"):
+            title, _, content = body.partition("\n")
+            research["sections"].append({"title": title.strip(), "content": content.strip()})
+        elif heading in ("KEY_CONCEPTS", "VISUALIZATION_PROMPTS"):
+            research[heading.lower()] = items
+        elif heading == "RELATED_TOPICS":
+            for item in items:
+                name, _, relevance = item.partition(":")
+                research["related_topics"].append({"topic": name.strip(), "relevance": relevance.strip()})
+        else:
+            for line in body.splitlines():
+                title = re.search(r'"([^"]+)"', line)
+                year = re.search(r"\((\d{4})\)", line)
+                research["references"].append({
+                    "title": title.group(1) if title else line.strip(),
+                    "authors": [author.strip() for author in line.split('"')[0].rstrip(". ").split(".,")],
+                    "year": int(year.group(1)) if year else None,
+                    "doi": (re.search(r"(10\.\d{4,}\S+)", line) or [None, None])[1],
+                    "url": (re.search(r"(https?://\S+)", line) or [None, None])[1]
+                })
+    return research
+
+
+def render_template(kind: str, prompt: str, config: MockLLMConfig, corpus: Dict[str, List[str]]) -> str:
+    """Render the canned text response of a kind"""
+    fields = extract_fields(prompt)
+
+    if corpus.get(kind):
+        template = config.random.choice(corpus[kind])
+        # Only substitute known placeholders so JSON braces in templates survive
+        for name, value in fields.items():
+            template = template.replace("{" + name + "}", value)
+        return template
+
+    if kind == "lesson":
+        return LESSON_TEMPLATE.format(**fields)
+    if kind == "research":
+        return RESEARCH_TEMPLATE.format(**fields)
+    if kind == "trending":
+        limit_match = re.search(r"list of (\d+)", prompt)
+        limit = int(limit_match.group(1)) if limit_match else 10
+        topics = [
+            {"topic": name, "description": description, "relevance": f"Growing interest at the {fields['audience']} level."}
+            for name, description in TRENDING_TOPICS[:limit]
+        ]
+        return json.dumps(topics, indent=2)
+    return GENERIC_TEMPLATE.format(excerpt=" ".join(prompt.split())[:200])
+
+
+def render_response(prompt: str, config: MockLLMConfig, corpus: Dict[str, List[str]],
+                    response_format: Optional[Dict[str, Any]] = None) -> str:
+    """Render the canned response for a prompt, as a JSON object when a response_format is requested"""
+    kind = classify_prompt(prompt)
+    if not response_format or response_format.get("type") not in ("json_schema", "json_object"):
+        return render_template(kind, prompt, config, corpus)
+
+    schema_name = (response_format.get("json_schema") or {}).get("name", "")
+    if "trending" in schema_name or "trending" in prompt:
+        # JSON schemas need an object at the top level, so the list is wrapped
+        return json.dumps({"topics": json.loads(render_template("trending", prompt, config, corpus))}, indent=2)
+    return json.dumps(research_as_json(render_template("research", prompt, config, corpus)), indent=2)
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into word-sized pseudo tokens, keeping whitespace attached"""
+    return re.findall(r"\s*\S+|\s+", text)
+
+
+def truncate(tokens: List[str], max_tokens: Optional[int]) -> Tuple[List[str], str]:
+    if max_tokens and len(tokens) > max_tokens:
+        return tokens[:max_tokens], "length"
+    return tokens, "stop"
+
+
+def create_app(config: Optional[MockLLMConfig] = None) -> FastAPI:
+    """Create the mock server application"""
+    config = config or MockLLMConfig()
+    corpus = load_corpus(config.corpus_dir)
+    app = FastAPI(title="Mock LLM Server", description="Offline OpenAI-compatible stand-in for load testing")
+
+    def injected_error() -> Optional[JSONResponse]:
+        roll = config.random.random()
+        if roll < config.rate_limit_rate:
+            return JSONResponse(status_code=429, content={"error": {"message": "Mock rate limit", "type": "rate_limit_error"}})
+        if roll < config.rate_limit_rate + config.error_rate:
+            return JSONResponse(status_code=500, content={"error": {"message": "Mock upstream failure", "type": "server_error"}})
+        return None
+
+    @app.get("/v1/models")
+    async def list_models():
+        return {"object": "list", "data": [{"id": "mock-llm", "object": "model", "owned_by": "mock"}]}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        error = injected_error()
+        if error is not None:
+            return error
+
+        messages = body.get("messages", [])
+        prompt = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+        model = body.get("model", "mock-llm")
+        text = render_response(prompt, config, corpus, body.get("response_format"))
+        tokens, finish_reason = truncate(tokenize(text), body.get("max_tokens"))
+        prompt_tokens = sum(len(tokenize(m.get("content", ""))) for m in messages)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+
+        if not body.get("stream"):
+            await asyncio.sleep(config.ttft_ms / 1000 + len(tokens) / max(config.tokens_per_sec, 1e-6))
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(tokens)},
+                    "finish_reason": finish_reason
+                }],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": len(tokens),
+                    "total_tokens": prompt_tokens + len(tokens)
+                }
+            }
+
+        def chunk(delta: Dict[str, Any], reason: Optional[str] = None) -> str:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": reason}]
+            }
+            return f"data: {json.dumps(payload)}\n\n"
+
+        async def event_stream():
+            await asyncio.sleep(config.ttft_ms / 1000)
+            yield chunk({"role": "assistant", "content": ""})
+            # Pace against a fixed schedule so per-token sleep overhead does not accumulate
+            started_at = time.monotonic()
+            for index, token in enumerate(tokens):
+                delay = started_at + index / max(config.tokens_per_sec, 1e-6) - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                yield chunk({"content": token})
+            yield chunk({}, finish_reason)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+    return app
+
+
+app = create_app()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run the offline mock LLM server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--ttft-ms", type=float, help="Time to first token in milliseconds")
+    parser.add_argument("--tokens-per-sec", type=float, help="Generation speed")
+    parser.add_argument("--error-rate", type=float, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument("--rate-limit-rate", type=float, help="Fraction of requests answered with HTTP 429")
+    parser.add_argument("--corpus-dir", help="Directory of custom response templates")
+    parser.add_argument("--seed", type=int, help="Random seed for reproducible error injection")
+    args = parser.parse_args()
+
+    overrides = {
+        "MOCK_LLM_TTFT_MS": args.ttft_ms,
+        "MOCK_LLM_TOKENS_PER_SEC": args.tokens_per_sec,
+        "MOCK_LLM_ERROR_RATE": args.error_rate,
+        "MOCK_LLM_RATE_LIMIT_RATE": args.rate_limit_rate,
+        "MOCK_LLM_CORPUS_DIR": args.corpus_dir,
+        "MOCK_LLM_SEED": args.seed,
+    }
+    for name, value in overrides.items():
+        if value is not None:
+            os.environ[name] = str(value)
+
+    uvicorn.run(create_app(), host=args.host, port=args.port)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Precompute lessons for a topic catalog across all audience levels.
+
+Generates the lesson text, image prompts and (optionally) images for every
+topic x level and writes them to the lesson store (LESSON_STORE_DIR), from
+which ContentService serves them without calling the LLM. Lessons already in
+the store are skipped, so an interrupted run can simply be started again. With
+--images, each stored image records whether it succeeded; lessons with failed
+images are picked up again and only those images are regenerated.
+
+    python precompute_lessons.py data/topic_catalog.txt --rate 20 --concurrency 2
+    python precompute_lessons.py data/topic_catalog.txt --levels elementary high-school --images
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from app.services.bundle_service import BundleService
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.content_service import ContentService, AUDIENCE_LEVELS
+from config.settings import Settings
+
+
+def load_catalog(path: str) -> List[str]:
+    """
+    Read a topic catalog.
+
+    Args:
+        path: A JSON list of topics, or a text file with one topic per line ('#' starts a comment)
+
+    Returns:
+        The topics in catalog order, without duplicates
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        raw = f.read()
+
+    if path.endswith(".json"):
+        topics = json.loads(raw)
+    else:
+        topics = [line.split("#", 1)[0].strip() for line in raw.splitlines()]
+
+    return list(dict.fromkeys(topic for topic in topics if topic))
+
+
+def is_complete(lesson: Optional[Dict[str, Any]], with_images: bool) -> bool:
+    """Whether a stored lesson needs no more work: it exists and, with images, all of them succeeded"""
+    if lesson is None:
+        return False
+    if not with_images:
+        return True
+    images = lesson.get("images") or []
+    return len(images) == len(lesson["image_prompts"]) and all(image.get("success") for image in images)
+
+
+class RateLimiter:
+    """Spaces out call starts so that at most `per_minute` calls begin per minute"""
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            delay = self._next_start - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_start = max(self._next_start, time.monotonic()) + self.interval
+
+
+async def precompute(settings: Settings, jobs: List[Tuple[str, str]], rate: float, concurrency: int,
+                     with_images: bool, force: bool):
+    """
+    Generate and store every (topic, level) lesson that is not stored yet.
+
+    Args:
+        settings: Application settings
+        jobs: (topic, level) pairs to precompute
+        rate: Maximum lessons started per minute
+        concurrency: Maximum lessons generated at the same time
+        with_images: Also generate and store the lesson images
+        force: Regenerate lessons that are already stored
+    """
+    content_service = ContentService(settings)
+    bundle_service = BundleService(settings)
+    limiter = RateLimiter(rate)
+    queue: asyncio.Queue = asyncio.Queue()
+    counts = {"generated": 0, "skipped": 0, "failed": 0, "partial": 0}
+
+    for topic, level in jobs:
+        if not force and is_complete(await content_service.get_stored_lesson(topic, level), with_images):
+            counts["skipped"] += 1
+        else:
+            queue.put_nowait((topic, level))
+
+    total = queue.qsize()
+    print(f"Precomputing {total} lessons ({counts['skipped']} already stored)")
+
+    async def generate(topic: str, level: str) -> bool:
+        # Without --force, cached lessons of other levels may seed derived lessons (LESSON_DERIVATION_ENABLED),
+        # and a stored lesson with failed images is reused with only those images regenerated
+        use_cache = not force
+        if with_images:
+            lesson = await bundle_service.generate_lesson_bundle(topic, level, use_cache=use_cache)
+        else:
+            lesson = await content_service.generate_educational_content(topic, level, use_cache=use_cache)
+        content_service.store_lesson(topic, level, lesson)
+        return with_images and lesson["partial"]
+
+    async def worker():
+        while not queue.empty():
+            topic, level = queue.get_nowait()
+            await limiter.wait()
+            started_at = time.perf_counter()
+            try:
+                try:
+                    partial = await generate(topic, level)
+                except CircuitOpenError:
+                    # The LLM is unhealthy: wait for the breaker to probe again, then retry once
+                    print(f"LLM circuit open, pausing {settings.CIRCUIT_BREAKER_RECOVERY_TIME:.0f}s")
+                    await asyncio.sleep(settings.CIRCUIT_BREAKER_RECOVERY_TIME)
+                    partial = await generate(topic, level)
+            except Exception as e:
+                counts["failed"] += 1
+                print(f"FAILED {topic} [{level}]: {str(e)}")
+                continue
+
+            counts["generated"] += 1
+            counts["partial"] += 1 if partial else 0
+            done = counts["generated"] + counts["failed"]
+            note = " (some images failed)" if partial else ""
+            print(f"[{done}/{total}] {topic} [{level}] in {time.perf_counter() - started_at:.1f}s{note}")
+
+    await asyncio.gather(*[worker() for _ in range(max(concurrency, 1))])
+    print(f"Done: {counts['generated']} generated ({counts['partial']} with failed images), "
+          f"{counts['skipped']} skipped, {counts['failed']} failed")
+    if counts["failed"] or counts["partial"]:
+        print("Run the same command again to retry the failed lessons and images")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute lessons for a topic catalog")
+    parser.add_argument("catalog", help="Topic catalog (.txt with one topic per line, or .json list)")
+    parser.add_argument("--levels", nargs="+", choices=AUDIENCE_LEVELS, default=AUDIENCE_LEVELS,
+                        help="Audience levels to generate (default: all)")
+    parser.add_argument("--rate", type=float, default=30.0, help="Maximum lessons started per minute (0 = unlimited)")
+    parser.add_argument("--concurrency", type=int, default=2, help="Lessons generated at the same time")
+    parser.add_argument("--images", action="store_true", help="Also generate the lesson images")
+    parser.add_argument("--force", action="store_true", help="Regenerate lessons that are already stored")
+    args = parser.parse_args()
+
+    load_dotenv()
+    settings = Settings()
+    if not settings.LESSON_STORE_DIR:
+        parser.error("LESSON_STORE_DIR must be set to precompute lessons")
+
+    # Never persist mock or stale fallback content: failures must surface so they are retried
+    settings.CIRCUIT_BREAKER_FALLBACK = "error"
+    # Every topic gets its own lesson rather than the stored lesson of a similar topic
+    settings.TOPIC_SIMILARITY_ENABLED = False
+
+    jobs = [(topic, level) for topic in load_catalog(args.catalog) for level in args.levels]
+    asyncio.run(precompute(settings, jobs, args.rate, args.concurrency, args.images, args.force))
+
+
+if __name__ == "__main__":
+    main()
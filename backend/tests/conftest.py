@@ -0,0 +1,27 @@
+import pytest
+
+from app.nvidia_api import response_cache
+from app.services import circuit_breaker, lesson_store, topic_index
+from config.settings import Settings
+
+
+@pytest.fixture(autouse=True)
+def reset_shared_state():
+    """Named caches, circuit breakers and the lesson store and topic index are process-wide; give every test fresh ones"""
+    response_cache._caches.clear()
+    circuit_breaker._breakers.clear()
+    lesson_store._store = topic_index._index = None
+    yield
+    response_cache._caches.clear()
+    circuit_breaker._breakers.clear()
+    lesson_store._store = topic_index._index = None
+
+
+@pytest.fixture
+def settings(tmp_path):
+    return Settings(
+        USE_MOCK_DATA=False,
+        LLM_API_KEY="test",
+        STATIC_DIR=str(tmp_path / "static"),
+        LESSON_STORE_DIR=""
+    )
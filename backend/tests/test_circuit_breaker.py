@@ -0,0 +1,149 @@
+import asyncio
+
+import pytest
+
+from app.nvidia_api.llm_client import LLMAPIError
+from app.services import content_service
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError, is_upstream_failure
+from app.services.content_service import ContentService
+from app.services.image_service import ImageService
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class CodeError(Exception):
+    """Like google-genai's APIError, which carries the HTTP status as `code`"""
+
+    def __init__(self, code):
+        super().__init__(f"{code} error")
+        self.code = code
+
+
+async def fail(error):
+    raise error
+
+
+async def succeed():
+    return "ok"
+
+
+@pytest.mark.parametrize("error, expected", [
+    (LLMAPIError("bad request", retryable=False), False),
+    (LLMAPIError("server error", retryable=True), True),
+    (StatusError(400), False),
+    (StatusError(401), False),
+    (StatusError(503), True),
+    (CodeError(400), False),
+    (CodeError(429), True),
+    (CodeError(500), True),
+    (asyncio.TimeoutError(), True),
+    (RuntimeError("connection reset"), True),
+])
+def test_is_upstream_failure(error, expected):
+    assert is_upstream_failure(error) is expected
+
+
+async def test_rejected_requests_do_not_open_the_circuit():
+    breaker = CircuitBreaker("llm", failure_threshold=2, recovery_time=60)
+    for _ in range(5):
+        with pytest.raises(LLMAPIError):
+            await breaker.call(lambda: fail(LLMAPIError("unsupported response_format", retryable=False)))
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+
+
+async def test_upstream_failures_open_the_circuit():
+    breaker = CircuitBreaker("llm", failure_threshold=2, recovery_time=60)
+    for _ in range(2):
+        with pytest.raises(LLMAPIError):
+            await breaker.call(lambda: fail(LLMAPIError("503", retryable=True)))
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        await breaker.call(succeed)
+
+
+async def test_successful_probe_closes_the_circuit():
+    breaker = CircuitBreaker("llm", failure_threshold=1, recovery_time=0)
+    with pytest.raises(LLMAPIError):
+        await breaker.call(lambda: fail(LLMAPIError("503", retryable=True)))
+    assert breaker.state == CircuitBreaker.OPEN
+
+    assert await breaker.call(succeed) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+async def test_failed_probe_reopens_the_circuit():
+    breaker = CircuitBreaker("llm", failure_threshold=1, recovery_time=0)
+    breaker.record_failure()
+    with pytest.raises(LLMAPIError):
+        await breaker.call(lambda: fail(LLMAPIError("503", retryable=True)))
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.times_opened == 2
+
+
+def test_only_probes_close_a_half_open_circuit():
+    breaker = CircuitBreaker("llm", failure_threshold=1, recovery_time=0)
+    straggler = breaker.before_call()  # Admitted while closed
+    breaker.record_failure()
+    probe = breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert (straggler, probe) == (False, True)
+
+    breaker.record_success(straggler)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # The probe slot is still taken
+
+    breaker.record_success(probe)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_non_probe_failure_does_not_reopen_a_half_open_circuit():
+    breaker = CircuitBreaker("llm", failure_threshold=1, recovery_time=0)
+    straggler = breaker.before_call()
+    breaker.record_failure()
+    probe = breaker.before_call()
+
+    breaker.record_failure(straggler)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.record_abandoned(probe)
+    assert breaker.before_call() is True
+
+
+@pytest.mark.parametrize("result, expected", [
+    ({"success": False, "error": "The prompt was refused"}, False),
+    ({"success": False, "error": "GEMINI_API_KEY is not set or is empty"}, False),
+    ({"success": True, "upstream_error": CodeError(400)}, False),
+    ({"success": True, "upstream_error": CodeError(503)}, True),
+    ({"success": True, "upstream_error": ConnectionError("connection reset")}, True),
+])
+def test_only_gemini_api_errors_count_as_failures(result, expected):
+    assert ImageService._is_gemini_failure(result) is expected
+
+
+class HangingLLMClient:
+    model_id = "test-model"
+
+    async def generate_text_stream(self, prompt):
+        await asyncio.Event().wait()
+        yield "never"
+
+
+async def test_stream_without_a_first_chunk_fails_the_probe(settings, monkeypatch):
+    settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD = 1
+    settings.CIRCUIT_BREAKER_RECOVERY_TIME = 0
+    settings.LLM_FIRST_TOKEN_TIMEOUT = 0.01
+    monkeypatch.setattr(content_service, "get_llm_client", lambda _: HangingLLMClient())
+    service = ContentService(settings)
+    service.llm_breaker.record_failure()
+
+    with pytest.raises(asyncio.TimeoutError):
+        async for _ in service.generate_educational_content_stream("photosynthesis", "college"):
+            pass
+
+    assert service.llm_breaker.times_opened == 2
+    assert service.llm_breaker.before_call() is True  # The probe slot was released
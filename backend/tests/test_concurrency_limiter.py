@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from app.nvidia_api import concurrency_limiter
+from app.nvidia_api.concurrency_limiter import AdaptiveConcurrencyLimiter, LimiterTimeoutError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(concurrency_limiter, "time", clock)
+    return clock
+
+
+def make_limiter(initial_limit=4.0, max_wait=1.0):
+    return AdaptiveConcurrencyLimiter(initial_limit=initial_limit, min_limit=1.0, max_limit=8.0,
+                                      max_wait=max_wait, backoff_ratio=0.5, decrease_cooldown=1.0)
+
+
+async def call(limiter, clock, latency=0.1, error=None):
+    async with limiter.acquire(latency_target=1.0):
+        clock.now += latency
+        if error is not None:
+            raise error
+
+
+async def test_fast_successes_increase_the_limit_additively(clock):
+    limiter = make_limiter()
+
+    for _ in range(4):
+        await call(limiter, clock)
+
+    # About one more slot per window of `limit` healthy calls
+    assert limiter.limit == pytest.approx(5.0, abs=0.1)
+    assert limiter.successes == 4
+
+
+async def test_slow_successes_keep_the_limit(clock):
+    limiter = make_limiter()
+
+    await call(limiter, clock, latency=2.0)
+
+    assert limiter.limit == 4.0
+
+
+async def test_rate_limits_decrease_the_limit_once_per_cooldown(clock):
+    limiter = make_limiter()
+
+    for _ in range(3):
+        with pytest.raises(RateLimited):
+            await call(limiter, clock, error=RateLimited())
+    assert limiter.limit == 2.0
+
+    clock.now += 1.0
+    with pytest.raises(RateLimited):
+        await call(limiter, clock, error=RateLimited())
+
+    assert limiter.limit == 1.0
+    assert limiter.overloads == 4
+
+
+async def test_other_errors_do_not_decrease_the_limit(clock):
+    limiter = make_limiter()
+
+    with pytest.raises(ValueError):
+        await call(limiter, clock, error=ValueError("bad request"))
+
+    assert limiter.limit == 4.0 and limiter.in_flight == 0
+
+
+async def test_calls_beyond_the_limit_queue_and_time_out(clock):
+    limiter = make_limiter(initial_limit=1.0, max_wait=0.001)
+    release = asyncio.Event()
+
+    async def hold():
+        async with limiter.acquire(latency_target=1.0):
+            await release.wait()
+
+    holder = asyncio.ensure_future(hold())
+    await asyncio.sleep(0)
+    with pytest.raises(LimiterTimeoutError):
+        async with limiter.acquire(latency_target=1.0):
+            pass
+
+    limiter.max_wait = 10.0
+    queued = asyncio.ensure_future(call(limiter, clock))
+    await asyncio.sleep(0)
+    assert limiter.queue_depth == 1
+    release.set()
+    await asyncio.gather(holder, queued)
+
+    assert limiter.rejections == 1
+    assert (limiter.in_flight, limiter.queue_depth) == (0, 0)
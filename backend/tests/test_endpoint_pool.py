@@ -0,0 +1,119 @@
+import pytest
+
+from app.nvidia_api import endpoint_pool
+from app.nvidia_api.endpoint_pool import EndpointPool, LLMEndpoint
+from app.nvidia_api.llm_client import LLMClient
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class UpstreamError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(endpoint_pool, "time", clock)
+    return clock
+
+
+def make_pool(*weights, **options):
+    endpoints = [LLMEndpoint(f"e{index}", f"http://e{index}", "test-model", client=None, weight=weight)
+                 for index, weight in enumerate(weights)]
+    return EndpointPool(endpoints, failure_threshold=2, ejection_time=30.0, max_ejection_time=100.0, **options)
+
+
+async def fail(pool, endpoint, status_code=503):
+    with pytest.raises(UpstreamError):
+        async with pool.track(endpoint):
+            raise UpstreamError(status_code)
+
+
+async def succeed(pool, endpoint):
+    async with pool.track(endpoint):
+        pass
+
+
+def test_least_outstanding_picks_the_least_loaded_endpoint_per_weight(clock):
+    pool = make_pool(1.0, 1.0, 2.0)
+    first, second, third = pool.endpoints
+    first.outstanding, second.outstanding, third.outstanding = 1, 3, 3
+
+    assert pool.select() is first
+    # Twice the weight carries twice the load at the same score
+    first.outstanding = 2
+    assert pool.select() is third
+
+
+def test_excluded_endpoints_are_avoided_while_others_are_healthy(clock):
+    pool = make_pool(1.0, 1.0)
+    first, second = pool.endpoints
+    second.outstanding = 5
+
+    assert pool.select(exclude=[first]) is second
+
+
+async def test_failing_endpoint_is_ejected_and_readmitted(clock):
+    pool = make_pool(1.0, 1.0)
+    bad, good = pool.endpoints
+    good.outstanding = 10
+
+    await fail(pool, bad)
+    assert pool.select() is bad
+    await fail(pool, bad)
+    assert pool.select() is good and bad.ejections == 1
+
+    clock.now += 30.0
+    assert pool.select() is bad
+
+    # A repeated ejection lasts twice as long, until a success resets the backoff
+    await fail(pool, bad)
+    await fail(pool, bad)
+    clock.now += 30.0
+    assert pool.select() is good
+    clock.now += 30.0
+    assert pool.select() is bad
+    await succeed(pool, bad)
+    assert bad.ejections == 0 and bad.consecutive_failures == 0
+
+
+async def test_client_errors_do_not_count_as_endpoint_failures(clock):
+    pool = make_pool(1.0, 1.0)
+    endpoint = pool.endpoints[0]
+
+    for _ in range(3):
+        await fail(pool, endpoint, status_code=400)
+
+    assert endpoint.failures == 0 and not endpoint.is_ejected(clock.now)
+    assert endpoint.outstanding == 0 and endpoint.requests == 3
+
+
+async def test_fully_ejected_pool_fails_open_to_the_first_to_recover(clock):
+    pool = make_pool(1.0, 1.0)
+    first, second = pool.endpoints
+    for _ in range(2):
+        await fail(pool, second)
+    clock.now += 1.0
+    for _ in range(2):
+        await fail(pool, first)
+
+    assert pool.select() is second
+
+
+def test_response_cache_keys_name_every_model_of_the_pool(settings):
+    single = LLMClient(settings)
+    settings.LLM_ENDPOINTS = [{"base_url": "http://a"}, {"base_url": "http://b", "model_id": "other-model"}]
+    mixed = LLMClient(settings)
+
+    assert single.model_id == settings.LLM_MODEL_ID
+    assert mixed.model_id == "+".join(sorted([settings.LLM_MODEL_ID, "other-model"]))
+    assert mixed._cache_key("prompt") != single._cache_key("prompt")
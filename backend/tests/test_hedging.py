@@ -0,0 +1,68 @@
+import asyncio
+
+from app.nvidia_api.hedging import Hedger
+
+
+class Calls:
+    """Upstream calls that answer after a per-call latency, recording when each started"""
+
+    def __init__(self, *latencies):
+        self.latencies = list(latencies)
+        self.started = []
+        self.cancelled = []
+
+    async def __call__(self):
+        index = len(self.started)
+        self.started.append(asyncio.get_running_loop().time())
+        try:
+            await asyncio.sleep(self.latencies[index])
+        except asyncio.CancelledError:
+            self.cancelled.append(index)
+            raise
+        return f"call {index}"
+
+
+def make_hedger(budget_ratio=1.0, delay=0.02, samples=5):
+    hedger = Hedger(percentile=0.95, min_samples=samples, window_size=10, budget_ratio=budget_ratio)
+    for _ in range(samples):
+        hedger.window.record(delay)
+    return hedger
+
+
+async def test_no_hedge_until_enough_latency_samples():
+    hedger = Hedger(percentile=0.95, min_samples=5, window_size=10, budget_ratio=1.0)
+    calls = Calls(0.05, 0.0)
+
+    assert await hedger.run(calls) == "call 0"
+    assert len(calls.started) == 1
+
+
+async def test_no_hedge_when_the_primary_answers_within_the_delay():
+    hedger = make_hedger()
+    calls = Calls(0.0, 0.0)
+
+    assert await hedger.run(calls) == "call 0"
+    assert len(calls.started) == 1 and hedger.hedges_started == 0
+
+
+async def test_slow_primary_is_hedged_after_the_delay_and_cancelled_when_the_hedge_wins():
+    hedger = make_hedger(delay=0.02)
+    calls = Calls(10.0, 0.0)
+
+    assert await hedger.run(calls) == "call 1"
+    assert calls.started[1] - calls.started[0] >= 0.02
+    assert (hedger.hedges_started, hedger.hedges_won) == (1, 1)
+    await asyncio.sleep(0)
+    assert calls.cancelled == [0]
+
+
+async def test_hedges_are_capped_by_the_budget():
+    hedger = make_hedger(budget_ratio=0.5, delay=0.01)
+    calls = Calls(0.1, 0.1, 0.0)
+
+    # Each request earns half a hedge: the first one waits for its slow primary
+    assert await hedger.run(calls) == "call 0"
+    assert len(calls.started) == 1 and hedger.hedges_started == 0
+
+    assert await hedger.run(calls) == "call 2"
+    assert hedger.hedges_started == 1 and hedger.budget.tokens == 0.0
@@ -0,0 +1,78 @@
+import asyncio
+import json
+
+from app.models.schemas import BatchContentRequest
+from app.routers.content import generate_content_batch
+from app.services import content_service
+
+LESSON = "Plants turn light into sugar.\n\nIMAGE_PROMPTS:\n- a leaf\n- a chloroplast\n- a glucose molecule\n"
+
+
+class FakeLLMClient:
+    """Answers every lesson prompt except those about "broken" topics, tracking concurrent calls"""
+
+    model_id = "test-model"
+
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+        self.calls = 0
+
+    async def generate_text(self, prompt, use_cache=True, max_tokens=None, response_format=None):
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(0.01)
+            if '"broken' in prompt:
+                raise RuntimeError("upstream failed")
+            return LESSON
+        finally:
+            self.active -= 1
+
+
+async def run_batch(settings, monkeypatch, topics, concurrency):
+    llm = FakeLLMClient()
+    monkeypatch.setattr(content_service, "get_llm_client", lambda _: llm)
+    request = BatchContentRequest(items=[{"topic": topic, "audience": "college"} for topic in topics],
+                                  concurrency=concurrency)
+    response = await generate_content_batch(request, settings=settings, cache_enabled=True)
+    lines = [json.loads(line) async for line in response.body_iterator]
+    return lines[:-1], lines[-1], llm
+
+
+async def test_failed_items_do_not_affect_the_others(settings, monkeypatch):
+    results, summary, _ = await run_batch(settings, monkeypatch, ["photosynthesis", "broken topic", "osmosis"], 3)
+
+    by_index = {result["index"]: result for result in results}
+    assert sorted(by_index) == [0, 1, 2]
+    assert by_index[1]["status"] == "error" and by_index[1]["error"] == "upstream failed"
+    assert [by_index[index]["status"] for index in (0, 2)] == ["ok", "ok"]
+    assert by_index[0]["image_prompts"] == ["a leaf", "a chloroplast", "a glucose molecule"]
+    assert (summary["done"], summary["succeeded"], summary["failed"]) == (True, 2, 1)
+
+
+async def test_items_are_generated_within_the_concurrency_limit(settings, monkeypatch):
+    topics = [f"topic {index}" for index in range(6)]
+
+    results, summary, llm = await run_batch(settings, monkeypatch, topics, 2)
+
+    assert llm.calls == 6 and llm.max_active == 2
+    assert summary["succeeded"] == 6
+
+
+async def test_concurrency_is_capped_by_the_settings(settings, monkeypatch):
+    settings.BATCH_MAX_CONCURRENCY = 2
+    topics = [f"topic {index}" for index in range(6)]
+
+    _, _, llm = await run_batch(settings, monkeypatch, topics, 10)
+
+    assert llm.max_active == 2
+
+
+async def test_cached_lessons_are_served_without_a_call(settings, monkeypatch):
+    _, _, first = await run_batch(settings, monkeypatch, ["photosynthesis"], 1)
+    results, _, second = await run_batch(settings, monkeypatch, ["Photosynthesis", "osmosis"], 2)
+
+    assert [result["cached"] for result in sorted(results, key=lambda result: result["index"])] == [True, False]
+    assert (first.calls, second.calls) == (1, 1)
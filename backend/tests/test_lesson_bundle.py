@@ -0,0 +1,74 @@
+import asyncio
+
+from app.services import content_service
+from app.services.bundle_service import BundleService
+
+LESSON = "Plants turn light into sugar.\n\nIMAGE_PROMPTS:\n- a leaf\n- a chloroplast\n- a glucose molecule\n"
+
+
+class FakeLLMClient:
+    model_id = "test-model"
+
+    async def generate_text(self, prompt, use_cache=True, max_tokens=None, response_format=None):
+        return LESSON
+
+
+class FakeImageService:
+    """Fails the prompts it is told to, either by raising or with an unsuccessful result"""
+
+    def __init__(self, raise_for=(), fail_for=()):
+        self.raise_for = raise_for
+        self.fail_for = fail_for
+        self.prompts = []
+
+    async def generate_gemini_image(self, prompt, filename_prefix):
+        self.prompts.append(prompt)
+        await asyncio.sleep(0)
+        if prompt in self.raise_for:
+            raise RuntimeError("image upstream failed")
+        if prompt in self.fail_for:
+            return {"success": False, "error": "refused"}
+        return {"success": True, "image_url": f"/static/{prompt.replace(' ', '_')}.png"}
+
+
+def make_service(settings, monkeypatch, image_service):
+    monkeypatch.setattr(content_service, "get_llm_client", lambda _: FakeLLMClient())
+    settings.GEMINI_API_KEY = "test"
+    service = BundleService(settings)
+    service.image_service = image_service
+    return service
+
+
+async def test_failed_image_makes_the_bundle_partial(settings, monkeypatch):
+    service = make_service(settings, monkeypatch, FakeImageService(raise_for=["a chloroplast"]))
+
+    bundle = await service.generate_lesson_bundle("photosynthesis", "college")
+
+    assert bundle["partial"] is True
+    assert bundle["explanation"] == "Plants turn light into sugar."
+    assert [image["prompt"] for image in bundle["images"]] == bundle["image_prompts"]
+    leaf, chloroplast, glucose = bundle["images"]
+    assert (chloroplast["success"], chloroplast["image_url"], chloroplast["error"]) == \
+        (False, None, "image upstream failed")
+    assert (leaf["success"], leaf["image_url"]) == (True, "/static/a_leaf.png")
+    assert (glucose["success"], glucose["image_url"]) == (True, "/static/a_glucose_molecule.png")
+
+
+async def test_unsuccessful_image_result_makes_the_bundle_partial(settings, monkeypatch):
+    service = make_service(settings, monkeypatch, FakeImageService(fail_for=["a leaf"]))
+
+    bundle = await service.generate_lesson_bundle("photosynthesis", "college")
+
+    assert bundle["partial"] is True
+    assert [image["success"] for image in bundle["images"]] == [False, True, True]
+    assert bundle["images"][0]["error"] == "refused"
+
+
+async def test_bundle_with_all_images_is_complete(settings, monkeypatch):
+    image_service = FakeImageService()
+    service = make_service(settings, monkeypatch, image_service)
+
+    bundle = await service.generate_lesson_bundle("photosynthesis", "college")
+
+    assert bundle["partial"] is False
+    assert sorted(image_service.prompts) == sorted(bundle["image_prompts"])
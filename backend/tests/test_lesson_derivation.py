@@ -0,0 +1,79 @@
+import pytest
+
+from app.services import content_service
+from app.services.content_service import ContentService
+
+LESSON = "{level} lesson.\n\nIMAGE_PROMPTS:\n- a leaf\n- a chloroplast\n- a glucose molecule\n"
+
+
+class FakeLLMClient:
+    """Answers lesson and rewrite prompts, recording which kind each call was"""
+
+    model_id = "test-model"
+
+    def __init__(self, fail_derivation=False):
+        self.calls = []
+        self.fail_derivation = fail_derivation
+
+    async def generate_text(self, prompt, use_cache=True, max_tokens=None, response_format=None):
+        kind = "derive" if "Rewrite it for" in prompt else "generate"
+        self.calls.append((kind, max_tokens))
+        if kind == "derive" and self.fail_derivation:
+            raise RuntimeError("upstream failed")
+        return LESSON.format(level="Derived" if kind == "derive" else "Generated")
+
+
+@pytest.fixture
+def make_service(settings, monkeypatch):
+    settings.LESSON_DERIVATION_ENABLED = True
+
+    def make(**options):
+        llm = FakeLLMClient(**options)
+        monkeypatch.setattr(content_service, "get_llm_client", lambda _: llm)
+        return ContentService(settings), llm
+
+    return make
+
+
+async def test_lesson_is_derived_from_a_cached_lesson_of_another_level(make_service, settings):
+    service, llm = make_service()
+    service.cache_lesson("Photosynthesis", "college", {"explanation": "College lesson.",
+                                                       "image_prompts": ["a", "b", "c"]})
+
+    lesson = await service.generate_educational_content("photosynthesis", "high school")
+
+    assert lesson["explanation"] == "Derived lesson."
+    assert llm.calls == [("derive", settings.LESSON_DERIVATION_MAX_TOKENS)]
+    assert await service.get_cached_lesson("Photosynthesis", "high-school") == lesson
+
+
+async def test_without_a_cached_lesson_the_lesson_is_generated(make_service):
+    service, llm = make_service()
+    service.cache_lesson("Osmosis", "college", {"explanation": "College lesson.", "image_prompts": ["a", "b", "c"]})
+
+    lesson = await service.generate_educational_content("photosynthesis", "high school")
+
+    assert lesson["explanation"] == "Generated lesson."
+    assert [kind for kind, _ in llm.calls] == ["generate"]
+
+
+async def test_failed_derivation_falls_back_to_full_generation(make_service):
+    service, llm = make_service(fail_derivation=True)
+    service.cache_lesson("Photosynthesis", "graduate", {"explanation": "Graduate lesson.",
+                                                        "image_prompts": ["a", "b", "c"]})
+
+    lesson = await service.generate_educational_content("photosynthesis", "high school")
+
+    assert lesson["explanation"] == "Generated lesson."
+    assert [kind for kind, _ in llm.calls] == ["derive", "generate"]
+
+
+async def test_disabled_derivation_generates_the_lesson(make_service, settings):
+    settings.LESSON_DERIVATION_ENABLED = False
+    service, llm = make_service()
+    service.cache_lesson("Photosynthesis", "college", {"explanation": "College lesson.",
+                                                       "image_prompts": ["a", "b", "c"]})
+
+    await service.generate_educational_content("photosynthesis", "high school")
+
+    assert [kind for kind, _ in llm.calls] == ["generate"]
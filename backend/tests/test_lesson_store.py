@@ -0,0 +1,58 @@
+import pytest
+
+from app.services import content_service
+from app.services.content_service import ContentService
+from app.services.lesson_store import LessonStore
+from precompute_lessons import is_complete
+
+LESSON = {"explanation": "Plants turn light into sugar.", "image_prompts": ["a", "b", "c"]}
+
+
+class FakeLLMClient:
+    model_id = "test-model"
+
+
+async def test_get_reads_stored_lessons_and_counts_misses(tmp_path):
+    store = LessonStore(str(tmp_path))
+    store.put("key", LESSON)
+
+    assert (await store.get("key"))["explanation"] == LESSON["explanation"]
+    assert await store.get("missing") is None
+    assert (store.hits, store.misses) == (1, 1)
+
+
+async def test_entries_are_counted_on_startup_and_on_new_writes(tmp_path):
+    LessonStore(str(tmp_path)).put("first", LESSON)
+    store = LessonStore(str(tmp_path))
+    assert store.get_stats()["entries"] == 1
+
+    store.put("first", LESSON)
+    store.put("second", LESSON)
+
+    assert store.get_stats()["entries"] == 2
+    assert store.writes == 2
+
+
+async def test_content_service_serves_stored_lessons(settings, tmp_path, monkeypatch):
+    monkeypatch.setattr(content_service, "get_llm_client", lambda _: FakeLLMClient())
+    service = ContentService(settings)
+    service.lesson_store = LessonStore(str(tmp_path / "lessons"))
+    service.store_lesson("Photosynthesis", "high-school", LESSON)
+    service.lesson_cache.clear()
+
+    lesson = await service.get_cached_lesson("photosynthesis", "High School")
+
+    assert lesson == LESSON
+    assert (await service.get_stored_lesson("Photosynthesis", "high-school"))["topic"] == "Photosynthesis"
+
+
+@pytest.mark.parametrize("lesson, with_images, expected", [
+    (None, False, False),
+    (LESSON, False, True),
+    (LESSON, True, False),
+    (dict(LESSON, images=[{"prompt": p, "success": True} for p in "abc"]), True, True),
+    (dict(LESSON, images=[{"prompt": "a", "success": True}, {"prompt": "b", "success": False},
+                          {"prompt": "c", "success": True}]), True, False),
+])
+def test_lessons_with_failed_images_are_precomputed_again(lesson, with_images, expected):
+    assert is_complete(lesson, with_images) == expected
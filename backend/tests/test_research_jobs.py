@@ -0,0 +1,111 @@
+import asyncio
+
+from app.services.deep_research_service import DeepResearchService
+from app.services.research_jobs import ResearchJobManager, CANCELLED, FAILED, SUCCEEDED
+
+PARAMS = {"topic": "Quantum computing", "subtopics": ["qubits"], "academic_level": "undergraduate",
+          "include_references": True, "mode": None, "refresh_subtopics": None}
+
+
+class FakeSettings:
+    RESEARCH_MODE = "single"
+    RESEARCH_SECTION_CACHE_ENABLED = True
+
+
+class FakeResearchService:
+    settings = FakeSettings()
+
+    def __init__(self, delay=0.01, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    resolve_mode = DeepResearchService.resolve_mode
+
+    async def generate_research(self, topic, subtopics, academic_level, include_references, mode,
+                                refresh_subtopics, use_cache, progress):
+        self.calls += 1
+        progress(0, 2)
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("LLM unavailable")
+        progress(1, 2)
+        return {"introduction": f"About {topic}.", "sections": [], "references": [],
+                "related_topics": [], "key_concepts": [], "visualization_prompts": []}
+
+
+async def run(manager, coroutine):
+    manager.start()
+    try:
+        return await coroutine
+    finally:
+        await manager.stop()
+
+
+async def test_identical_requests_share_one_job():
+    service = FakeResearchService()
+    manager = ResearchJobManager(service, workers=1, max_queued=10, ttl=60.0)
+
+    job, created = manager.submit(PARAMS)
+    same, created_again = manager.submit(dict(PARAMS, topic=" quantum computing "))
+    other, _ = manager.submit(dict(PARAMS, academic_level="graduate"))
+    await run(manager, asyncio.gather(job.wait_until_done(1.0), other.wait_until_done(1.0)))
+
+    assert (created, created_again) == (True, False)
+    assert same is job and other is not job
+    assert job.status == SUCCEEDED and job.result["introduction"] == "About Quantum computing."
+    assert service.calls == 2
+    assert manager.get_stats()["deduplicated"] == 1
+
+
+def test_requests_are_deduplicated_by_the_mode_they_run_in():
+    manager = ResearchJobManager(FakeResearchService(), workers=1, max_queued=10, ttl=60.0)
+
+    default, _ = manager.submit(PARAMS)
+    single, created_single = manager.submit(dict(PARAMS, mode="single"))
+    parallel, created_parallel = manager.submit(dict(PARAMS, mode="parallel"))
+    no_subtopics, _ = manager.submit(dict(PARAMS, subtopics=None))
+    no_subtopics_single, created_no_subtopics_single = manager.submit(dict(PARAMS, subtopics=None, mode="single"))
+
+    # With subtopics and the section cache, no mode runs in parallel mode, otherwise in RESEARCH_MODE
+    assert created_single and single is not default
+    assert not created_parallel and parallel is default
+    assert not created_no_subtopics_single and no_subtopics_single is no_subtopics
+
+
+async def test_failed_jobs_are_not_reused():
+    manager = ResearchJobManager(FakeResearchService(fail=True), workers=1, max_queued=10, ttl=60.0)
+    job, _ = manager.submit(PARAMS)
+    await run(manager, job.wait_until_done(1.0))
+
+    retry, created = manager.submit(PARAMS)
+
+    assert job.status == FAILED and job.error == "LLM unavailable"
+    assert created and retry is not job
+
+
+async def test_updates_follow_the_job_until_it_finishes():
+    manager = ResearchJobManager(FakeResearchService(delay=0.05), workers=1, max_queued=10, ttl=60.0)
+    job, _ = manager.submit(PARAMS)
+
+    async def follow():
+        return [status and status["status"] async for status in job.updates(keepalive=0.02)]
+
+    statuses = await run(manager, follow())
+
+    assert statuses[0] == "queued" and statuses[-1] == "succeeded"
+    assert None in statuses  # Keep-alive while the job was running
+
+
+async def test_shutdown_cancels_running_and_queued_jobs():
+    manager = ResearchJobManager(FakeResearchService(delay=10), workers=1, max_queued=10, ttl=60.0)
+    running, _ = manager.submit(PARAMS)
+    queued, _ = manager.submit(dict(PARAMS, topic="Graph theory"))
+    manager.start()
+    await asyncio.sleep(0.01)
+
+    await manager.stop()
+
+    assert running.status == queued.status == CANCELLED
+    assert manager.get_stats()["cancelled"] == 2
+    assert manager.get_stats()["failed"] == 0
@@ -0,0 +1,119 @@
+import asyncio
+
+from app.services import deep_research_service
+from app.services.deep_research_service import DeepResearchService
+
+OUTLINE = "INTRODUCTION:\nAn introduction.\n\nKEY_CONCEPTS:\n- concept\n"
+
+
+class FakeLLMClient:
+    model_id = "test-model"
+
+    def __init__(self):
+        self.calls = []
+
+    async def generate_text(self, prompt, use_cache=True, max_tokens=None, response_format=None):
+        await asyncio.sleep(0)
+        if 'section "' not in prompt:
+            self.calls.append(("outline", use_cache))
+            return OUTLINE
+        title = prompt.split('section "', 1)[1].split('"', 1)[0]
+        self.calls.append((title, use_cache))
+        return f"## {title}\nContent for {title}, call {len(self.calls)}."
+
+
+def make_service(settings, monkeypatch):
+    llm = FakeLLMClient()
+    monkeypatch.setattr(deep_research_service, "get_llm_client", lambda _: llm)
+    return DeepResearchService(settings), llm
+
+
+def section_calls(llm):
+    return [title for title, _ in llm.calls if title != "outline"]
+
+
+async def test_subtopic_requests_are_generated_section_wise_by_default(settings, monkeypatch):
+    service, llm = make_service(settings, monkeypatch)
+
+    research = await service.generate_research("quantum computing", ["qubits", "gates"], "undergraduate")
+
+    assert sorted(section_calls(llm)) == ["gates", "qubits"]
+    assert [section["title"] for section in research["sections"]] == ["qubits", "gates"]
+    assert research["introduction"] == "An introduction."
+
+
+async def test_added_subtopic_only_generates_the_new_section(settings, monkeypatch):
+    service, llm = make_service(settings, monkeypatch)
+    first = await service.generate_research("quantum computing", ["qubits", "gates"], "undergraduate")
+    llm.calls.clear()
+
+    research = await service.generate_research("quantum computing", ["qubits", "entanglement", "gates"],
+                                               "undergraduate")
+
+    assert section_calls(llm) == ["entanglement"]
+    assert [section["title"] for section in research["sections"]] == ["qubits", "entanglement", "gates"]
+    assert research["sections"][0] == first["sections"][0]
+    assert research["sections"][2] == first["sections"][1]
+
+
+async def test_refresh_subtopics_regenerates_only_those_sections(settings, monkeypatch):
+    service, llm = make_service(settings, monkeypatch)
+    first = await service.generate_research("quantum computing", ["qubits", "gates"], "undergraduate")
+    llm.calls.clear()
+
+    research = await service.generate_research("quantum computing", ["qubits", "gates"], "undergraduate",
+                                               refresh_subtopics=["Gates"])
+
+    # The refreshed section must not be answered from the LLM response cache either
+    assert [call for call in llm.calls if call[0] != "outline"] == [("gates", False)]
+    assert research["sections"][0] == first["sections"][0]
+    assert research["sections"][1] != first["sections"][1]
+
+
+async def test_explicit_single_mode_is_one_completion(settings, monkeypatch):
+    service, llm = make_service(settings, monkeypatch)
+
+    await service.generate_research("quantum computing", ["qubits", "gates"], "undergraduate", mode="single")
+
+    assert len(llm.calls) == 1
+
+
+async def test_disabled_section_cache_keeps_the_configured_mode(settings, monkeypatch):
+    settings.RESEARCH_SECTION_CACHE_ENABLED = False
+    service, llm = make_service(settings, monkeypatch)
+
+    await service.generate_research("quantum computing", ["qubits", "gates"], "undergraduate")
+
+    assert len(llm.calls) == 1
+
+
+class HangingLLMClient(FakeLLMClient):
+    """Never answers, so a request can be cancelled while all its calls are in flight"""
+
+    def __init__(self):
+        super().__init__()
+        self.running = set()
+
+    async def generate_text(self, prompt, use_cache=True, max_tokens=None, response_format=None):
+        title = prompt.split('section "', 1)[1].split('"', 1)[0] if 'section "' in prompt else "outline"
+        self.running.add(title)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            self.running.discard(title)
+
+
+async def test_cancelling_during_the_outline_cancels_the_section_calls(settings, monkeypatch):
+    llm = HangingLLMClient()
+    monkeypatch.setattr(deep_research_service, "get_llm_client", lambda _: llm)
+    service = DeepResearchService(settings)
+    request = asyncio.ensure_future(service.generate_research("quantum computing", ["qubits", "gates"],
+                                                              "undergraduate"))
+    while len(llm.running) < 3:
+        await asyncio.sleep(0)
+
+    request.cancel()
+    await asyncio.gather(request, return_exceptions=True)
+
+    assert request.cancelled()
+    assert llm.running == set()
@@ -0,0 +1,50 @@
+import os
+import random
+
+import pytest
+
+from app.services.research_stream_parser import ResearchStreamParser, parse_research_document
+from benchmark_research_parser import (
+    SEMANTIC_CHANGES, legacy_parse_research_response, load_corpus, load_expected
+)
+
+CORPUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "research_corpus")
+CANONICAL = load_corpus(os.path.join(CORPUS, "canonical"))
+VARIANTS = load_corpus(os.path.join(CORPUS, "variants"))
+
+
+@pytest.mark.parametrize("name, text", CANONICAL)
+def test_canonical_responses_parse_like_the_legacy_parser(name, text):
+    assert parse_research_document(text, True) == legacy_parse_research_response(text, True)
+
+
+@pytest.mark.parametrize("change, text, field, expected", SEMANTIC_CHANGES, ids=[c[0] for c in SEMANTIC_CHANGES])
+def test_intentional_differences_from_the_legacy_parser(change, text, field, expected):
+    assert parse_research_document(text, True)[field] == expected
+    assert legacy_parse_research_response(text, True)[field] != expected
+
+
+@pytest.mark.parametrize("name, text", VARIANTS)
+def test_variant_responses_parse_as_expected(name, text):
+    assert parse_research_document(text, True) == load_expected(os.path.join(CORPUS, "variants"), name)
+
+
+@pytest.mark.parametrize("name, text", CANONICAL + VARIANTS)
+def test_random_chunk_splits_match_the_document_parse(name, text):
+    rng = random.Random(name)
+    for _ in range(20):
+        parser = ResearchStreamParser(True)
+        position = 0
+        while position < len(text):
+            size = rng.randint(1, 40)
+            parser.feed(text[position:position + size])
+            position += size
+        parser.finish()
+
+        assert parser.research == parse_research_document(text, True)
+
+
+def test_references_are_skipped_when_not_requested():
+    _, text = CANONICAL[0]
+
+    assert parse_research_document(text, False)["references"] is None
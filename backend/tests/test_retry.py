@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.nvidia_api import retry
+from app.nvidia_api.retry import retry_async
+
+
+class UpstreamError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    sleeps = []
+
+    async def sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr(retry, "asyncio", SimpleNamespace(sleep=sleep))
+    # Full jitter picks the upper bound, so the delays are the backoff caps
+    monkeypatch.setattr(retry, "random", SimpleNamespace(uniform=lambda low, high: high))
+    return sleeps
+
+
+def failing(*errors, result="ok"):
+    attempts = []
+
+    async def fn():
+        attempts.append(len(attempts))
+        if len(attempts) <= len(errors):
+            raise errors[len(attempts) - 1]
+        return result
+
+    return fn, attempts
+
+
+async def test_retryable_errors_are_retried_with_exponential_backoff(sleeps):
+    fn, attempts = failing(UpstreamError(503), UpstreamError(429))
+    retried = []
+
+    assert await retry_async(fn, max_retries=3, base_delay=0.5, max_delay=10.0,
+                             on_retry=lambda attempt, error: retried.append(attempt)) == "ok"
+    assert len(attempts) == 3
+    assert retried == [0, 1]
+    assert sleeps == [0.5, 1.0]
+
+
+async def test_retries_stop_at_max_retries(sleeps):
+    fn, attempts = failing(*[UpstreamError(500)] * 5)
+
+    with pytest.raises(UpstreamError):
+        await retry_async(fn, max_retries=2, base_delay=1.0, max_delay=1.5)
+
+    assert len(attempts) == 3
+    assert sleeps == [1.0, 1.5]
+
+
+@pytest.mark.parametrize("error", [UpstreamError(400), UpstreamError(401), ValueError("bad prompt")])
+async def test_non_retryable_errors_are_raised_at_once(sleeps, error):
+    fn, attempts = failing(error)
+
+    with pytest.raises(type(error)):
+        await retry_async(fn, max_retries=3, base_delay=1.0, max_delay=10.0)
+
+    assert len(attempts) == 1 and sleeps == []
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from app.nvidia_api.singleflight import SingleFlight
+
+
+class SharedCall:
+    """Shared work that runs until released, counting its executions"""
+
+    def __init__(self, fail=False):
+        self.release = asyncio.Event()
+        self.started = 0
+        self.finished = 0
+        self.fail = fail
+
+    async def __call__(self):
+        self.started += 1
+        await self.release.wait()
+        self.finished += 1
+        if self.fail:
+            raise RuntimeError("upstream failed")
+        return "result"
+
+
+async def test_concurrent_callers_share_one_execution():
+    flight, call = SingleFlight(), SharedCall()
+    waiters = [asyncio.ensure_future(flight.do("key", call)) for _ in range(3)]
+    await asyncio.sleep(0)
+
+    call.release.set()
+
+    assert await asyncio.gather(*waiters) == ["result"] * 3
+    assert call.started == 1
+    assert flight.get_stats() == {"in_flight": 0, "executions": 1, "shared": 2}
+
+
+async def test_cancelled_waiter_leaves_the_call_running_for_the_others():
+    flight, call = SingleFlight(), SharedCall()
+    leaving = asyncio.ensure_future(flight.do("key", call))
+    staying = asyncio.ensure_future(flight.do("key", call))
+    await asyncio.sleep(0)
+
+    leaving.cancel()
+    await asyncio.sleep(0)
+    call.release.set()
+
+    assert await staying == "result"
+    assert leaving.cancelled()
+    assert (call.started, call.finished) == (1, 1)
+
+
+@pytest.mark.parametrize("fail", [False, True])
+async def test_call_left_by_every_waiter_finishes_and_is_released(fail):
+    # Finishing lets the caller store the result (e.g. in the response cache) for the next request
+    flight, call = SingleFlight(), SharedCall(fail=fail)
+    waiters = [asyncio.ensure_future(flight.do("key", call)) for _ in range(2)]
+    await asyncio.sleep(0)
+    for waiter in waiters:
+        waiter.cancel()
+    await asyncio.gather(*waiters, return_exceptions=True)
+    assert flight.get_stats()["in_flight"] == 1
+
+    call.release.set()
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+    assert call.finished == 1
+    assert flight.get_stats()["in_flight"] == 0
+
+
+async def test_a_later_caller_joins_an_abandoned_call():
+    flight, call = SingleFlight(), SharedCall()
+    first = asyncio.ensure_future(flight.do("key", call))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.gather(first, return_exceptions=True)
+
+    second = asyncio.ensure_future(flight.do("key", call))
+    await asyncio.sleep(0)
+    call.release.set()
+
+    assert await second == "result"
+    assert call.started == 1
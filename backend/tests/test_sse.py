@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from app.routers.sse import coalesce_chunks, format_sse
+
+
+def text(chunk):
+    return {"chunk": chunk, "finished": False}
+
+
+async def source(*items):
+    """Yield events; a number sleeps that many seconds, an exception is raised"""
+    for item in items:
+        if isinstance(item, (int, float)):
+            await asyncio.sleep(item)
+        elif isinstance(item, BaseException):
+            raise item
+        else:
+            yield item
+
+
+async def collect(events, flush_ms=0, flush_bytes=0):
+    return [event async for event in coalesce_chunks(events, flush_ms, flush_bytes)]
+
+
+async def test_text_is_merged_up_to_the_size_limit():
+    events = await collect(source(*[text("abcd")] * 5), flush_bytes=10)
+
+    assert events == [text("abcdabcdabcd"), text("abcdabcd")]
+
+
+async def test_size_limit_counts_utf8_bytes():
+    events = await collect(source(text("éé"), text("éé"), text("a")), flush_bytes=4)
+
+    assert events == [text("éé"), text("éé"), text("a")]
+
+
+async def test_text_is_flushed_when_it_is_flush_ms_old():
+    events = await collect(source(text("a"), text("b"), 0.2, text("c")), flush_ms=20)
+
+    assert events == [text("ab"), text("c")]
+
+
+async def test_other_events_flush_text_and_are_never_merged():
+    prompt = {"chunk": "", "finished": False, "image_prompt": "a leaf", "image_prompt_index": 0}
+    final = {"chunk": "", "finished": True, "image_prompts": ["a leaf"]}
+
+    events = await collect(source(text("a"), text("b"), prompt, text("c"), text("d"), final),
+                           flush_ms=10000, flush_bytes=1000)
+
+    assert events == [text("ab"), prompt, text("cd"), final]
+    assert events[1] is prompt and events[3] is final
+
+
+async def test_image_prompt_is_delivered_without_waiting_for_the_time_limit():
+    prompt = {"chunk": "", "finished": False, "image_prompt": "a leaf", "image_prompt_index": 0}
+    hang = asyncio.Event()
+
+    async def events():
+        yield text("a")
+        yield prompt
+        await hang.wait()
+
+    stream = coalesce_chunks(events(), flush_ms=10000, flush_bytes=1000)
+    received = [await asyncio.wait_for(stream.__anext__(), 1.0) for _ in range(2)]
+    await stream.aclose()
+
+    assert received == [text("a"), prompt]
+
+
+async def test_errors_are_raised_after_the_pending_text():
+    stream = coalesce_chunks(source(text("a"), text("b"), RuntimeError("upstream failed")), 10000, 1000)
+
+    assert await stream.__anext__() == text("ab")
+    with pytest.raises(RuntimeError, match="upstream failed"):
+        await stream.__anext__()
+
+
+async def test_disabled_coalescing_passes_events_through():
+    chunks = [text("a"), text("b"), text("")]
+
+    assert await collect(source(*chunks)) == chunks
+
+
+def test_format_sse():
+    assert format_sse({"chunk": "a"}) == 'data: {"chunk": "a"}\n\n'
+    assert format_sse({"chunk": "a"}, "stream:3") == 'id: stream:3\ndata: {"chunk": "a"}\n\n'
@@ -0,0 +1,76 @@
+import asyncio
+
+from app.nvidia_api.stream_hub import StreamBroadcast, StreamHub
+
+
+class FakeUpstream:
+    def __init__(self, chunks, delay=0.01):
+        self.chunks = chunks
+        self.delay = delay
+        self.started = 0
+        self.finished = 0
+
+    async def stream(self):
+        self.started += 1
+        try:
+            for chunk in self.chunks:
+                await asyncio.sleep(self.delay)
+                yield chunk
+        finally:
+            self.finished += 1
+
+
+async def collect(subscription):
+    return "".join([chunk async for chunk in subscription])
+
+
+async def test_concurrent_subscribers_share_one_upstream_stream():
+    hub = StreamHub(max_buffer_chars=1000)
+    upstream = FakeUpstream(["a", "b", "c"])
+
+    first = asyncio.ensure_future(collect(hub.subscribe("key", upstream.stream)))
+    await asyncio.sleep(0.015)
+    late = asyncio.ensure_future(collect(hub.subscribe("key", upstream.stream)))
+
+    assert await asyncio.gather(first, late) == ["abc", "abc"]
+    assert upstream.started == 1
+    assert hub.get_stats()["active_streams"] == 0
+
+
+async def test_subscription_that_is_never_iterated_holds_nothing():
+    hub = StreamHub(max_buffer_chars=1000)
+    upstream = FakeUpstream(["a"])
+
+    hub.subscribe("key", upstream.stream)
+    broadcast = StreamBroadcast(upstream.stream, 1000, on_close=lambda _: None)
+    broadcast.subscribe()
+    await asyncio.sleep(0.03)
+
+    assert upstream.started == 0
+    assert broadcast.subscriber_count == 0
+    assert hub.get_stats()["active_streams"] == 0
+
+
+async def test_broadcast_is_released_when_the_upstream_ends_without_subscribers():
+    closed = []
+    upstream = FakeUpstream(["a", "b"])
+    broadcast = StreamBroadcast(upstream.stream, 1000, on_close=closed.append)
+    broadcast.start()
+
+    await asyncio.sleep(0.05)
+
+    assert broadcast.done and broadcast.closed
+    assert closed == [broadcast]
+
+
+async def test_last_subscriber_leaving_cancels_the_upstream_stream():
+    hub = StreamHub(max_buffer_chars=1000)
+    upstream = FakeUpstream(["a", "b", "c"], delay=0.05)
+
+    subscription = hub.subscribe("key", upstream.stream)
+    assert await subscription.__anext__() == "a"
+    await subscription.aclose()
+    await asyncio.sleep(0)
+
+    assert upstream.finished == 1
+    assert hub.get_stats()["active_streams"] == 0
@@ -0,0 +1,71 @@
+import asyncio
+
+from app.services import content_service
+from app.services.content_service import ContentService
+from app.services.stream_images import StreamImageGenerator
+
+
+class FakeImageService:
+    def __init__(self):
+        self.prompts = []
+
+    async def generate_gemini_image(self, prompt, filename_prefix):
+        self.prompts.append(prompt)
+        await asyncio.sleep(0)
+        return {"success": True, "image_url": f"/static/{len(self.prompts)}.png"}
+
+
+class FakeLLMClient:
+    model_id = "test-model"
+
+    async def generate_text_stream(self, prompt):
+        for chunk in ["Plants turn light ", "into sugar.\n\nIMAGE_PROMPTS:\n", "- a leaf in sunlight\n",
+                      "- a chloroplast\n"]:
+            await asyncio.sleep(0)
+            yield chunk
+
+
+async def lesson(events):
+    for event in events:
+        await asyncio.sleep(0)
+        yield event
+
+
+def prompt_event(prompt, index):
+    return {"chunk": "", "finished": False, "image_prompt": prompt, "image_prompt_index": index}
+
+
+async def collect(events):
+    image_service = FakeImageService()
+    generator = StreamImageGenerator(image_service, max_concurrency=2)
+    return [event async for event in generator.stream(lesson(events))], image_service
+
+
+async def test_images_are_reported_before_the_final_event():
+    final = {"chunk": "", "finished": True, "image_prompts": ["a", "b", "c"]}
+    events, image_service = await collect([
+        {"chunk": "text", "finished": False},
+        prompt_event("a", 0), prompt_event("b", 1), prompt_event("c", 2),
+        final
+    ])
+
+    ready = sorted(event["image_ready"]["index"] for event in events if "image_ready" in event)
+    assert ready == [0, 1, 2]
+    assert sorted(image_service.prompts) == ["a", "b", "c"]
+    assert events[-1] is final
+
+
+async def test_default_prompts_only_fill_the_missing_indices(settings, monkeypatch):
+    # Two prompts streamed, the final event pads them with a default third one
+    monkeypatch.setattr(content_service, "get_llm_client", lambda _: FakeLLMClient())
+    lesson_events = [event async for event in
+                     ContentService(settings).generate_educational_content_stream("Photosynthesis", "high school")]
+    streamed = [(event["image_prompt_index"], event["image_prompt"]) for event in lesson_events if "image_prompt" in event]
+    events, image_service = await collect(lesson_events)
+
+    final = events[-1]["image_prompts"]
+    assert streamed == [(0, "a leaf in sunlight"), (1, "a chloroplast")]
+    assert final[:2] == ["a leaf in sunlight", "a chloroplast"] and len(final) == 3
+    ready = [event["image_ready"]["index"] for event in events if "image_ready" in event]
+    assert sorted(ready) == [0, 1, 2]
+    assert sorted(image_service.prompts) == sorted(final)
@@ -0,0 +1,52 @@
+import pytest
+
+from app.services.stream_parser import LessonStreamParser, parse_lesson
+
+LESSON = (
+    "# Photosynthesis\n\nPlants turn light into sugar.\n\n"
+    "## IMAGE_PROMPTS:\n- a leaf in sunlight\n- a chloroplast\n- a glucose molecule\n"
+)
+
+REPEATED_MARKER = (
+    "Plants turn light into sugar.\n\n"
+    "IMAGE_PROMPTS:\n- a leaf in sunlight\n"
+    "IMAGE_PROMPTS:\n- a chloroplast\n- a glucose molecule\n"
+)
+
+
+def stream(text, size):
+    parser = LessonStreamParser()
+    events = []
+    for start in range(0, len(text), size):
+        events += parser.feed(text[start:start + size])
+    events += parser.finish()
+    return parser, events
+
+
+@pytest.mark.parametrize("text", [LESSON, REPEATED_MARKER, "No prompts at all"])
+@pytest.mark.parametrize("size", [1, 2, 5, 13, 1000])
+def test_streaming_matches_the_complete_parse(text, size):
+    parser, events = stream(text, size)
+
+    assert (parser.explanation, parser.image_prompts) == parse_lesson(text)
+    assert "".join(event["text"] for event in events if event["type"] == "text").strip() == parser.explanation
+    assert [event["prompt"] for event in events if event["type"] == "image_prompt"] == parser.image_prompts
+
+
+def test_marker_markup_is_not_part_of_the_explanation():
+    explanation, prompts = parse_lesson(LESSON)
+
+    assert explanation == "# Photosynthesis\n\nPlants turn light into sugar."
+    assert prompts == ["a leaf in sunlight", "a chloroplast", "a glucose molecule"]
+
+
+def test_only_prompts_before_a_repeated_marker_count():
+    # Same as the former response.split("IMAGE_PROMPTS")[1]
+    assert parse_lesson(REPEATED_MARKER) == ("Plants turn light into sugar.", ["a leaf in sunlight"])
+    assert parse_lesson("IMAGE_PROMPTS:\n- a leaf IMAGE_PROMPTS\n- a chloroplast")[1] == ["a leaf"]
+
+
+def test_prompts_are_capped():
+    _, prompts = parse_lesson("Text\nIMAGE_PROMPTS:\n- a\n- b\n- c\n- d", max_prompts=3)
+
+    assert prompts == ["a", "b", "c"]
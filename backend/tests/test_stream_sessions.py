@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from app.services.stream_sessions import StreamGapError, StreamMismatchError, StreamSessionRegistry
+
+KEY = ("photosynthesis", "high-school", False)
+
+
+async def numbers(count, delay=0.0):
+    for n in range(count):
+        await asyncio.sleep(delay)
+        yield {"n": n}
+
+
+async def read(session, after_seq=0):
+    return [(seq, event["n"]) async for seq, event in session.subscribe(after_seq)]
+
+
+@pytest.fixture
+async def make_registry():
+    registries = []
+
+    def make(max_events=100, grace_period=60.0):
+        registries.append(StreamSessionRegistry(max_events=max_events, ttl=60.0, grace_period=grace_period))
+        return registries[-1]
+
+    yield make
+    # Stop producers that are still running when a test ends
+    for registry in registries:
+        for session in registry._sessions.values():
+            session.close()
+            await asyncio.gather(session._task, return_exceptions=True)
+
+
+async def test_resume_replays_only_the_missed_events(make_registry):
+    registry = make_registry()
+    session = registry.create(numbers(5), KEY)
+    assert await read(session) == [(1, 0), (2, 1), (3, 2), (4, 3), (5, 4)]
+
+    resumed, after_seq = registry.resume(f"{session.stream_id}:3", KEY)
+
+    assert resumed is session
+    assert await read(resumed, after_seq) == [(4, 3), (5, 4)]
+    assert registry.resumed == 1
+
+
+async def test_resume_of_dropped_events_is_a_gap(make_registry):
+    registry = make_registry(max_events=3)
+    session = registry.create(numbers(10), KEY)
+    assert await read(session, 7) == [(8, 7), (9, 8), (10, 9)]
+
+    with pytest.raises(StreamGapError):
+        await read(session, 2)
+
+
+async def test_resume_checks_the_request(make_registry):
+    registry = make_registry()
+    session = registry.create(numbers(2), KEY)
+
+    with pytest.raises(StreamMismatchError):
+        registry.resume(f"{session.stream_id}:1", ("cell division", "high-school", False))
+    with pytest.raises(ValueError):
+        registry.resume(session.stream_id, KEY)
+    assert registry.resume("unknown:1", KEY) == (None, 0)
+
+
+async def test_cancelled_producer_reports_cancellation(make_registry):
+    registry = make_registry(grace_period=0.01)
+    session = registry.create(numbers(100, delay=0.01), KEY)
+    subscription = session.subscribe()
+    await subscription.__anext__()
+    await subscription.aclose()
+
+    await asyncio.sleep(0.05)
+
+    assert session.abandoned and session.done
+    assert session._task.cancelled()
+    with pytest.raises(RuntimeError):
+        await read(session)
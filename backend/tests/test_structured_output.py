@@ -0,0 +1,64 @@
+import json
+from typing import List
+
+import pytest
+from pydantic import BaseModel, TypeAdapter
+
+from app.services.structured_output import get_structured_output_stats, parse_structured, repair_json
+
+
+class Section(BaseModel):
+    title: str
+    content: str
+
+
+class Research(BaseModel):
+    introduction: str
+    sections: List[Section] = []
+
+
+ADAPTER = TypeAdapter(Research)
+
+
+@pytest.mark.parametrize("text, expected", [
+    # Truncated inside the second section: only complete sections are kept
+    ('{"introduction": "Intro", "sections": [{"title": "A", "content": "a"}, {"title": "B", "con',
+     {"introduction": "Intro", "sections": [{"title": "A", "content": "a"}]}),
+    # Truncated inside a string value
+    ('{"introduction": "Intro", "sections": [{"title": "A", "content": "half a sent',
+     {"introduction": "Intro", "sections": []}),
+    ('{"introduction": "Intro", "sections": [{"title": "A", "content": "a"},],}',
+     {"introduction": "Intro", "sections": [{"title": "A", "content": "a"}]}),
+    ('```json\n{"introduction": "Intro", "sections": []}\n```\nHope this helps!',
+     {"introduction": "Intro", "sections": []}),
+    ('Here is the research:\n{"introduction": "Intro", "sections": []} Let me know.',
+     {"introduction": "Intro", "sections": []}),
+])
+def test_repair_json(text, expected):
+    assert json.loads(repair_json(text)) == expected
+
+
+def test_fences_inside_string_values_are_content():
+    content = "Run it:\n```python\nprint(1)\n```\nDone."
+    document = json.dumps({"introduction": "Intro", "sections": [{"title": "Code", "content": content}]})
+
+    assert json.loads(repair_json(document))["sections"][0]["content"] == content
+    assert json.loads(repair_json(f"```json\n{document}\n```"))["sections"][0]["content"] == content
+
+
+def test_text_without_json_is_not_repaired():
+    assert repair_json("No JSON here.") is None
+
+
+def test_parse_structured_repairs_and_counts_outcomes():
+    valid = json.dumps({"introduction": "Intro", "sections": [{"title": "A", "content": "```x```"}]})
+
+    assert parse_structured(valid, ADAPTER, "test").sections[0].content == "```x```"
+    assert parse_structured(f"```json\n{valid}\n```", ADAPTER, "test").introduction == "Intro"
+    truncated = parse_structured('{"sections": [{"title": "A", "content": "a"}, {"ti', ADAPTER, "test",
+                                 defaults={"introduction": "Default"})
+    assert (truncated.introduction, len(truncated.sections)) == ("Default", 1)
+    assert parse_structured("Sorry, I can't help with that.", ADAPTER, "test") is None
+
+    stats = get_structured_output_stats()["test"]
+    assert (stats["parsed"], stats["repaired"], stats["fallback"]) == (1, 2, 1)
@@ -0,0 +1,95 @@
+import pytest
+
+from app.services.topic_index import TopicIndex, normalize_topic, normalize_audience
+
+
+@pytest.mark.parametrize("topic, canonical", [
+    ("Photosynthesis", "photosynthesis"),
+    ("  the Photosynthesis ", "photosynthesis"),
+    ("Work and energy", "work energy"),
+    ("Acids and Bases", "acid base"),
+    ("Photosynthesis processes", "photosynthesis process"),
+    ("string", "string"),
+    ("strings", "string"),
+    ("Newton's laws of motion", "newton law motion"),
+    ("Cities", "city"),
+    ("News media", "news media"),
+    ("Endangered species", "endangered species"),
+    ("Taylor series", "taylor series"),
+    ("Quantum physics", "quantum physics"),
+    ("Greenhouse gas", "greenhouse gas"),
+    ("Chaos theory", "chaos theory"),
+    ("Pies", "pie"),
+])
+def test_normalize_topic(topic, canonical):
+    assert normalize_topic(topic) == canonical
+
+
+def test_content_words_are_not_dropped():
+    assert normalize_topic("Work and energy") != normalize_topic("Energy")
+    assert normalize_topic("The concept of work") != normalize_topic("Work")
+
+
+def test_normalize_audience():
+    assert normalize_audience("High School") == "high-school"
+    assert normalize_audience("high_school") == "high-school"
+
+
+def index_with(*topics, threshold=0.85):
+    index = TopicIndex(threshold)
+    for topic in topics:
+        index.add("college", normalize_topic(topic))
+    return index
+
+
+def test_exact_match():
+    index = index_with("Photosynthesis")
+    assert index.find("college", normalize_topic("the photosynthesis")) == "photosynthesis"
+
+
+def test_near_duplicate_match():
+    index = index_with("Photosynthesis and cellular respiration")
+    assert index.find("college", normalize_topic("photosynthesis and cellular respiraton")) == \
+        "photosynthesis cellular respiration"
+
+
+def test_audience_levels_are_separate():
+    index = index_with("Photosynthesis")
+    assert index.find("graduate", "photosynthesis") is None
+
+
+@pytest.mark.parametrize("indexed, requested", [
+    ("Organic chemistry", "Inorganic chemistry"),
+    ("Linear algebra", "Nonlinear algebra"),
+    ("Linear equations", "Non-linear equations"),
+    ("World War I", "World War II"),
+    ("Apollo 11", "Apollo 13"),
+])
+def test_negations_and_numbers_never_match(indexed, requested):
+    # Far below the default threshold: the negation and number checks alone keep these apart
+    index = index_with(indexed, threshold=0.5)
+    assert index.find("college", normalize_topic(requested)) is None
+
+
+@pytest.mark.parametrize("indexed, requested", [
+    ("Energy", "Work and energy"),
+    ("Photosynthesis", "Photosynthesis processes"),
+    ("Organic chemistry", "Organic chemistry reaction mechanisms"),
+])
+def test_broader_topics_do_not_match(indexed, requested):
+    index = index_with(indexed)
+    assert index.find("college", normalize_topic(requested)) is None
+
+
+def test_least_recently_used_topics_are_dropped_at_capacity():
+    index = TopicIndex(0.85, max_topics=2)
+    index.add("college", "photosynthesis")
+    index.add("college", "cellular respiration")
+    assert index.find("college", "photosynthesis") == "photosynthesis"
+
+    index.add("college", "plate tectonics")
+
+    assert index.find("college", "cellular respiration") is None
+    assert index.find("college", "photosynthesis") == "photosynthesis"
+    assert index.get_stats()["topics"] == 2 and index.get_stats()["evictions"] == 1
+    assert all("cellular respiration" not in bucket for bucket in index._buckets.values())
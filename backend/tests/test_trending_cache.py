@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+
+from app.services.trending_cache import TrendingTopicsCache, normalize_level
+
+
+class FakeResearchService:
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.calls = []
+        self.fail = False
+        self.fallbacks = []
+
+    async def fetch_trending_topics(self, academic_level, limit, use_cache=True):
+        self.calls.append(academic_level)
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("LLM unavailable")
+        return [{"topic": f"{academic_level} {len(self.calls)}.{i}", "description": "", "relevance": ""}
+                for i in range(limit)]
+
+    def fallback_trending_topics(self, academic_level, limit, error):
+        self.fallbacks.append(error)
+        return [{"topic": "mock", "description": "", "relevance": ""}][:limit]
+
+
+@pytest.fixture
+async def make_cache():
+    caches = []
+
+    def make(service, **overrides):
+        options = dict(levels=["high school", "college"], refresh_interval=60.0, idle_ttl=3600.0,
+                       max_topics=5, max_levels=8, prewarm_levels=[])
+        options.update(overrides)
+        caches.append(TrendingTopicsCache(service, **options))
+        return caches[-1]
+
+    yield make
+    # Cancel refreshes still running when a test ends
+    for cache in caches:
+        await cache.stop()
+
+
+def test_normalize_level():
+    assert normalize_level(" High-School ") == "high school"
+    assert normalize_level("high_school") == "high school"
+
+
+async def test_concurrent_cold_requests_share_one_fetch(make_cache):
+    service = FakeResearchService()
+    cache = make_cache(service)
+
+    results = await asyncio.gather(*[cache.get("College", 3) for _ in range(10)])
+
+    assert service.calls == ["college"]
+    assert all(len(topics) == 3 for topics in results)
+    assert (await cache.get("college", 2))[0]["topic"] == "college 1.0"
+    assert cache.hits == 1
+
+
+async def test_stale_entry_is_served_while_refreshing(make_cache):
+    service = FakeResearchService()
+    cache = make_cache(service, refresh_interval=0.0)
+    await cache.get("college", 1)
+
+    topics = await cache.get("college", 1)
+    assert topics[0]["topic"] == "college 1.0"
+    assert cache.stale_hits == 1
+
+    await asyncio.sleep(0.05)
+    assert service.calls == ["college", "college"]
+    assert (await cache.get("college", 1))[0]["topic"] == "college 2.0"
+
+
+async def test_failed_refresh_keeps_previous_topics(make_cache):
+    service = FakeResearchService()
+    cache = make_cache(service, refresh_interval=0.0)
+    await cache.get("college", 1)
+
+    service.fail = True
+    await cache.get("college", 1)
+    await asyncio.sleep(0.05)
+
+    assert (await cache.get("college", 1))[0]["topic"] == "college 1.0"
+    assert cache.refresh_errors >= 1
+
+
+async def test_failed_first_fetch_serves_fallback_without_another_llm_call(make_cache):
+    service = FakeResearchService()
+    service.fail = True
+    cache = make_cache(service)
+
+    assert await cache.get("college", 1) == [{"topic": "mock", "description": "", "relevance": ""}]
+    assert service.calls == ["college"]
+    assert isinstance(service.fallbacks[0], RuntimeError)
+
+
+async def test_unknown_levels_are_not_cached(make_cache):
+    service = FakeResearchService()
+    cache = make_cache(service)
+
+    assert await cache.get("foo1", 3) is None
+    assert service.calls == []
+    assert cache.get_stats()["levels"] == {}
+
+
+async def test_idle_levels_are_evicted_instead_of_refreshed(make_cache):
+    service = FakeResearchService()
+    cache = make_cache(service, refresh_interval=0.0, idle_ttl=0.05)
+    await cache.get("college", 1)
+
+    await asyncio.sleep(0.1)
+    cache.refresh_due()
+
+    assert cache.get_stats()["levels"] == {}
+    assert cache.evictions == 1
+    assert service.calls == ["college"]
+
+
+@pytest.mark.parametrize("prewarm, expected", [(["College", "foo"], ["college"]), ([], [])])
+async def test_start_prewarms_known_levels(make_cache, prewarm, expected):
+    service = FakeResearchService()
+    cache = make_cache(service, prewarm_levels=prewarm)
+    cache.start()
+    await asyncio.sleep(0.05)
+
+    assert service.calls == expected
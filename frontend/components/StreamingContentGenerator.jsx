@@ -96,6 +96,9 @@ const StreamingContentGenerator = () => {
                 }
                 setStreaming(false);
                 setLoading(false);
+              } else if (data.image_prompt) {
+                // Image prompts arrive one by one while the lesson is still streaming
+                setImagePrompts(prev => [...prev, data.image_prompt]);
               } else {
                 // Append the new chunk to the content
                 setContent(prev => prev + data.chunk);
@@ -14,7 +14,7 @@ export default async function handler(req, res) {
   res.setHeader('Cache-Control', 'no-cache');
   res.setHeader('Connection', 'keep-alive');
 
-  const { topic, audience } = req.body;
+  const { topic, audience, include_images } = req.body;
 
   if (!topic || !audience) {
     res.write(`data: ${JSON.stringify({ error: 'Missing required fields' })}\n\n`);
@@ -30,13 +30,20 @@ export default async function handler(req, res) {
     
     console.log(`Making request to backend API: ${apiUrl}`);
     
+    const headers = {
+      'Content-Type': 'application/json',
+      'Accept': 'text/event-stream',
+    };
+    // Lets a reconnecting client resume the backend stream after the last event it received
+    const lastEventId = req.headers['last-event-id'];
+    if (lastEventId) {
+      headers['Last-Event-ID'] = lastEventId;
+    }
+
     const response = await fetch(apiUrl, {
       method: 'POST',
-      headers: {
-        'Content-Type': 'application/json',
-        'Accept': 'text/event-stream',
-      },
-      body: JSON.stringify({ topic, audience }),
+      headers,
+      body: JSON.stringify({ topic, audience, include_images }),
     });
 
     if (!response.ok) {
@@ -50,6 +57,7 @@ export default async function handler(req, res) {
     // Read the response as a stream
     const reader = response.body.getReader();
     const decoder = new TextDecoder();
+    let buffer = '';
 
     try {
       while (true) {
@@ -62,13 +70,17 @@ export default async function handler(req, res) {
           break;
         }
         
-        const chunk = decoder.decode(value, { stream: true });
-        const lines = chunk.split('\n').filter(line => line.trim() !== '');
+        // A read can end mid-line, keep the partial line for the next one
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
         
         for (const line of lines) {
-          if (line.startsWith('data: ')) {
-            const data = line.slice(6);
-            res.write(`data: ${data}\n\n`);
+          // Event ids are passed through so the client can send them back as Last-Event-ID
+          if (line.startsWith('id: ') || line.startsWith('data: ')) {
+            res.write(`${line}\n`);
+          } else if (line.trim() === '') {
+            res.write('\n');
           }
         }
         